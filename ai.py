@@ -0,0 +1,92 @@
+import json
+import random
+import streamlit as st
+from config import CONFIG, get_secrets
+from metrics import traced_openai
+
+# ==========================================
+# AI 辅助 (OpenAI)
+# ==========================================
+@st.cache_resource
+def get_openai_client(api_key, timeout=None, max_retries=2):
+    from openai import OpenAI
+    return traced_openai(OpenAI(api_key=api_key, timeout=timeout, max_retries=max_retries))
+
+def get_client():
+    """当前密钥对应的共享 OpenAI 客户端，未配置时返回 None"""
+    key = get_secrets()["OPENAI_KEY"]
+    try: return get_openai_client(key) if key else None
+    except: return None
+
+def parse_product_info_with_ai(text_content, client):
+    if not text_content: return None
+    prompt = f"""
+    Role: B2B Assistant. Analyze input.
+    Output JSON: {{ "name_ru": "...", "model": "...", "price_cny": 0.0, "qty": 0, "desc_ru": "Short summary" }}
+    """
+    try:
+        res = client.chat.completions.create(model=CONFIG["AI_MODEL"], messages=[{"role":"user", "content": prompt}], response_format={"type": "json_object"})
+        return json.loads(res.choices[0].message.content)
+    except: return None
+
+def get_daily_motivation(client):
+    if "motivation_quote" not in st.session_state:
+        local_quotes = ["心有繁星，沐光而行。", "坚持是另一种形式的天赋。", "每一步都算数。"]
+        try:
+            if not client: raise Exception("No Client")
+            prompt = "生成一句简短的中文职场励志语。无表情符号。"
+            res = client.chat.completions.create(model=CONFIG["AI_MODEL"], messages=[{"role":"user","content":prompt}], temperature=0.9, max_tokens=60)
+            st.session_state["motivation_quote"] = res.choices[0].message.content
+        except: st.session_state["motivation_quote"] = random.choice(local_quotes)
+    return st.session_state["motivation_quote"]
+
+# 🔥 核心升级：AI 生成纯文本，Python 转 HTML，增加客户称呼判断
+def ai_generate_email_reply(client, context, user_username, shop_name, customer_name=None):
+    greeting = f"Здравствуйте, {customer_name}" if customer_name else f"Здравствуйте, команда {shop_name}"
+    
+    prompt = f"""
+    Role: Professional Logistics Sales Rep from 988 Group.
+    My Name: {user_username}
+    Target Client: {shop_name} (Ozon Seller).
+    
+    Task: Write a cold email body in Russian.
+    Requirements:
+    1. Greeting: "{greeting}, я увидел ваш магазин на Ozon и..." (Must use Russian).
+    2. Context: Infer what they sell based on the shop name (e.g. if name is "ToyStore", mention toys in Russian).
+    3. Offer: We provide fast customs clearance and white tax compliance for their specific products.
+    4. Format: PLAIN TEXT only. Use newlines for paragraphs. NO HTML tags (no <br>, no <p>).
+    5. Tone: Professional, direct. No emojis.
+    
+    Output JSON: {{ "body_text": "..." }}
+    """
+    try:
+        res = client.chat.completions.create(model="gpt-4o", messages=[{"role":"user","content":prompt}], response_format={"type": "json_object"})
+        return json.loads(res.choices[0].message.content)
+    except: return None
+
+def get_ai_message_sniper(client, shop, link, rep_name):
+    offline = f"Здравствуйте! Заметили ваш магазин {shop} на Ozon. {rep_name} из 988 Group на связи. Мы занимаемся поставками из Китая. Можем рассчитать логистику?"
+    if not shop or str(shop).lower() in ['nan', 'none', '']: return "数据缺失"
+    prompt = f"""
+    Role: Supply Chain Manager '{rep_name}' at 988 Group.
+    Target: Ozon Seller '{shop}' (Link: {link}).
+    Task: Write Russian WhatsApp intro (under 50 words). Professional. No emojis.
+    """
+    try:
+        if not client: return offline
+        res = client.chat.completions.create(model=CONFIG["AI_MODEL"],messages=[{"role":"user","content":prompt}])
+        return res.choices[0].message.content.strip()
+    except: return offline
+
+def get_wechat_maintenance_script(client, customer_code, rep_name):
+    offline = f"您好，我是 988 Group 的 {rep_name}。最近生意如何？工厂那边出了一些新品，如果您需要补货或者看新款，随时联系我。"
+    prompt = f"""
+    Role: Account Manager '{rep_name}'.
+    Target: Customer '{customer_code}'.
+    Task: Write short Chinese maintenance message. Professional. No emojis.
+    """
+    try:
+        if not client: return offline
+        res = client.chat.completions.create(model=CONFIG["AI_MODEL"],messages=[{"role":"user","content":prompt}])
+        return res.choices[0].message.content.strip()
+    except: return offline
@@ -0,0 +1,37 @@
+import streamlit as st
+import pandas as pd
+from config import CONFIG, get_secrets
+from leads import get_public_pool_count, import_lead_file, get_lead_recycler
+
+# ------------------------------------------
+# 批量进货 (Import)
+# ------------------------------------------
+secrets = get_secrets()
+CN_USER, CN_KEY = secrets["CN_USER"], secrets["CN_KEY"]
+
+recycler = get_lead_recycler()
+if st.button("回收过期任务"):
+    r = recycler.run("手动")
+    if r['error']: st.error(r['error'])
+    else: st.success(f"已回收 {r['recycled']} 个任务，清理 {r['cleared']} 条过期话术")
+
+pool = get_public_pool_count()
+st.metric("公海池库存", pool, help=f"低于 {CONFIG['LOW_STOCK_THRESHOLD']} 时请尽快进货")
+if pool < CONFIG["LOW_STOCK_THRESHOLD"]: st.warning("公海池库存不足，明早领取前请补货")
+if recycler.history:
+    with st.expander(f"后台回收记录 (每 {recycler.interval // 60} 分钟及每天零点后自动运行)"):
+        hist = pd.DataFrame(recycler.history).iloc[::-1]
+        st.dataframe(hist.rename(columns={'time': '时间', 'trigger': '触发', 'recycled': '回收', 'cleared': '清理话术', 'batches': '批次', 'pool': '运行后库存', 'error': '错误', 'ms': '耗时 ms'}), hide_index=True, use_container_width=True)
+
+st.markdown("#### 批量导入")
+force = st.checkbox("跳过验证（强行入库）")
+f = st.file_uploader("上传 Excel/CSV", type=['csv', 'xlsx'])
+if f and st.button("开始清洗入库"):
+    try:
+        df = pd.read_csv(f) if f.name.endswith('.csv') else pd.read_excel(f)
+        st.info(f"解析到 {len(df)} 行数据")
+        with st.status("正在处理...", expanded=True) as s:
+            import_lead_file(df, verify=not force, cn_key=CN_KEY, cn_user=CN_USER,
+                             on_batch=lambda count, last: s.write(f"{'最终批次' if last else '批次'}入库: {count}"))
+            s.update(label="处理完成", state="complete")
+    except Exception as e: st.error(str(e))
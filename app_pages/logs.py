@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+import streamlit as st
+from leads import get_daily_logs
+from exports import EXPORT_FORMATS, COMPLETION_COLUMNS, REP_STAT_COLUMNS, completion_rows, rep_stat_rows, write_export, export_reader, discard_export
+
+# ------------------------------------------
+# 活动日志 (Logs)
+# ------------------------------------------
+st.markdown("#### 活动日志监控")
+span = st.radio("时间范围", ["单日", "近 7 天", "近 30 天", "近 90 天"], horizontal=True)
+if span == "单日":
+    d_start = d_end = st.date_input("选择日期", date.today())
+else:
+    d_end = date.today()
+    d_start = d_end - timedelta(days=int(span.split()[1]) - 1)
+c, f = get_daily_logs(d_start.isoformat(), d_end.isoformat())
+c1, c2 = st.columns(2)
+with c1: st.markdown("领取记录"); st.dataframe(c, use_container_width=True)
+with c2: st.markdown("完成记录"); st.dataframe(f, use_container_width=True)
+
+# ------------------------------------------
+# 导出所选时间范围的完成记录 / 业务员统计 (逐页读取写入文件，不在页面里整表加载)
+# ------------------------------------------
+with st.expander("导出数据"):
+    e1, e2 = st.columns(2)
+    what = e1.selectbox("内容", ["完成记录", "业务员统计"], key="log_export_what")
+    fmt = e2.radio("格式", EXPORT_FORMATS, horizontal=True, key="log_export_fmt")
+    if st.button(f"导出 {d_start} ~ {d_end}", key="log_export_go"):
+        columns, rows = (COMPLETION_COLUMNS, completion_rows(d_start.isoformat(), d_end.isoformat())) if what == "完成记录" \
+            else (REP_STAT_COLUMNS, rep_stat_rows(d_start.isoformat(), d_end.isoformat()))
+        with st.status("正在导出...", expanded=False) as s:
+            try:
+                export = write_export(what, columns, rows, fmt, on_progress=lambda n: s.update(label=f"正在导出... 已写入 {n} 行"))
+                discard_export(st.session_state.get("log_export"))
+                st.session_state["log_export"] = export
+                s.update(label=f"导出完成：{export['rows']} 行", state="complete")
+            except Exception as e: s.update(label=f"导出失败: {e}", state="error")
+    export = st.session_state.get("log_export")
+    if export:
+        st.download_button(f"下载 {export['file_name']} ({export['rows']} 行)", data=export_reader(export['path']),
+                           file_name=export['file_name'], mime=export['mime'], on_click="ignore", key="log_export_dl")
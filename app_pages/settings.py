@@ -0,0 +1,34 @@
+import streamlit as st
+from db import get_user_email_config, update_user_email_config
+
+# ------------------------------------------
+# 邮箱配置 (Settings)
+# ------------------------------------------
+st.markdown("#### 个人邮箱配置")
+st.caption("配置您的 SMTP/IMAP 信息以启用邮件营销功能。")
+
+current_config = get_user_email_config(st.session_state['username']) or {}
+
+with st.form("email_config_form"):
+    c1, c2 = st.columns(2)
+    email_addr = c1.text_input("邮箱地址", value=current_config.get('email', ''))
+    email_pass = c2.text_input("授权码/密码", type="password", value=current_config.get('password', ''), help="对于 Gmail/QQ/网易，请使用应用专用密码")
+
+    c3, c4 = st.columns(2)
+    smtp_srv = c3.text_input("SMTP 服务器", value=current_config.get('smtp_server', 'smtp.gmail.com'))
+    smtp_port = c4.text_input("SMTP 端口", value=current_config.get('smtp_port', '465'))
+
+    c5, c6 = st.columns(2)
+    imap_srv = c5.text_input("IMAP 服务器", value=current_config.get('imap_server', 'imap.gmail.com'))
+    imap_port = c6.text_input("IMAP 端口", value=current_config.get('imap_port', '993'))
+
+    if st.form_submit_button("保存配置"):
+        cfg = {
+            "email": email_addr, "password": email_pass,
+            "smtp_server": smtp_srv, "smtp_port": smtp_port,
+            "imap_server": imap_srv, "imap_port": imap_port
+        }
+        if update_user_email_config(st.session_state['username'], cfg):
+            st.success("配置已保存")
+        else:
+            st.error("保存失败")
@@ -0,0 +1,107 @@
+import time
+from datetime import datetime
+import streamlit as st
+import pandas as pd
+from config import CONFIG, get_secrets
+from db import supabase
+from leads import get_frozen_leads_count
+from phones import extract_all_numbers
+from checknumber import process_checknumber_task
+from health import get_health_monitor
+from metrics import metrics, call_site_stats, service_error_stats
+
+# ------------------------------------------
+# System & Admin
+# ------------------------------------------
+secrets = get_secrets()
+CN_USER, CN_KEY, OPENAI_KEY = secrets["CN_USER"], secrets["CN_KEY"], secrets["OPENAI_KEY"]
+
+with st.expander("API 调试器"):
+    st.code(f"Model: {CONFIG['AI_MODEL']}")
+    st.code(f"Key (Last 5): {OPENAI_KEY[-5:] if OPENAI_KEY else 'N/A'}")
+
+frozen_count, frozen_leads = get_frozen_leads_count()
+if frozen_count > 0:
+    st.markdown(f"""<div class="custom-alert alert-error">警告：有 {frozen_count} 个任务被冻结</div>""", unsafe_allow_html=True)
+    with st.expander("查看冻结详情", expanded=True):
+        if frozen_count > len(frozen_leads): st.caption(f"仅显示前 {len(frozen_leads)} 条")
+        st.dataframe(pd.DataFrame(frozen_leads))
+        if st.button("清除所有冻结"):
+            supabase.table('leads').delete().eq('is_frozen', True).execute()
+            st.success("已清除"); time.sleep(1); st.rerun()
+
+st.markdown("#### 系统健康状态")
+HEALTH_TICK = 5  # 片段轮询间隔 (秒)：只读监控对象里的最近结果，后台检测完成后自动显示
+monitor = get_health_monitor()
+
+def status_pill(title, is_active, detail):
+    # is_active 为 None 表示首次检测尚未完成
+    dot = "dot-gray" if is_active is None else "dot-green" if is_active else "dot-red"
+    text = "检测中" if is_active is None else "运行正常" if is_active else "连接异常"
+    st.markdown(f"""<div style="background-color:rgba(30, 31, 32, 0.6); backdrop-filter:blur(10px); padding:20px; border-radius:16px;"><div style="font-size:14px; color:#c4c7c5;">{title}</div><div style="margin-top:10px; font-size:16px; color:white; font-weight:500;"><span class="status-dot {dot}"></span>{text}</div><div style="font-size:12px; color:#8e8e8e; margin-top:5px;">{detail}</div></div>""", unsafe_allow_html=True)
+
+@st.fragment(run_every=HEALTH_TICK)
+def health_panel():
+    c_h, c_btn = st.columns([4, 1])
+    with c_btn:
+        if st.button("立即检测"): monitor.refresh(CN_USER, CN_KEY, OPENAI_KEY)
+    health, checked_at = monitor.snapshot(CN_USER, CN_KEY, OPENAI_KEY)
+    with c_h:
+        if health: st.caption(f"上次检测: {datetime.fromtimestamp(checked_at).strftime('%H:%M:%S')} (每 {monitor.ttl} 秒后台刷新)")
+        else: st.caption("正在后台检测...")
+    if not health: health = {"supabase": None, "checknumber": None, "openai": None, "msg": [], "latency": {}}
+
+    k1, k2, k3 = st.columns(3)
+    lat = health['latency']
+    with k1: status_pill("云数据库", health['supabase'], f"Supabase · {lat.get('supabase', '-')} ms")
+    with k2: status_pill("验证接口", health['checknumber'], f"CheckNumber · {lat.get('checknumber', '-')} ms")
+    with k3: status_pill("AI 引擎", health['openai'], f"OpenAI ({CONFIG['AI_MODEL']}) · {lat.get('openai', '-')} ms")
+
+    if health['msg']:
+        st.markdown(f"""<div class="custom-alert alert-error">诊断报告: {'; '.join(health['msg'])}</div>""", unsafe_allow_html=True)
+
+    if len(monitor.history) > 1:
+        with st.expander("延迟历史 (ms)"):
+            st.line_chart(pd.DataFrame(list(monitor.history)).set_index("time"))
+
+health_panel()
+
+st.markdown("#### 性能埋点")
+st.caption(f"外部调用耗时 (最近 {metrics.events.maxlen} 次调用 / {metrics.runs.maxlen} 次重跑，进程内存储)。数据量：数据库为返回行数，OpenAI 为 tokens，SMTP / CheckNumber 为字节，IMAP 为邮件数")
+events, runs = metrics.events_frame(), metrics.runs_frame()
+if events.empty and runs.empty: st.info("暂无埋点数据")
+else:
+    users = ["全部用户"] + sorted(set(events['user'].dropna()) | set(runs['user'].dropna()))
+    who = st.selectbox("按用户筛选", users, key="perf_user")
+    if who != "全部用户": events, runs = events[events['user'] == who], runs[runs['user'] == who]
+
+    st.dataframe(call_site_stats(events), use_container_width=True)
+    c_slow, c_err = st.columns([3, 2])
+    with c_slow:
+        st.caption("最慢的重跑")
+        slowest = runs.nlargest(10, 'total_ms')[['ts', 'user', 'page', 'total_ms', 'io_ms', 'calls']].round(1)
+        st.dataframe(slowest.rename(columns={'ts': '时间', 'user': '用户', 'page': '页面', 'total_ms': '总耗时 ms', 'io_ms': '外部调用 ms', 'calls': '调用次数'}), hide_index=True, use_container_width=True)
+    with c_err:
+        st.caption("错误率")
+        st.dataframe(service_error_stats(events), use_container_width=True)
+        recent_errors = events[events['error'].notna()].tail(10)
+        if not recent_errors.empty:
+            st.dataframe(recent_errors[['ts', 'service', 'site', 'error']].iloc[::-1], hide_index=True, use_container_width=True)
+
+st.markdown("<br>", unsafe_allow_html=True)
+st.markdown("#### 沙盒模拟")
+sb_file = st.file_uploader("上传测试文件", type=['csv', 'xlsx'])
+if sb_file and st.button("开始模拟"):
+    try:
+        if sb_file.name.endswith('.csv'): df = pd.read_csv(sb_file)
+        else: df = pd.read_excel(sb_file)
+        st.info(f"读取到 {len(df)} 行数据")
+        with st.status("正在运行流水线...", expanded=True) as s:
+            nums = []
+            for _, r in df.head(5).iterrows(): nums.extend(extract_all_numbers(r))
+            s.write(f"提取结果: {nums}")
+            res, _, _ = process_checknumber_task(nums, CN_KEY, CN_USER)
+            valid = [p for p in nums if res.get(p)=='valid']
+            s.write(f"有效号码: {valid}")
+            s.update(label="模拟完成", state="complete")
+    except Exception as e: st.error(str(e))
@@ -0,0 +1,65 @@
+import time
+import streamlit as st
+import pandas as pd
+from db import iter_rows, create_user, update_user_limit
+from leads import get_team_leaderboard, get_user_daily_performance, get_user_historical_data
+from exports import EXPORT_FORMATS, LEAD_COLUMNS, lead_rows, write_export, export_reader, discard_export
+
+# ------------------------------------------
+# 团队管理 (Team)
+# ------------------------------------------
+# users 表没有 id 列，按唯一的 username 分页
+try: users = pd.DataFrame(iter_rows('users', 'username, real_name, points, daily_limit, last_seen', lambda q: q.neq('role', 'admin'), key='username'))
+except: users = pd.DataFrame()
+c1, c2 = st.columns([1, 2])
+with c1:
+    u = st.radio("员工列表", users['username'].tolist() if not users.empty else [], label_visibility="collapsed")
+    with st.expander("新增员工"):
+        with st.form("new_user"):
+            nu = st.text_input("用户名"); np = st.text_input("密码", type="password"); nn = st.text_input("真实姓名")
+            if st.form_submit_button("创建账号"): create_user(nu, np, nn); st.rerun()
+with c2:
+    if u:
+        info = users[users['username']==u].iloc[0]
+        board = get_team_leaderboard()
+        rank = board[board['username']==u] if not board.empty else board
+        tc = int(rank.iloc[0]['total_claimed']) if not rank.empty else 0
+        td = int(rank.iloc[0]['total_done']) if not rank.empty else 0
+        perf = get_user_daily_performance(u)
+        st.markdown(f"### {info['real_name']}")
+        st.caption(f"账号: {info['username']} | 积分: {info.get('points', 0)} | 累计领取: {tc} | 累计完成: {td} | 最后上线: {str(info.get('last_seen','-'))[:16]}")
+
+        new_limit = st.slider("每日任务上限", 0, 100, int(info.get('daily_limit') or 25))
+        if st.button("更新上限"): update_user_limit(u, new_limit); st.toast("已更新"); time.sleep(0.5); st.rerun()
+
+        st.bar_chart(perf)
+
+        if st.toggle("查看完成记录", key=f"hist_{u}"):
+            hist_page = st.number_input("页码", min_value=1, value=1, step=1, key=f"hist_page_{u}")
+            _, _, hist = get_user_historical_data(u, history_page=int(hist_page))
+            if hist.empty: st.caption("没有更多记录")
+            else: st.dataframe(hist, use_container_width=True)
+
+with st.expander("团队排行榜"):
+    board = get_team_leaderboard()
+    if not board.empty:
+        st.dataframe(board.rename(columns={'username': '账号', 'real_name': '姓名', 'points': '积分', 'total_claimed': '累计领取', 'total_done': '累计完成'}), use_container_width=True, hide_index=True)
+
+with st.expander("导出线索"):
+    e1, e2 = st.columns(2)
+    scope = e1.radio("范围", ["全部线索", f"{u} 名下"] if u else ["全部线索"], horizontal=True, key="team_export_scope")
+    fmt = e2.radio("格式", EXPORT_FORMATS, horizontal=True, key="team_export_fmt")
+    if st.button("生成导出文件", key="team_export_go"):
+        # 逐页读取写入文件，百万行也不会整表加载进进程
+        with st.status("正在导出...", expanded=False) as s:
+            try:
+                export = write_export("线索", LEAD_COLUMNS, lead_rows(None if scope == "全部线索" else u), fmt,
+                                      on_progress=lambda n: s.update(label=f"正在导出... 已写入 {n} 行"))
+                discard_export(st.session_state.get("team_export"))
+                st.session_state["team_export"] = export
+                s.update(label=f"导出完成：{export['rows']} 行", state="complete")
+            except Exception as e: s.update(label=f"导出失败: {e}", state="error")
+    export = st.session_state.get("team_export")
+    if export:
+        st.download_button(f"下载 {export['file_name']} ({export['rows']} 行)", data=export_reader(export['path']),
+                           file_name=export['file_name'], mime=export['mime'], on_click="ignore", key="team_export_dl")
@@ -0,0 +1,187 @@
+import time
+from datetime import date
+import streamlit as st
+import pandas as pd
+from config import CONFIG, load_logo_b64
+from ai import get_client, parse_product_info_with_ai
+from quotation import XLSXWRITER_INSTALLED, image_store, quotation_cache_key, get_quotation_excel_cached
+from vision import parse_images_with_ai, crop_images
+from audio import transcribe_audio_stream
+
+# ------------------------------------------
+# 实用工具 (Tools) - 包含报价生成器
+# ------------------------------------------
+client = get_client()
+COMPANY_LOGO_B64 = load_logo_b64()
+
+tab_quote, tab_trans = st.tabs(["报价生成器", "俄语语音翻译"])
+
+with tab_quote:
+    if not XLSXWRITER_INSTALLED:
+        st.error("未安装 XlsxWriter 库。")
+    else:
+        if "quote_items" not in st.session_state: st.session_state["quote_items"] = []
+
+        with st.container():
+            st.markdown("#### 添加商品")
+            # 默认优先展示 AI 识别
+            sub_t1, sub_t2 = st.tabs(["AI 智能识别 (优先)", "人工录入"])
+
+            with sub_t1:
+                c_text_ai, c_img_ai = st.columns([2, 1])
+                with c_text_ai:
+                    ai_input_text = st.text_area("粘贴文字/链接", height=100, placeholder="例如：1688 链接或聊天记录")
+                with c_img_ai:
+                    ai_input_images = st.file_uploader("上传产品图 (可多选)", type=['jpg', 'png', 'jpeg'], accept_multiple_files=True)
+
+                if st.button("开始 AI 分析"):
+                    with st.status("AI 正在思考中...", expanded=True) as status:
+                        new_items = []
+                        if ai_input_images:
+                            status.write(f"正在进行多目标视觉分析 & 智能裁剪 ({len(ai_input_images)} 张)...")
+                            originals = [f.getvalue() for f in ai_input_images]
+                            ai_results = parse_images_with_ai(originals, client, CONFIG["AI_MODEL"]) if client else []
+                            for original_bytes, ai_res in zip(originals, ai_results):
+                                if not ai_res or "items" not in ai_res: continue
+                                crops = crop_images(original_bytes, [raw_item.get("bbox_1000") for raw_item in ai_res["items"]])
+                                for raw_item, cropped_bytes in zip(ai_res["items"], crops):
+                                    new_items.append({
+                                        "model": raw_item.get('model', ''), 
+                                        "name": raw_item.get('name_ru', 'Item'), 
+                                        "desc": raw_item.get('desc_ru', ''), 
+                                        "price_exw": float(raw_item.get('price_cny', 0)), 
+                                        "qty": int(raw_item.get('qty', 1)), 
+                                        "image_hash": image_store.put(cropped_bytes)
+                                    })
+                        elif ai_input_text:
+                            status.write("正在理解语义...")
+                            ai_res = parse_product_info_with_ai(ai_input_text, client)
+                            if ai_res:
+                                 new_items.append({
+                                    "model": ai_res.get('model', ''), 
+                                    "name": ai_res.get('name_ru', 'Item'), 
+                                    "desc": ai_res.get('desc_ru', ''), 
+                                    "price_exw": float(ai_res.get('price_cny', 0)), 
+                                    "qty": int(ai_res.get('qty', 1)), 
+                                    "image_hash": None
+                                })
+
+                        if new_items:
+                            st.session_state["quote_items"].extend(new_items)
+                            status.update(label=f"成功添加 {len(new_items)} 个商品", state="complete")
+                            time.sleep(1)
+                            st.rerun()
+                        else:
+                            status.update(label="识别失败", state="error")
+
+            with sub_t2:
+                with st.form("manual_add", clear_on_submit=True):
+                    c_img, c_main = st.columns([1, 3])
+                    with c_img:
+                        img_file = st.file_uploader("图片", type=['png', 'jpg', 'jpeg'])
+                    with c_main:
+                        c1, c2, c3 = st.columns(3)
+                        model = c1.text_input("型号")
+                        name = c2.text_input("名称 (俄语)")
+                        price_exw = c3.number_input("工厂单价 (¥)", min_value=0.0, step=0.1)
+                        c4, c5 = st.columns([1, 2])
+                        qty = c4.number_input("数量", min_value=1, step=1)
+                        desc = c5.text_input("描述 (俄语)")
+                    if st.form_submit_button("添加清单"):
+                        img_data = img_file.getvalue() if img_file else None
+                        st.session_state["quote_items"].append({"model": model, "name": name, "desc": desc, "price_exw": price_exw, "qty": qty, "image_hash": image_store.put(img_data)})
+                        st.success("已添加")
+                        st.rerun()
+
+        st.divider()
+
+        col_list, col_setting = st.columns([2, 1])
+
+        with col_list:
+            st.markdown("#### 报价清单")
+            items = st.session_state["quote_items"]
+            if items:
+                # 清单里只有图片哈希，原图在 image_store 中，生成 Excel 时才读回
+                df_show = pd.DataFrame(items, columns=['model', 'name', 'price_exw', 'qty'])
+                st.dataframe(df_show, use_container_width=True)
+                if st.button("清空清单"):
+                    st.session_state["quote_items"] = []
+                    st.session_state.pop("quote_excel", None); st.session_state.pop("quote_excel_key", None)
+                    st.rerun()
+            else:
+                st.info("暂无商品")
+
+        with col_setting:
+            with st.container():
+                st.markdown("#### 全局设置")
+                total_freight = st.number_input("国内总运费 (¥)", min_value=0.0, step=10.0)
+                service_fee = st.slider("服务费率 (%)", 0, 50, 5)
+
+                with st.expander("表头信息设置"):
+                    co_name = st.text_input("公司名称", value="义乌市万昶进出口有限公司")
+                    co_tel = st.text_input("电话", value="+86-15157938188")
+                    co_wechat = st.text_input("WeChat", value="15157938188")
+                    co_email = st.text_input("邮箱", value="CTF1111@163.com")
+                    co_addr = st.text_input("地址", value="义乌市工人北路1121号5楼")
+
+                st.markdown("<br>", unsafe_allow_html=True)
+
+                if items:
+                    product_total_exw = sum(i['price_exw'] * i['qty'] for i in items)
+                    service_fee_val = product_total_exw * (service_fee/100)
+                    final_val = product_total_exw + total_freight + service_fee_val
+
+                    st.markdown(f"""
+                    <div style="padding:15px; border:1px solid #444; border-radius:10px; background:rgba(255,255,255,0.05)">
+                        <div style="display:flex; justify-content:space-between; font-size:13px; color:#8e8e8e">
+                            <span>工厂货值 (EXW):</span> <span>¥ {product_total_exw:,.2f}</span>
+                        </div>
+                        <div style="display:flex; justify-content:space-between; font-size:13px; color:#8e8e8e; margin-top:5px;">
+                            <span>+ 国内运费:</span> <span>¥ {total_freight:,.2f}</span>
+                        </div>
+                        <div style="display:flex; justify-content:space-between; font-size:13px; color:#8e8e8e; margin-top:5px;">
+                            <span>+ 服务费 ({service_fee}%):</span> <span>¥ {service_fee_val:,.2f}</span>
+                        </div>
+                        <div style="height:1px; background:#555; margin:10px 0;"></div>
+                        <div style="display:flex; justify-content:space-between; font-size:18px; font-weight:600; color:#fff">
+                            <span>总计 (Total):</span> <span>¥ {final_val:,.2f}</span>
+                        </div>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                    company_info = {
+                        "name":co_name, "tel":co_tel, "wechat":co_wechat, 
+                        "email":co_email, "addr":co_addr, "logo_b64": COMPANY_LOGO_B64
+                    }
+                    # 只在点击生成时构建工作簿；内容未变时复用缓存，内容变化后需重新生成
+                    quote_key = quotation_cache_key(items, service_fee, total_freight, company_info)
+                    if st.session_state.get("quote_excel_key") != quote_key:
+                        if st.button("生成 Excel 报价单"):
+                            with st.spinner("正在生成报价单..."):
+                                st.session_state["quote_excel"] = get_quotation_excel_cached(quote_key, items, service_fee, total_freight, company_info)
+                                st.session_state["quote_excel_key"] = quote_key
+                    if st.session_state.get("quote_excel_key") == quote_key:
+                        st.download_button("下载 Excel 报价单", data=st.session_state["quote_excel"], file_name=f"Quotation_{date.today().isoformat()}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", type="primary")
+
+with tab_trans:
+    st.markdown("#### 俄语语音翻译器")
+    uploaded_audio = st.file_uploader("上传语音 (mp3, wav, m4a)", type=['mp3', 'wav', 'm4a', 'ogg', 'webm'])
+    if uploaded_audio and st.button("开始翻译"):
+        if not client: st.error("未配置 OpenAI")
+        else:
+            status = st.status("正在听写 & 翻译...", expanded=False)
+            c1, c2 = st.columns(2)
+            with c1:
+                st.markdown("**俄语原文**")
+                ru_box = st.empty()
+            with c2:
+                st.markdown("**中文翻译**")
+                cn_box = st.empty()
+            # 分块完成一个就刷新一次，按原始顺序拼接
+            ru_parts, cn_parts = {}, {}
+            for idx, ru, cn, total in transcribe_audio_stream(client, uploaded_audio.getvalue(), uploaded_audio.name):
+                ru_parts[idx], cn_parts[idx] = ru, cn
+                status.update(label=f"正在处理 ({len(ru_parts)}/{total})...")
+                ru_box.info("\n\n".join(ru_parts[i] for i in sorted(ru_parts)))
+                cn_box.success("\n\n".join(cn_parts[i] for i in sorted(cn_parts)))
+            status.update(label="完成", state="complete")
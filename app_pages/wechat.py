@@ -0,0 +1,67 @@
+import streamlit as st
+import pandas as pd
+from config import CONFIG
+from ai import get_client, get_wechat_maintenance_script
+from leads import WECHAT_CHUNK, admin_import_wechat_customers, complete_wechat_task, get_wechat_tasks
+
+# ------------------------------------------
+# 微信管理 / 微信维护 (WeChat)
+# ------------------------------------------
+client = get_client()
+WECHAT_PAGE_SIZE = 10
+
+if st.session_state['role'] == 'admin':
+    st.markdown("#### 微信客户管理")
+    with st.expander("导入微信客户", expanded=True):
+        st.caption("格式：客户编号 | 业务员 | 周期")
+        wc_file = st.file_uploader("上传 Excel", type=['xlsx', 'csv'], key="wc_up")
+        if wc_file and st.button("开始导入"):
+            try:
+                # CSV 分块读取，大文件也只占一块的内存
+                data = pd.read_csv(wc_file, chunksize=WECHAT_CHUNK) if wc_file.name.endswith('.csv') else pd.read_excel(wc_file)
+                with st.status("正在导入...", expanded=False) as s:
+                    reports = admin_import_wechat_customers(data, on_chunk=lambda r: s.write(f"第 {r['chunk']} 块：新增 {r['inserted']}，更新 {r['updated']}，拒绝 {r['rejected']}"))
+                    s.update(label="导入完成", state="complete")
+                if reports:
+                    inserted, updated = sum(r['inserted'] for r in reports), sum(r['updated'] for r in reports)
+                    errors = [e for r in reports for e in r['errors']]
+                    st.markdown(f"""<div class="custom-alert alert-success">新增 {inserted} 个客户，更新 {updated} 个，拒绝 {len(errors)} 行</div>""", unsafe_allow_html=True)
+                    if errors: st.dataframe(pd.DataFrame(errors).rename(columns={'row': '行号', 'customer_code': '客户编号', 'reason': '原因'}), hide_index=True, use_container_width=True)
+                else: st.markdown("""<div class="custom-alert alert-error">导入失败</div>""", unsafe_allow_html=True)
+            except Exception as e: st.error(str(e))
+else:
+    st.markdown("#### 微信维护助手")
+    # 到期队列按页读取 (最早到期的在前)，多取一行判断是否还有下一页；话术按客户缓存在会话里，重跑不重复生成
+    cursors = st.session_state.setdefault('wc_cursors', [None])
+    scripts = st.session_state.setdefault('wc_scripts', {})
+
+    def finish_task(task_id):
+        # 回调里完成打卡：随后的重跑直接显示新列表，toast 保留到重跑后，无需等待
+        complete_wechat_task(task_id, st.session_state['username'])
+        scripts.pop(task_id, None)
+        st.toast(f"积分 +{CONFIG['POINTS_WECHAT_TASK']}")
+
+    try:
+        wc_tasks = get_wechat_tasks(st.session_state['username'], cursors[-1], WECHAT_PAGE_SIZE + 1)
+        next_cursor = (wc_tasks[WECHAT_PAGE_SIZE - 1]['next_contact_date'], wc_tasks[WECHAT_PAGE_SIZE - 1]['id']) if len(wc_tasks) > WECHAT_PAGE_SIZE else None
+        wc_tasks = wc_tasks[:WECHAT_PAGE_SIZE]
+        if not wc_tasks and len(cursors) > 1:
+            # 本页任务都已打卡，回到第一页
+            del cursors[1:]; st.rerun()
+        if not wc_tasks:
+            st.markdown("""<div class="custom-alert alert-info">今日无维护任务</div>""", unsafe_allow_html=True)
+        else:
+            for task in wc_tasks:
+                with st.expander(f"客户编号：{task['customer_code']}", expanded=True):
+                    if task['id'] not in scripts: scripts[task['id']] = get_wechat_maintenance_script(client, task['customer_code'], st.session_state['username'])
+                    st.code(scripts[task['id']], language="text")
+                    c1, c2 = st.columns([3, 1])
+                    with c1: st.caption(f"上次联系：{task['last_contact_date']}　到期：{task['next_contact_date']}")
+                    with c2: st.button("完成打卡", key=f"wc_done_{task['id']}", on_click=finish_task, args=(task['id'],))
+            if len(cursors) > 1 or next_cursor:
+                c_prev, c_page, c_next = st.columns(3)
+                c_prev.button("上一页", key="wc_prev", disabled=len(cursors) == 1, on_click=cursors.pop)
+                c_page.caption(f"第 {len(cursors)} 页")
+                c_next.button("下一页", key="wc_next", disabled=next_cursor is None, on_click=cursors.append, args=(next_cursor,))
+    except Exception as e:
+        st.markdown(f"""<div class="custom-alert alert-error">数据加载失败: {str(e)} (请检查 RLS)</div>""", unsafe_allow_html=True)
@@ -0,0 +1,334 @@
+import re
+import urllib.parse
+from datetime import date
+import streamlit as st
+import pandas as pd
+from config import CONFIG
+from db import supabase, submit_write, get_user_email_config, get_user_limit
+from ai import get_client, ai_generate_email_reply
+from leads import claim_daily_tasks, get_todays_leads, get_mail_leads, mark_lead_complete_secure, mark_lead_emailed, mark_lead_read
+from mailer import EmailEngine
+from live import get_live_hub
+from phones import clean_phone_for_whatsapp
+
+# ------------------------------------------
+# 销售工作台 (Workbench)
+# 任务卡片 / 邮件区都是 st.fragment：点击只重跑所在片段，不再整页重查 leads、积分和邮箱配置。
+# 数据库写入在后台线程完成，界面先按本地乐观状态显示，写入失败时回滚。
+# ------------------------------------------
+username = st.session_state['username']
+client = get_client()
+
+# 检查邮箱配置
+user_conf = get_user_email_config(username)
+# 🔥 修复：传入用户名 (Username) 作为发件人名
+email_engine = EmailEngine(user_conf, username) if user_conf else None
+
+# 乐观状态：已读 / 已发信 / 已完成的线索 id，以及尚未确认结果的后台写入
+for k in ('wb_read', 'wb_emailed', 'wb_done'): st.session_state.setdefault(k, set())
+st.session_state.setdefault('wb_writes', {})
+st.session_state.setdefault('wb_threads', {})
+
+def write_async(kind, lead_id, fn, *args):
+    st.session_state[kind].add(lead_id)
+    st.session_state['wb_writes'][(kind, lead_id)] = submit_write(fn, *args)
+
+def settle_writes(full_run=False):
+    """回收已结束的后台写入：失败的回滚乐观状态；整页重跑会重新查库，成功的乐观状态随之清掉"""
+    writes = st.session_state['wb_writes']
+    for (kind, lead_id), fut in list(writes.items()):
+        if not fut.done(): continue
+        failed = fut.exception() is not None or fut.result() is False
+        if failed or full_run:
+            del writes[(kind, lead_id)]
+            st.session_state[kind].discard(lead_id)
+        if failed: st.toast("保存失败，已恢复原状态，请重试")
+
+settle_writes(full_run=True)
+
+if not email_engine:
+    st.markdown("""<div class="custom-alert alert-error">请先在 [邮箱配置] 中设置您的发件箱信息</div>""", unsafe_allow_html=True)
+
+# 新回复 / 名下线索变更由后台推送 (Realtime + IMAP IDLE)，片段只比较内存里的版本号，变了才整页重跑
+LIVE_TICK = 5
+hub = get_live_hub()
+hub.watch(username, user_conf)
+# 整页运行本身就会重新查库，此前到达的推送都已反映在本次结果里
+st.session_state['wb_live_version'] = hub.version(username)
+
+@st.fragment(run_every=LIVE_TICK)
+def live_updates():
+    hub.watch(username, user_conf)  # 页面开着就算活跃，避免被当成空闲停掉推送
+    version = hub.version(username)
+    if st.session_state['wb_live_version'] != version:
+        st.session_state['wb_live_version'] = version
+        st.session_state['wb_threads'] = {}
+        st.rerun()
+    realtime_state, idle = hub.status(username)
+    on = realtime_state == "SUBSCRIBED" or idle
+    st.caption(f"{'🟢 实时推送中' if on else '⚪ 实时推送未连接，请手动同步'} (数据库 {'✓' if realtime_state == 'SUBSCRIBED' else '✗'} · 收件箱 {'✓' if idle else '✗'})")
+
+c_mode, c_live = st.columns([3, 2])
+with c_mode: mode = st.radio("营销通道", ["邮件营销", "WhatsApp 开发"], horizontal=True)
+with c_live: live_updates()
+
+# ------------------------------------------
+# 邮件营销
+# ------------------------------------------
+def select_mail_lead(task, unread=False):
+    st.session_state['selected_mail_lead'] = task
+    st.session_state['is_manual_lead'] = False
+    # 点击即读，清除红点
+    if unread: write_async('wb_read', task['id'], mark_lead_read, task['id'])
+
+@st.fragment
+def mail_composer(lead):
+    """撰写 / 往来记录：AI 生成和发送只重跑本片段"""
+    settle_writes()
+    st.markdown(f"### {lead.get('shop_name')}")
+    st.caption(f"邮箱: {lead.get('email')} | 电话: {lead.get('phone')}")
+
+    t_compose, t_history = st.tabs(["撰写邮件", "往来记录 & AI"])
+
+    with t_compose:
+        if st.button("✨ AI 自动生成俄语开发信"):
+            with st.status("AI 正在撰写...", expanded=True):
+                contact_name = lead.get('contact_name')
+                draft = ai_generate_email_reply(
+                    client,
+                    "Cold Outreach",
+                    username,
+                    lead.get('shop_name', 'Ozon Seller'),
+                    customer_name=contact_name
+                )
+                if draft:
+                    st.session_state['mail_subj'] = f"{username} | 988 Group | China Logistics"
+                    st.session_state['mail_body'] = draft.get('body_text')
+
+        with st.form("send_mail_form"):
+            subj = st.text_input("主题", value=st.session_state.get('mail_subj', ''))
+            body = st.text_area("正文 (纯文本，回车自动换行)", value=st.session_state.get('mail_body', ''), height=300)
+
+            if st.form_submit_button("发送邮件"):
+                if email_engine:
+                    success, msg = email_engine.send_email(lead.get('email'), subj, body)
+                    if success:
+                        st.success("发送成功")
+                        st.session_state['wb_threads'].pop(lead.get('email'), None)
+                        if not st.session_state.get('is_manual_lead', False):
+                            write_async('wb_emailed', lead['id'], mark_lead_emailed, lead['id'])
+                    else:
+                        st.error(f"发送失败: {msg}")
+                else:
+                    st.error("未配置邮箱")
+
+    with t_history:
+        if not email_engine:
+            st.info("未配置邮箱")
+            return
+        # 往来邮件按客户缓存在会话里，撰写区的交互不再重复走 IMAP
+        threads = st.session_state['wb_threads']
+        if st.button("🔄 刷新往来记录", key="refresh_thread"): threads.pop(lead.get('email'), None)
+        if lead.get('email') not in threads: threads[lead.get('email')] = email_engine.fetch_thread(lead.get('email'))
+        emails = threads[lead.get('email')]
+        if emails:
+            for em in emails:
+                css = "sent" if user_conf['email'] in em['from'] else "received"
+                # 简单的 HTML 清洗
+                clean_text = re.sub('<[^<]+?>', '', em['text'])[:300]
+                st.markdown(f"""
+                <div class="email-card {css}">
+                    <div class="email-meta">
+                        <span>{em['date']}</span>
+                        <span>{em['folder']}</span>
+                    </div>
+                    <strong>{em['subject']}</strong>
+                    <div class="email-body">{clean_text}...</div>
+                </div>
+                """, unsafe_allow_html=True)
+        else:
+            st.info("暂无往来邮件 (仅显示收件箱和已发送)")
+
+MAIL_PAGE_SIZE = 15
+MAIL_SORTS = ["最近发信优先", "最久未联系优先"]
+
+def reset_mail_pages():
+    """搜索词 / 排序变了，两个列表都回到第一页"""
+    st.session_state['wb_cursors'] = {True: [None], False: [None]}
+
+def mail_page(replied):
+    """当前搜索 / 排序下的一页客户，多取一行判断是否还有下一页；返回 (本页, 下一页起点)。
+    同一次整页运行内按参数缓存，片段重跑不重复查库"""
+    cursor = st.session_state['wb_cursors'][replied][-1]
+    key = (replied, st.session_state.get('wb_search', ''), st.session_state.get('wb_sort', MAIL_SORTS[0]), cursor)
+    pages = st.session_state['wb_pages']
+    if key not in pages: pages[key] = get_mail_leads(username, replied, key[1], key[2] == MAIL_SORTS[0], cursor, MAIL_PAGE_SIZE + 1)
+    rows = pages[key]
+    if len(rows) <= MAIL_PAGE_SIZE: return rows, None
+    last = rows[MAIL_PAGE_SIZE - 1]
+    return rows[:MAIL_PAGE_SIZE], (last.get('last_email_time'), last['id'])
+
+def mail_page_nav(name, replied, next_cursor):
+    stack = st.session_state['wb_cursors'][replied]
+    if len(stack) == 1 and next_cursor is None: return
+    c_prev, c_page, c_next = st.columns(3)
+    c_prev.button("上一页", key=f"prev_{name}", disabled=len(stack) == 1, on_click=stack.pop)
+    c_page.caption(f"第 {len(stack)} 页")
+    c_next.button("下一页", key=f"next_{name}", disabled=next_cursor is None, on_click=stack.append, args=(next_cursor,))
+
+@st.fragment
+def mail_workspace():
+    """客户列表 + 撰写区；列表按页从服务端取 (键集分页 + 搜索)，只渲染当前页，再叠加本地乐观状态"""
+    settle_writes()
+    read, emailed = st.session_state['wb_read'], st.session_state['wb_emailed']
+    replied_rows, todo_next = mail_page(True)
+    pending_rows, pool_next = mail_page(False)
+    todo = [t for t in replied_rows if t['id'] not in read]
+    # 刚点开的回复在写库完成前先显示在待开发列表里
+    pool = [t for t in replied_rows if t['id'] in read] + pending_rows
+
+    c_list, c_work = st.columns([1, 2])
+
+    with c_list:
+        c_search, c_sort = st.columns([3, 2])
+        c_search.text_input("搜索店铺 / 邮箱", key="wb_search", on_change=reset_mail_pages)
+        c_sort.selectbox("排序", MAIL_SORTS, key="wb_sort", on_change=reset_mail_pages)
+        tab_todo, tab_pool, tab_manual = st.tabs(["🔴 待跟进", "⚪ 待开发", "✏️ 手动录入"])
+
+        with tab_todo:
+            if not todo: st.info("暂无新回复")
+            for task in todo:
+                st.button(f"🔴 {task.get('shop_name', 'Unknown')}", key=f"active_{task['id']}", use_container_width=True,
+                          on_click=select_mail_lead, args=(task, True))
+            mail_page_nav("todo", True, todo_next)
+
+        with tab_pool:
+            if st.button("领取新邮件客户"):
+                pool_ids = supabase.table('leads').select('id').is_('assigned_to', 'null').neq('email', None).limit(5).execute().data
+                if pool_ids:
+                    ids = [x['id'] for x in pool_ids]
+                    supabase.table('leads').update({'assigned_to': username, 'assigned_at': date.today().isoformat()}).in_('id', ids).is_('assigned_to', 'null').execute()
+                    # 列表内容变了，需要整页重新查询
+                    st.rerun()
+
+            for task in pool:
+                status_icon = "🟢" if task.get('is_contacted') or task['id'] in emailed else "⚪"
+                sent = f" · {task['last_email_time'][:10]}" if task.get('last_email_time') else ""
+                st.button(f"{status_icon} {task.get('shop_name', 'Unknown')}{sent}", key=f"pool_{task['id']}", use_container_width=True,
+                          on_click=select_mail_lead, args=(task,))
+            mail_page_nav("pool", False, pool_next)
+
+        with tab_manual:
+            with st.form("manual_lead_form"):
+                m_name = st.text_input("客户称呼 (Name)")
+                m_shop = st.text_input("店铺/公司名 (Shop)")
+                m_email = st.text_input("邮箱 (Email)")
+                if st.form_submit_button("载入工作台"):
+                    st.session_state['selected_mail_lead'] = {
+                        "id": "manual",
+                        "shop_name": m_shop,
+                        "email": m_email,
+                        "phone": "",
+                        "contact_name": m_name
+                    }
+                    st.session_state['is_manual_lead'] = True
+
+    with c_work:
+        lead = st.session_state.get('selected_mail_lead')
+        if lead: mail_composer(lead)
+        else: st.info("请从左侧选择一个客户")
+
+# ------------------------------------------
+# WhatsApp 开发
+# ------------------------------------------
+def open_whatsapp_link(key):
+    st.session_state[key] = True
+
+def complete_task(item_id, key):
+    st.session_state.pop(key, None)
+    write_async('wb_done', item_id, mark_lead_complete_secure, item_id, username)
+    st.session_state[f"toast_{item_id}"] = True
+
+@st.fragment
+def task_card(item):
+    """单个任务卡片：获取链接 / 确认完成只重跑本卡片"""
+    settle_writes()
+    if st.session_state.pop(f"toast_{item['id']}", False): st.toast(f"积分 +{CONFIG['POINTS_PER_TASK']}")
+    if item['id'] in st.session_state['wb_done']:
+        st.markdown(f"""<div class="custom-alert alert-success">✅ {item['shop_name']} 已完成</div>""", unsafe_allow_html=True)
+        return
+    with st.expander(f"{item['shop_name']}", expanded=True):
+        if not item['ai_message']:
+            st.markdown("""<div class="custom-alert alert-info">文案生成中...</div>""", unsafe_allow_html=True)
+            return
+        st.write(item['ai_message'])
+        c1, c2 = st.columns(2)
+        key = f"clk_{item['id']}"
+        if not st.session_state.get(key):
+            c1.button("获取链接", key=f"btn_{item['id']}", on_click=open_whatsapp_link, args=(key,))
+            c2.button("标记完成", disabled=True, key=f"dis_{item['id']}")
+        else:
+            # 🔥 修复：深度清洗电话号码
+            clean_phone = clean_phone_for_whatsapp(item['phone'])
+
+            if clean_phone:
+                url = f"https://wa.me/{clean_phone}?text={urllib.parse.quote(item['ai_message'])}"
+
+                # 显示调试信息和按钮
+                c1.caption(f"正在呼叫: +{clean_phone}")
+                c1.markdown(f"<a href='{url}' target='_blank' style='display:block;text-align:center;background:#1e1f20;color:#e3e3e3;padding:10px;border-radius:20px;text-decoration:none;font-size:14px;'>跳转 WhatsApp ↗</a>", unsafe_allow_html=True)
+            else:
+                c1.error("无效号码")
+
+            c2.button("确认完成", key=f"fin_{item['id']}", on_click=complete_task, args=(item['id'], key))
+
+if mode == "邮件营销":
+    # 增加一个全局同步按钮
+    c_sync, _ = st.columns([1, 4])
+    with c_sync:
+        if st.button("🔄 同步所有邮件"):
+            with st.status("正在同步收件箱...", expanded=True):
+                count = email_engine.sync_inbox_for_replies(username)
+                st.write(f"发现 {count} 个新回复！")
+            st.session_state['wb_threads'] = {}
+            st.rerun()
+
+    # 待跟进 (有新回复) / 待开发 两个列表由片段按页查询；整页运行时清空页缓存，重新查库
+    st.session_state['wb_pages'] = {}
+    st.session_state.setdefault('wb_cursors', {True: [None], False: [None]})
+    mail_workspace()
+
+elif mode == "WhatsApp 开发":
+    my_leads = get_todays_leads(username, client)
+    user_limit = get_user_limit(username)
+    total, curr = user_limit, len(my_leads)
+    done_ids = st.session_state['wb_done']
+
+    c_stat, c_action = st.columns([2, 1])
+    with c_stat:
+        done = sum(1 for x in my_leads if x.get('is_contacted') or x['id'] in done_ids)
+        st.metric("今日进度", f"{done} / {total}")
+        st.progress(min(done/total, 1.0) if total > 0 else 0)
+
+    with c_action:
+        st.markdown("<br>", unsafe_allow_html=True)
+        if curr < total:
+            if st.button(f"领取任务 (余 {total-curr} 个)"):
+                with st.status(f"正在为 {username} 生成文案...", expanded=True) as s:
+                    _, status = claim_daily_tasks(username, client)
+                    s.update(label="完成", state="complete")
+                if status=="empty": st.markdown("""<div class="custom-alert alert-error">公池已空</div>""", unsafe_allow_html=True)
+                else: st.rerun()
+        else: st.markdown("""<div class="custom-alert alert-success">今日已领满</div>""", unsafe_allow_html=True)
+
+    st.markdown("#### 任务列表")
+    t1, t2 = st.tabs(["待跟进", "已完成"])
+    with t1:
+        todos = [x for x in my_leads if not x.get('is_contacted')]
+        if not todos: st.caption("没有待办任务")
+        for item in todos: task_card(item)
+    with t2:
+        dones = [x for x in my_leads if x.get('is_contacted') or x['id'] in done_ids]
+        if dones:
+            df = pd.DataFrame(dones)
+            st.dataframe(df[['shop_name', 'phone', 'completed_at']], use_container_width=True)
@@ -0,0 +1,94 @@
+import io
+import os
+import hashlib
+import concurrent.futures
+from utils import LRUCache
+
+# pydub 依赖 ffmpeg 解码 mp3/m4a/ogg；未安装时整段转写
+try:
+    from pydub import AudioSegment
+    from pydub.silence import detect_silence
+    PYDUB_INSTALLED = True
+except ImportError:
+    PYDUB_INSTALLED = False
+
+# ==========================================
+# 俄语语音：静音切分 + 并发转写 + 逐块翻译
+# ==========================================
+CHUNK_TARGET_MS = 60_000     # 目标分块时长
+CHUNK_SEARCH_MS = 15_000     # 在目标切点前后该范围内寻找静音
+MIN_SPLIT_MS = 90_000        # 短于该时长且体积未超限时不切分
+SILENCE_LEN_MS = 400
+SILENCE_DROP_DB = 16         # 低于整段平均响度多少 dB 视为静音
+WHISPER_MAX_BYTES = 24 * 1024 * 1024
+TRANSCRIBE_WORKERS = 4
+
+_result_cache = LRUCache(maxsize=64)
+
+
+def find_split_points(seg, target_ms=CHUNK_TARGET_MS, search_ms=CHUNK_SEARCH_MS):
+    """返回切点列表 (ms)：每个切点取目标位置附近最近的静音段中点，找不到静音则硬切"""
+    cuts = []
+    last = 0
+    thresh = seg.dBFS - SILENCE_DROP_DB
+    while len(seg) - last > target_ms + search_ms:
+        pos = last + target_ms
+        lo, hi = pos - search_ms, min(len(seg), pos + search_ms)
+        silences = detect_silence(seg[lo:hi], min_silence_len=SILENCE_LEN_MS, silence_thresh=thresh)
+        if silences:
+            mids = [lo + (a + b) // 2 for a, b in silences]
+            pos = min(mids, key=lambda m: abs(m - pos))
+        cuts.append(pos)
+        last = pos
+    return cuts
+
+
+def split_audio(audio_bytes, filename="audio"):
+    """长语音按静音切成若干块 (16 kHz 单声道 wav)，返回 [(文件名, 字节)]；无法解码时整段返回"""
+    whole = [(filename, audio_bytes)]
+    if not PYDUB_INSTALLED: return whole
+    ext = os.path.splitext(filename)[1].lstrip('.').lower() or None
+    try: seg = AudioSegment.from_file(io.BytesIO(audio_bytes), format=ext)
+    except Exception: return whole
+    if len(seg) <= MIN_SPLIT_MS and len(audio_bytes) <= WHISPER_MAX_BYTES: return whole
+
+    seg = seg.set_channels(1).set_frame_rate(16000)
+    bounds = [0] + find_split_points(seg) + [len(seg)]
+    chunks = []
+    stem = os.path.splitext(filename)[0]
+    for i, (a, b) in enumerate(zip(bounds, bounds[1:])):
+        out = io.BytesIO()
+        seg[a:b].export(out, format="wav")
+        chunks.append((f"{stem}_{i:03d}.wav", out.getvalue()))
+    return chunks
+
+
+def _transcribe_and_translate(client, name, data):
+    ru_text = client.audio.transcriptions.create(model="whisper-1", file=(name, data), language="ru").text
+    if not ru_text.strip(): return ru_text, ""
+    completion = client.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "system", "content": "Translate Russian to Chinese. Professional tone."}, {"role": "user", "content": ru_text}])
+    return ru_text, completion.choices[0].message.content
+
+
+def transcribe_audio_stream(client, audio_bytes, filename="audio", max_workers=TRANSCRIBE_WORKERS):
+    """按完成顺序逐块产出 (序号, 俄语, 中文, 总块数)；整段结果按内容哈希缓存"""
+    key = hashlib.sha256(audio_bytes).hexdigest()
+    cached = _result_cache.get(key)
+    if cached:
+        for i, (ru, cn) in enumerate(cached): yield i, ru, cn, len(cached)
+        return
+
+    chunks = split_audio(audio_bytes, filename)
+    results = [None] * len(chunks)
+    failed = False
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        futures = {executor.submit(_transcribe_and_translate, client, name, data): i for i, (name, data) in enumerate(chunks)}
+        for fut in concurrent.futures.as_completed(futures):
+            i = futures[fut]
+            try: ru, cn = fut.result()
+            except Exception as e:
+                ru, cn = f"Error: {str(e)}", "翻译失败"
+                failed = True
+            results[i] = (ru, cn)
+            yield i, ru, cn, len(chunks)
+    if not failed: _result_cache.put(key, results)
@@ -0,0 +1,213 @@
+"""后端热路径离线基准：在本地替身 (benchmarks/standins) 上跑导入、领取、邮件同步、号码验证、报价单、微信客户导入六类负载。
+
+所有外部服务都是本机替身，延迟固定可配，结果可复现；每类负载统计耗时分布，并按服务统计外部调用次数和耗时
+(来自 metrics.py 埋点)。结果输出为 JSON，可与之前保存的结果对比找回归。
+用法:
+    python benchmarks/bench_backend.py --out base.json
+    python benchmarks/bench_backend.py --compare base.json [--fail-on-regression 15]
+"""
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.standins import start_all
+from benchmarks.standins.leadgen import lead_rows, seed_data
+
+WORKLOADS = ["import", "claim", "email", "checknumber", "quotation", "wechat-import"]
+
+
+def workload_import(env, i):
+    """导入一份合成线索文件 (跳过号码验证)，与批量进货页同一流程"""
+    import pandas as pd
+    from leads import import_lead_file
+    buf = io.StringIO()
+    pd.DataFrame(lead_rows(env.args.rows, seed=1000 + i)).to_csv(buf, index=False)
+    buf.seek(0)
+    return import_lead_file(pd.read_csv(buf), verify=False)
+
+
+def workload_claim(env, i):
+    """一个业务员的早晨：领取当日任务 (并发生成文案) -> 读取任务列表 -> 完成 5 个"""
+    from ai import get_client
+    from leads import claim_daily_tasks, get_todays_leads, mark_lead_complete_secure
+    username = f"rep{i % env.args.users:02d}"
+    claim_daily_tasks(username, get_client())
+    tasks = get_todays_leads(username, get_client())
+    for task in tasks[:5]: mark_lead_complete_secure(task['id'], username)
+    return len(tasks)
+
+
+def workload_email(env, i):
+    """同步收件箱回复 + 拉取一个客户的往来记录 + 发送一封开发信"""
+    from db import get_user_email_config
+    from mailer import EmailEngine
+    username = f"rep{i % env.args.users:02d}"
+    engine = EmailEngine(get_user_email_config(username), username)
+    found = engine.sync_inbox_for_replies(username)
+    engine.fetch_thread(env.reply_from[username])
+    engine.send_email(env.reply_from[username], "988 Group", "Здравствуйте!\nТестовое письмо.")
+    return found
+
+
+def workload_checknumber(env, i):
+    from checknumber import process_checknumber_task
+    numbers = [f"7900{i:03d}{k:04d}" for k in range(env.args.numbers)]
+    status, msg, _ = process_checknumber_task(numbers, "standin", "standin")
+    return sum(1 for v in status.values() if v == 'valid')
+
+
+def workload_quotation(env, i):
+    """冷缓存生成报价单 (缩略图流水线)"""
+    import quotation
+    from utils import LRUCache
+    from benchmarks.bench_quotation import make_items
+    if env.quote_items is None: env.quote_items = make_items(env.args.quote_items, 800)
+    quotation._thumb_cache = LRUCache(maxsize=2048)
+    return len(quotation.generate_quotation_excel(env.quote_items, 5, 100.0, {"name": "Bench"}).getvalue())
+
+
+def workload_wechat_import(env, i):
+    """导入一份微信客户 CSV (与微信管理页同一流程：分块读取 + 按编号 upsert)；第二轮起都是更新"""
+    import pandas as pd
+    from leads import WECHAT_CHUNK, admin_import_wechat_customers
+    n = env.args.wechat_rows
+    buf = io.StringIO()
+    pd.DataFrame({'客户编号': [f"WX{k:06d}" for k in range(n)], '业务员': [f"rep{k % env.args.users:02d}" for k in range(n)],
+                  '周期': [(7, 14, 30)[k % 3] for k in range(n)]}).to_csv(buf, index=False)
+    buf.seek(0)
+    reports = admin_import_wechat_customers(pd.read_csv(buf, chunksize=WECHAT_CHUNK))
+    return sum(r['inserted'] + r['updated'] for r in reports)
+
+
+class Env:
+    def __init__(self, args, services):
+        self.args = args
+        self.services = services
+        self.reply_from = {}
+        self.quote_items = None
+
+
+def prepare(args):
+    services = start_all(db_latency_ms=args.db_latency, ai_latency_ms=args.ai_latency, cn_latency_ms=args.cn_latency,
+                         cn_ready_after_s=args.cn_ready, mail_latency_ms=args.mail_latency)
+    data = seed_data(n_users=args.users, pool_size=args.pool, email_config=lambda name: services.email_config(f"{name}@988.test"))
+    services.db.insert_many('users', data['users'])
+    services.db.insert_many('leads', data['leads'])
+    env = Env(args, services)
+    # 每个业务员的若干历史客户在收件箱里有回复，另有无关邮件填充收件箱
+    for u in data['users'][1:]:
+        contacted = [l for l in data['leads'] if l.get('assigned_to') == u['username'] and l.get('is_contacted')]
+        for lead in contacted[:3]: services.mail.add_reply(lead['email'], f"{u['username']}@988.test")
+        env.reply_from[u['username']] = contacted[0]['email']
+    for k in range(args.inbox):
+        services.mail.add_reply(f"noise{k}@example.com", "list@988.test", subject="Newsletter")
+    services.use_in_app()
+    return env
+
+
+def run_workload(env, name, repeat, warmup=1):
+    from metrics import metrics
+    fn = globals()[f"workload_{name.replace('-', '_')}"]
+    # 预热一次不计时：首轮包含模块导入、连接建立等冷启动开销
+    for i in range(warmup): fn(env, repeat + i)
+    times, outputs, calls, external = [], [], {}, {}
+    for i in range(repeat):
+        metrics.events.clear()
+        t0 = time.perf_counter()
+        outputs.append(fn(env, i))
+        times.append((time.perf_counter() - t0) * 1000)
+        for ev in list(metrics.events):
+            service, ms = ev[1], ev[4]
+            calls[service] = calls.get(service, 0) + 1
+            external[service] = external.get(service, 0.0) + ms
+    return {
+        "runs": repeat,
+        "median_ms": round(statistics.median(times), 1),
+        "p95_ms": round(sorted(times)[math.ceil(0.95 * len(times)) - 1], 1),
+        "min_ms": round(min(times), 1),
+        "calls_per_run": {k: round(v / repeat, 1) for k, v in sorted(calls.items())},
+        "external_ms_per_run": {k: round(v / repeat, 1) for k, v in sorted(external.items())},
+        "output": outputs[-1],
+    }
+
+
+def git_rev():
+    try: return subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except Exception: return None
+
+
+def compare(base, current, threshold):
+    """打印对比表，返回超过阈值的回归项"""
+    regressions = []
+    print(f"\n{'workload':<14}{'base ms':>12}{'now ms':>12}{'delta':>10}")
+    for name, now in current["results"].items():
+        old = base.get("results", {}).get(name)
+        if not old:
+            print(f"{name:<14}{'-':>12}{now['median_ms']:>12.1f}")
+            continue
+        delta = (now['median_ms'] - old['median_ms']) / old['median_ms'] * 100 if old['median_ms'] else 0
+        flag = "  REGRESSION" if delta > threshold else ""
+        if flag: regressions.append(name)
+        print(f"{name:<14}{old['median_ms']:>12.1f}{now['median_ms']:>12.1f}{delta:>+9.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help="逗号分隔: " + ",".join(WORKLOADS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1, help="每类负载计时前的预热次数")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--pool", type=int, default=2000, help="公海池线索数")
+    parser.add_argument("--rows", type=int, default=500, help="导入文件行数")
+    parser.add_argument("--wechat-rows", type=int, default=50000, help="微信客户导入文件行数")
+    parser.add_argument("--numbers", type=int, default=50, help="号码验证批量")
+    parser.add_argument("--inbox", type=int, default=40, help="收件箱干扰邮件数")
+    parser.add_argument("--quote-items", type=int, default=30)
+    parser.add_argument("--db-latency", type=float, default=10, help="每次数据库请求的模拟延迟 (ms)")
+    parser.add_argument("--ai-latency", type=float, default=300)
+    parser.add_argument("--cn-latency", type=float, default=50)
+    parser.add_argument("--cn-ready", type=float, default=1.0, help="CheckNumber 任务完成所需秒数")
+    parser.add_argument("--mail-latency", type=float, default=20, help="每条 SMTP/IMAP 命令的模拟延迟 (ms)")
+    parser.add_argument("--out", help="结果写入 JSON 文件")
+    parser.add_argument("--compare", help="与之前保存的 JSON 结果对比")
+    parser.add_argument("--fail-on-regression", type=float, default=None, metavar="PCT", help="中位数变慢超过 PCT%% 时退出码为 1")
+    args = parser.parse_args()
+    # 替身会切换工作目录，先把输出路径转成绝对路径
+    args.out, args.compare = [os.path.abspath(p) if p else None for p in (args.out, args.compare)]
+
+    env = prepare(args)
+    results = {}
+    for name in [w.strip() for w in args.workloads.split(",") if w.strip()]:
+        results[name] = run_workload(env, name, args.repeat, args.warmup)
+        r = results[name]
+        print(f"{name:<14}median {r['median_ms']:>9.1f} ms   p95 {r['p95_ms']:>9.1f} ms   calls/run {r['calls_per_run']}", file=sys.stderr)
+
+    report = {
+        "meta": {"rev": git_rev(), "time": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                 "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "fail_on_regression")}},
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f: json.dump(report, f, indent=2, ensure_ascii=False)
+    else: print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        with open(args.compare) as f: base = json.load(f)
+        regressions = compare(base, report, args.fail_on_regression if args.fail_on_regression is not None else 10)
+        if regressions and args.fail_on_regression is not None: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
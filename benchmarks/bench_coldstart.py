@@ -0,0 +1,82 @@
+"""冷启动基准：依赖导入耗时 (python -X importtime) + 登录页首次运行耗时 (AppTest)
+
+每项都在全新的解释器进程里测量，结果可复现。
+用法:
+    python benchmarks/bench_coldstart.py                 # 当前工作区
+    python benchmarks/bench_coldstart.py --rev HEAD~1    # 同时测量某个 git 版本作对比
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEPENDENCIES = ["streamlit", "pandas", "openai", "supabase", "requests", "PIL", "xlsxwriter", "imap_tools", "pydub", "bs4"]
+
+FIRST_RUN_SNIPPET = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({path!r}, default_timeout=120)
+t0 = time.perf_counter(); at.run(); first = time.perf_counter() - t0
+t0 = time.perf_counter(); at.run(); rerun = time.perf_counter() - t0
+heavy = [m for m in ("pandas", "openai", "supabase", "PIL", "xlsxwriter", "bs4") if m in sys.modules]
+print(f"{{first:.3f}} {{rerun:.3f}} {{','.join(heavy) or '-'}}")
+"""
+
+
+def import_time_ms(module):
+    """单个模块在全新进程中的累计导入耗时 (ms)"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True)
+    if proc.returncode != 0: return None
+    for line in reversed(proc.stderr.splitlines()):
+        m = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s+" + re.escape(module) + r"$", line)
+        if m: return int(m.group(1)) / 1000
+    return None
+
+
+def first_run(app_dir, repeat):
+    """登录页首次运行 / 二次运行耗时 (s)，取多次中的最小值"""
+    path = os.path.join(app_dir, "app.py")
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-c", FIRST_RUN_SNIPPET.format(path=path)], capture_output=True, text=True, cwd=app_dir)
+        if proc.returncode != 0:
+            print(proc.stderr[-2000:], file=sys.stderr)
+            return None
+        first, rerun, heavy = proc.stdout.strip().splitlines()[-1].split()
+        if best is None or float(first) < best[0]: best = (float(first), float(rerun), heavy)
+    return best
+
+
+def export_rev(rev):
+    tmp = tempfile.mkdtemp(prefix="coldstart_")
+    archive = subprocess.run(["git", "-C", ROOT, "archive", rev], capture_output=True, check=True).stdout
+    subprocess.run(["tar", "-x", "-C", tmp], input=archive, check=True)
+    return tmp
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rev", help="对比的 git 版本 (例如 HEAD~1)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("== 依赖导入耗时 (-X importtime, 累计) ==")
+    for dep in DEPENDENCIES:
+        ms = import_time_ms(dep)
+        print(f"{dep:<12}{'未安装' if ms is None else f'{ms:>8.0f} ms'}")
+
+    targets = [("working tree", ROOT)]
+    if args.rev: targets.insert(0, (args.rev, export_rev(args.rev)))
+    print("\n== 登录页 (AppTest, 全新进程) ==")
+    print(f"{'version':<16}{'first run':>12}{'rerun':>10}  heavy modules loaded")
+    for label, app_dir in targets:
+        res = first_run(app_dir, args.repeat)
+        if res is None: print(f"{label:<16}{'failed':>12}")
+        else: print(f"{label:<16}{res[0]:>11.3f}s{res[1]:>9.3f}s  {res[2]}")
+
+
+if __name__ == "__main__":
+    main()
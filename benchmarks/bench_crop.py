@@ -0,0 +1,69 @@
+"""多商品截图裁剪基准：逐个裁剪 (每个 bbox 解码一次原图) vs 一次解码批量裁剪
+
+用法: python benchmarks/bench_crop.py [--items 30] [--width 1080] [--height 6000]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+import vision
+
+
+def legacy_crop(original_image_bytes, bbox_1000):
+    """旧版 crop_image_exact：每次完整解码原图，按原格式重新编码"""
+    try:
+        if not bbox_1000 or len(bbox_1000) != 4: return original_image_bytes
+        img = Image.open(io.BytesIO(original_image_bytes))
+        width, height = img.size
+        ymin_rel, xmin_rel, ymax_rel, xmax_rel = bbox_1000
+        y1 = int(ymin_rel / 1000 * height); x1 = int(xmin_rel / 1000 * width)
+        y2 = int(ymax_rel / 1000 * height); x2 = int(xmax_rel / 1000 * width)
+        x1 = max(0, x1); y1 = max(0, y1); x2 = min(width, x2); y2 = min(height, y2)
+        if (x2 - x1) < 5 or (y2 - y1) < 5: return original_image_bytes
+        output = io.BytesIO()
+        img.crop((x1, y1, x2, y2)).save(output, format=img.format if img.format else 'PNG')
+        return output.getvalue()
+    except Exception: return original_image_bytes
+
+
+def synthetic_screenshot(width, height, fmt):
+    img = Image.effect_noise((width, height), 40).convert("RGB")
+    out = io.BytesIO()
+    img.save(out, format=fmt)
+    return out.getvalue()
+
+
+def bboxes_for(n):
+    """左侧缩略图列，每行一个商品"""
+    row = 1000 / n
+    return [[i * row + row * 0.1, 20, i * row + row * 0.9, 220] for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=30)
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=6000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    bboxes = bboxes_for(args.items)
+    print(f"{args.items} bboxes on a {args.width}x{args.height} screenshot")
+    print(f"{'format':<8}{'legacy':>10}{'batch':>10}{'speedup':>10}{'legacy KB':>12}{'batch KB':>10}")
+    for fmt in ("PNG", "JPEG"):
+        src = synthetic_screenshot(args.width, args.height, fmt)
+        t_legacy = t_batch = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter(); legacy = [legacy_crop(src, b) for b in bboxes]; t_legacy = min(t_legacy, time.perf_counter() - t0)
+            t0 = time.perf_counter(); batch = vision.crop_images(src, bboxes); t_batch = min(t_batch, time.perf_counter() - t0)
+        kb = lambda xs: sum(len(x) for x in xs) / 1024
+        print(f"{fmt:<8}{t_legacy:>9.2f}s{t_batch:>9.2f}s{t_legacy / t_batch:>9.1f}x{kb(legacy):>12.0f}{kb(batch):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""批量导出基准：逐页流式写文件 (exports.write_export) vs 先整表读进内存再写，比较耗时、文件大小与 Python 内存峰值
+
+替身数据库跑在主进程里，每次导出在 fork 出的子进程中执行，内存峰值只统计应用这一侧。
+用法: python benchmarks/bench_export.py [--rows 200000] [--formats xlsx,csv]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.standins import start_all
+
+
+def seed_leads(db, n, seed=0):
+    rnd = random.Random(seed)
+    reps = [f"rep{k:02d}" for k in range(20)]
+    db.insert_many('leads', [{
+        "shop_name": f"Shop {i}", "shop_link": f"https://www.ozon.ru/seller/shop-{i}/", "phone": f"79{rnd.randint(0, 999999999):09d}",
+        "email": f"shop{i}@mail.ru", "assigned_to": rnd.choice(reps), "assigned_at": "2026-01-05", "is_contacted": True,
+        "completed_at": "2026-01-05T12:00:00", "is_frozen": False, "retry_count": 0, "ai_message": "",
+    } for i in range(n)])
+
+
+def _export_child(fmt, loaded, out):
+    from db import supabase
+    from exports import LEAD_COLUMNS, lead_rows, write_export
+    supabase.table('leads').select('id').limit(1).execute()  # 客户端初始化不计入峰值
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    export = write_export("线索", LEAD_COLUMNS, list(lead_rows()) if loaded else lead_rows(), fmt)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    size = os.path.getsize(export['path'])
+    os.remove(export['path'])
+    out.put((export['rows'], elapsed, size, peak))
+
+
+def measure(fmt, loaded):
+    """fork 子进程执行一次导出 (tracemalloc 会拖慢耗时，各组口径一致)"""
+    ctx = multiprocessing.get_context("fork")
+    out = ctx.Queue()
+    proc = ctx.Process(target=_export_child, args=(fmt, loaded, out))
+    proc.start()
+    result = out.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--formats", default="xlsx,csv")
+    args = parser.parse_args()
+
+    services = start_all(db_latency_ms=0)
+    seed_leads(services.db, args.rows)
+    services.use_in_app()
+
+    print(f"{args.rows} leads")
+    print(f"{'mode':<18}{'rows':>10}{'time':>10}{'file':>10}{'peak mem':>12}")
+    for fmt in args.formats.split(","):
+        for label, loaded in (("streamed", False), ("loaded", True)):
+            n, elapsed, size, peak = measure(fmt, loaded)
+            print(f"{f'{label} {fmt}':<18}{n:>10}{elapsed:>9.1f}s{size / 1e6:>8.1f}MB{peak / 1e6:>10.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
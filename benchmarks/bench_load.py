@@ -0,0 +1,275 @@
+"""并发会话压测 (AppTest)：N 个业务员同时登录 -> 领取任务 -> 完成任务 -> 同步收件箱 / 写信 / 发信。
+
+所有会话跑在同一个进程里、共用一个 Streamlit Runtime 和各类缓存 / 连接 / 后台写线程，相当于一个服务器进程
+同时服务 N 个浏览器；外部服务全部是本地替身 (benchmarks/standins)，延迟固定可配。
+按会话数逐级加压，报告每类操作的重跑耗时分布、每次操作的外部调用次数，以及整体吞吐 (操作数 / 秒)。
+注意 AppTest 的按钮点击总是整页重跑 (不区分 st.fragment)，测得的是各操作的上限耗时。
+用法:
+    python benchmarks/bench_load.py --sessions 1,5,10,20,30 [--complete 5] [--think 0.5] [--out load.json]
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.standins import start_all
+from benchmarks.standins.leadgen import seed_data
+
+ACTIONS = ["login", "whatsapp", "claim", "link", "complete", "mail", "sync", "select", "draft", "send"]
+
+
+def share_runtime():
+    """AppTest 每次运行都会替换进程级的 Runtime 单例和 config.get_option，运行结束再复原，多个会话并发时会互相覆盖；
+    每次运行还会新建 ScriptCache 重新编译脚本 (并发编译会触发 AST 报错)。
+    这里改为所有会话共用一个模拟 Runtime 和脚本缓存 (与真实服务器一个进程一个 Runtime 一致)"""
+    from unittest.mock import MagicMock
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1 import app_test, local_script_runner
+    from streamlit.testing.v1.util import build_mock_config_get_option
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = app_test.MediaFileManager(app_test.MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = app_test.DataframeSourceManager()
+    runtime.cache_storage_manager = app_test.MemoryCacheStorageManager()
+    registry = app_test.BidiComponentManager()
+    registry.discover_and_register_components(start_file_watching=False)
+    runtime.bidi_component_registry = registry
+    Runtime._instance = runtime
+    # AppTest 只在自己模块里的 Runtime 上赋值，换成子类后赋值不再影响共用的单例
+    app_test.Runtime = type("SharedRuntime", (Runtime,), {})
+    script_cache = app_test.ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    config.get_option = build_mock_config_get_option({"global.appTest": True})
+    app_test.patch_config_options = lambda overrides: contextlib.nullcontext()
+
+
+class Session:
+    """一个模拟业务员：按固定流程点击，记录每次操作的耗时和出错情况"""
+
+    def __init__(self, username, args, rnd):
+        from streamlit.testing.v1 import AppTest
+        self.username = username
+        self.args = args
+        self.rnd = rnd
+        self.at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=args.timeout)
+        self.records = []
+        self.claimed = None
+
+    def step(self, action, fn):
+        if self.args.think: time.sleep(self.rnd.uniform(0, self.args.think))
+        t0, start = time.perf_counter(), time.time()
+        error = None
+        try:
+            fn()
+            if self.at.exception: error = self.at.exception[0].message.splitlines()[0][:200]
+        except Exception as e: error = f"{type(e).__name__}: {e}"[:200]
+        self.records.append({"action": action, "ms": (time.perf_counter() - t0) * 1000, "start": start, "end": time.time(), "error": error})
+        return error is None
+
+    def button(self, match):
+        return next((b for b in self.at.button if match(b)), None)
+
+    def missing(self, what):
+        page_error = self.at.exception[0].message.splitlines()[0] if self.at.exception else ""
+        return LookupError(f"{what} not found {page_error}".strip())
+
+    def click(self, match, what="button"):
+        b = self.button(match)
+        if b is None: raise self.missing(what)
+        b.click().run()
+
+    def widget(self, kind, label):
+        w = next((w for w in getattr(self.at, kind) if w.label.startswith(label)), None)
+        if w is None: raise self.missing(f"{kind} {label}")
+        return w
+
+    def login(self):
+        self.at.run()
+        self.widget("text_input", "账号").input(self.username)
+        self.widget("text_input", "密码").input(self.username)
+        self.click(lambda b: b.label == "登 录")
+        if not self.at.session_state['logged_in']: raise RuntimeError("login failed")
+
+    def run(self, barrier):
+        at = self.at
+        barrier.wait()
+        if not self.step("login", self.login): return self.records
+        # WhatsApp：领取当日任务，逐个获取链接并确认完成
+        self.step("whatsapp", lambda: self.widget("radio", "营销通道").set_value("WhatsApp 开发").run())
+        if self.step("claim", lambda: self.click(lambda b: b.label.startswith("领取任务"), "claim button")):
+            self.claimed = sum(1 for b in self.at.button if (b.key or "").startswith("btn_"))
+        for _ in range(self.args.complete):
+            card = self.button(lambda b: (b.key or "").startswith("btn_"))
+            if card is None: break
+            lead_id = card.key[4:]
+            self.step("link", lambda: card.click().run())
+            self.step("complete", lambda: self.click(lambda b: b.key == f"fin_{lead_id}", "complete button"))
+        # 邮件：同步收件箱 -> 打开一个客户 -> AI 写信 -> 发送
+        self.step("mail", lambda: self.widget("radio", "营销通道").set_value("邮件营销").run())
+        self.step("sync", lambda: self.click(lambda b: b.label.startswith("🔄 同步所有邮件"), "sync button"))
+        if self.step("select", lambda: self.click(lambda b: (b.key or "").startswith(("active_", "pool_")), "lead button")):
+            self.step("draft", lambda: self.click(lambda b: b.label.startswith("✨"), "draft button"))
+            def send():
+                self.widget("text_input", "主题").input(f"{self.username} | 988 Group")
+                self.widget("text_area", "正文").input("Здравствуйте!\nПредлагаем доставку из Китая.")
+                self.click(lambda b: b.label == "发送邮件")
+            self.step("send", send)
+        del at
+        return self.records
+
+
+def prepare(args, levels):
+    """启动替身，按所有加压级别的会话总数 (+1 个预热会话) 生成业务员 (每级用一批新账号，互不影响)"""
+    services = start_all(db_latency_ms=args.db_latency, ai_latency_ms=args.ai_latency, cn_latency_ms=args.cn_latency,
+                         mail_latency_ms=args.mail_latency)
+    n_users = sum(levels) + 1
+    data = seed_data(n_users=n_users, pool_size=n_users * 25 + 500, history_days=args.history_days,
+                     email_config=lambda name: services.email_config(f"{name}@988.test"))
+    services.db.insert_many('users', data['users'])
+    services.db.insert_many('leads', data['leads'])
+    # 每个业务员有几个老客户回了邮件
+    for u in data['users'][1:]:
+        contacted = [l for l in data['leads'] if l.get('assigned_to') == u['username'] and l.get('is_contacted')]
+        for lead in contacted[:2]: services.mail.add_reply(lead['email'], f"{u['username']}@988.test")
+    services.use_in_app()
+    return services, [u['username'] for u in data['users'][1:]]
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def calls_by_run():
+    """run_id -> {服务: 调用次数}，含重跑结束后才完成的后台写入"""
+    from metrics import metrics
+    out = {}
+    for ev in list(metrics.events):
+        if ev[7] is None: continue
+        per = out.setdefault(ev[7], {})
+        per[ev[1]] = per.get(ev[1], 0) + 1
+    return out
+
+
+def run_level(n, usernames, args):
+    """n 个会话同时开始，全部结束后汇总"""
+    from metrics import metrics
+    from db import get_write_executor
+    metrics.events.clear(); metrics.runs.clear()
+    sessions = [Session(name, args, random.Random(k)) for k, name in enumerate(usernames)]
+    barrier = threading.Barrier(n + 1)
+    results = [None] * n
+
+    def worker(k):
+        results[k] = sessions[k].run(barrier)
+
+    threads = [threading.Thread(target=worker, args=(k,), daemon=True) for k in range(n)]
+    for t in threads: t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads: t.join()
+    wall = time.perf_counter() - t0
+    # 等后台写入落库，调用数才完整
+    get_write_executor().submit(lambda: None).result()
+    time.sleep(0.2)
+
+    # 重跑记录按用户 + 结束时间归到对应操作 (登录前那次重跑还没有用户名，不计入)
+    runs = [(r[0], r[1], r[2]) for r in metrics.runs]
+    calls = calls_by_run()
+    per_action = {}
+    for session, records in zip(sessions, results):
+        for rec in records or []:
+            a = per_action.setdefault(rec["action"], {"ms": [], "errors": 0, "calls": {}, "reruns": 0})
+            a["ms"].append(rec["ms"])
+            if rec["error"]:
+                a["errors"] += 1
+                a.setdefault("sample_error", rec["error"])
+            for ts, run_id, user in runs:
+                if user == session.username and rec["start"] <= ts <= rec["end"]:
+                    a["reruns"] += 1
+                    for service, c in calls.get(run_id, {}).items(): a["calls"][service] = a["calls"].get(service, 0) + c
+
+    actions = {}
+    for name in ACTIONS:
+        a = per_action.get(name)
+        if not a: continue
+        count = len(a["ms"])
+        actions[name] = {
+            "count": count, "errors": a["errors"],
+            "p50_ms": round(percentile(a["ms"], 50), 1), "p90_ms": round(percentile(a["ms"], 90), 1),
+            "p99_ms": round(percentile(a["ms"], 99), 1), "max_ms": round(max(a["ms"]), 1),
+            "reruns_per_action": round(a["reruns"] / count, 2),
+            "calls_per_action": {k: round(v / count, 1) for k, v in sorted(a["calls"].items())},
+        }
+        if "sample_error" in a: actions[name]["sample_error"] = a["sample_error"]
+    total = sum(a["count"] for a in actions.values())
+    # 每个会话领到的任务数：并发领取时若有人少领，说明领取逻辑有竞争
+    claimed = [s.claimed for s in sessions if s.claimed is not None]
+    return {"sessions": n, "wall_s": round(wall, 2), "actions": total, "actions_per_s": round(total / wall, 2),
+            "reruns": len(runs), "reruns_per_s": round(len(runs) / wall, 2),
+            "claimed_min": min(claimed, default=None), "claimed_avg": round(sum(claimed) / len(claimed), 1) if claimed else None,
+            "by_action": actions}
+
+
+def print_level(r):
+    print(f"\n== {r['sessions']} 个会话：{r['wall_s']} s，{r['actions']} 次操作 ({r['actions_per_s']}/s)，"
+          f"{r['reruns']} 次重跑 ({r['reruns_per_s']}/s)，每人领到任务 最少 {r['claimed_min']} / 平均 {r['claimed_avg']} ==")
+    print(f"{'action':<10}{'n':>5}{'err':>5}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}  calls/action")
+    for name, a in r["by_action"].items():
+        print(f"{name:<10}{a['count']:>5}{a['errors']:>5}{a['p50_ms']:>10.0f}{a['p90_ms']:>10.0f}{a['p99_ms']:>10.0f}"
+              f"{a['max_ms']:>10.0f}  {a['calls_per_action']}")
+        if a.get("sample_error"): print(f"{'':<10}  ! {a['sample_error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", default="1,5,10,20", help="逗号分隔的并发会话数，逐级加压")
+    parser.add_argument("--complete", type=int, default=5, help="每个会话完成的任务数")
+    parser.add_argument("--think", type=float, default=0, help="操作间随机停顿上限 (秒)，0 为连续点击")
+    parser.add_argument("--history-days", type=int, default=7, help="每个业务员的历史任务天数 (影响邮件列表长度)")
+    parser.add_argument("--timeout", type=float, default=300, help="单次重跑超时 (秒)")
+    parser.add_argument("--db-latency", type=float, default=10, help="每次数据库请求的模拟延迟 (ms)")
+    parser.add_argument("--ai-latency", type=float, default=300)
+    parser.add_argument("--cn-latency", type=float, default=50)
+    parser.add_argument("--mail-latency", type=float, default=20, help="每条 SMTP/IMAP 命令的模拟延迟 (ms)")
+    parser.add_argument("--out", help="结果写入 JSON 文件")
+    args = parser.parse_args()
+    args.out = os.path.abspath(args.out) if args.out else None
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+
+    levels = [int(x) for x in args.sessions.split(",") if x.strip()]
+    _, usernames = prepare(args, levels)
+    share_runtime()
+
+    # 先跑一个会话预热 (模块导入、脚本编译、连接池)，与已经在线的服务器进程状态一致
+    Session(usernames[0], args, random.Random(-1)).run(threading.Barrier(1))
+    results, offset = [], 1
+    for n in levels:
+        results.append(run_level(n, usernames[offset:offset + n], args))
+        offset += n
+        print_level(results[-1])
+
+    print(f"\n{'sessions':>8}{'actions/s':>12}{'reruns/s':>10}{'claim p90':>12}{'complete p90':>14}{'send p90':>10}")
+    for r in results:
+        p90 = lambda name: r["by_action"].get(name, {}).get("p90_ms", float("nan"))
+        print(f"{r['sessions']:>8}{r['actions_per_s']:>12.2f}{r['reruns_per_s']:>10.2f}{p90('claim'):>12.0f}{p90('complete'):>14.0f}{p90('send'):>10.0f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"meta": {"time": datetime.now().isoformat(timespec="seconds"),
+                                "params": {k: v for k, v in vars(args).items() if k != "out"}}, "levels": results},
+                      f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
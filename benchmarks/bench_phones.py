@@ -0,0 +1,100 @@
+"""号码清洗吞吐基准：旧版逐个正则 (每次现编译、只认 7/8 开头) vs phones 统一引擎 (单个 / 批量)
+
+用法: python benchmarks/bench_phones.py [--numbers 1000000] [--unique 0.6] [--rows 100000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import phones
+
+
+def legacy_clean(phone_raw):
+    """旧版 clean_phone_for_whatsapp"""
+    if pd.isna(phone_raw) or phone_raw == "" or str(phone_raw).lower() == 'nan': return None
+    s = re.split(r'[;,\n]', str(phone_raw))[0].split('.')[0].strip()
+    s = re.sub(r'\D', '', s)
+    if not s: return None
+    if len(s) == 11 and s.startswith('8'): s = '7' + s[1:]
+    elif len(s) == 10: s = '7' + s
+    return s
+
+
+def legacy_extract(row_series):
+    """旧版 extract_all_numbers"""
+    txt = " ".join([str(val) for val in row_series if pd.notna(val)])
+    candidates = []
+    for raw in re.findall(r'(?:^|\D)([789][\d\s\-\(\)]{9,16})(?:\D|$)', txt):
+        d = re.sub(r'\D', '', raw)
+        clean = None
+        if len(d) == 11:
+            if d.startswith('7'): clean = d
+            elif d.startswith('8'): clean = '7' + d[1:]
+        elif len(d) == 10 and d.startswith('9'): clean = '7' + d
+        if clean: candidates.append(clean)
+    return list(set(candidates))
+
+
+# (国家代码, 国内号码首位, 国内位数)
+MARKETS = [("7", "9", 10), ("7", "7", 10), ("375", "2", 9), ("380", "6", 9), ("998", "9", 9),
+           ("996", "5", 9), ("992", "9", 9), ("994", "5", 9), ("374", "9", 8), ("995", "5", 9)]
+
+
+def synthetic_number(rnd):
+    code, lead, n = rnd.choice(MARKETS) if rnd.random() < 0.3 else MARKETS[0]
+    d = lead + "".join(rnd.choice("0123456789") for _ in range(n - 1))
+    if code == "7":
+        return rnd.choice([f"+7 ({d[:3]}) {d[3:6]}-{d[6:8]}-{d[8:]}", f"8{d}", f"7{d}", f"8 {d[:3]} {d[3:6]} {d[6:8]} {d[8:]}",
+                           d, f"7{d}.0", f"8{d}, +7{d[::-1]}"])
+    return rnd.choice([f"+{code} {d[:2]} {d[2:5]} {d[5:]}", f"{code}{d}", f"00{code}{d}", f"+{code}-{d}"])
+
+
+def numbers(n, unique_ratio, seed=0):
+    rnd = random.Random(seed)
+    pool = [synthetic_number(rnd) for _ in range(max(1, int(n * unique_ratio)))]
+    return pool + [rnd.choice(pool) for _ in range(n - len(pool))]
+
+
+def timed(fn):
+    phones._normalize_text.cache_clear()
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--numbers", type=int, default=1_000_000)
+    parser.add_argument("--unique", type=float, default=0.6, help="不重复号码占比")
+    parser.add_argument("--rows", type=int, default=100_000, help="整行提取对比的行数")
+    args = parser.parse_args()
+
+    values = numbers(args.numbers, args.unique)
+    print(f"{args.numbers} numbers, {args.unique:.0%} unique, {sum(1 for m in MARKETS[1:] if m[0] != '7')} non-+7 markets mixed in")
+    print(f"{'normalizer':<14}{'time':>10}{'numbers/s':>14}{'recognized':>12}")
+    results = {}
+    for label, fn in (("legacy", lambda: [legacy_clean(v) for v in values]),
+                      ("scalar", lambda: [phones.normalize_phone(v) for v in values]),
+                      ("batch", lambda: phones.normalize_phones(values).tolist())):
+        elapsed, out = timed(fn)
+        results[label] = out
+        print(f"{label:<14}{elapsed:>9.2f}s{len(values) / elapsed:>14,.0f}{sum(1 for v in out if v):>12,}")
+    assert results["scalar"] == results["batch"]
+
+    from benchmarks.standins.leadgen import lead_rows
+    df = pd.DataFrame(lead_rows(args.rows, seed=7))
+    print(f"\nfirst number per row, {args.rows} import rows")
+    for label, fn in (("legacy", lambda: [(legacy_extract(r) or [None])[0] for _, r in df.iterrows()]),
+                      ("vectorized", lambda: phones.first_numbers(phones.row_texts(df)).tolist())):
+        elapsed, out = timed(fn)
+        print(f"{label:<14}{elapsed:>9.2f}s{len(df) / elapsed:>14,.0f}{sum(1 for v in out if v):>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""报价单生成基准：原图嵌入 vs 缩略图流水线；以及会话内存：清单带原图 vs 只存哈希 (图片在 image_store)
+
+用法: python benchmarks/bench_quotation.py [--items 100] [--size 1600] [--sessions 4]
+提交说明中引用的数字 (40 张 1200px 合成图) 用的是:
+    python benchmarks/bench_quotation.py --items 40 --size 1200 --sessions 3
+文件体积与内存按固定随机种子生成，可逐位复现；耗时随机器不同
+"""
+import argparse
+import gc
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+import quotation
+from utils import LRUCache, BlobStore
+
+
+def synthetic_image(size, seed):
+    """生成接近手机截图体积的噪声图 (JPEG)"""
+    rnd = random.Random(seed)
+    img = Image.effect_noise((size, size), rnd.randint(20, 80)).convert("RGB")
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=92)
+    return out.getvalue()
+
+
+def make_items(n, size, seed=0, store=None):
+    """给出 store 时按页面现在的做法只存 image_hash，否则旧格式带 image_data"""
+    items = []
+    for i in range(n):
+        data = synthetic_image(size, seed + i)
+        item = {"model": f"M-{i:04d}", "name": f"Товар {i}", "desc": "Тест", "price_exw": 10.0 + i, "qty": 100}
+        if store is None: item.update(image_data=data, image_hash=quotation.image_digest(data))
+        else: item["image_hash"] = store.put(data)
+        items.append(item)
+    return items
+
+
+def run(items, thumbnails):
+    quotation._thumb_cache = LRUCache(maxsize=2048)  # 冷缓存
+    t0 = time.perf_counter()
+    out = quotation.generate_quotation_excel(items, 5, 100.0, {"name": "Bench"}, thumbnails=thumbnails)
+    cold = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    quotation.generate_quotation_excel(items, 5, 100.0, {"name": "Bench"}, thumbnails=thumbnails)
+    warm = time.perf_counter() - t0
+    return len(out.getvalue()), cold, warm
+
+
+def session_memory(n_items, size, n_sessions, store):
+    """模拟 n_sessions 个业务员各建一份报价清单 (图片互不相同)，
+    返回 (常驻字节：会话状态 + image_store 内存层, 其中内存层字节)"""
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    sessions = []
+    for s in range(n_sessions):
+        sessions.append({"quote_items": make_items(n_items, size, seed=s * n_items, store=store)})
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del sessions
+    return used, store.mem_bytes if store else 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--size", type=int, default=1600, help="源图边长 (px)")
+    parser.add_argument("--sessions", type=int, default=4, help="会话内存对比中的并发会话数")
+    args = parser.parse_args()
+
+    items = make_items(args.items, args.size)
+    raw_mb = sum(len(i["image_data"]) for i in items) / 1e6
+    print(f"{args.items} items, {args.size}px source images, {raw_mb:.1f} MB raw")
+    print(f"{'mode':<12}{'xlsx size':>12}{'cold build':>14}{'warm build':>14}")
+    for label, thumbs in (("original", False), ("thumbnail", True)):
+        size, cold, warm = run(items, thumbs)
+        print(f"{label:<12}{size / 1e6:>10.2f}MB{cold:>13.2f}s{warm:>13.2f}s")
+
+    print(f"\nsession memory, {args.sessions} sessions x {args.items} items")
+    print(f"{'layout':<12}{'per session':>14}{'shared tier':>14}")
+    with tempfile.TemporaryDirectory() as root:
+        for label, store in (("inline", None), ("blob-store", BlobStore(root, mem_bytes=quotation.QUOTE_BLOB_MEM))):
+            used, tier = session_memory(args.items, args.size, args.sessions, store)
+            print(f"{label:<12}{(used - tier) / args.sessions / 1e6:>12.2f}MB{tier / 1e6:>12.1f}MB")
+        # 冷启动读回：内存层清空，缩略图全部从磁盘原图重建
+        quotation.image_store = BlobStore(root, mem_bytes=quotation.QUOTE_BLOB_MEM)
+        lazy_items = make_items(args.items, args.size, store=quotation.image_store)
+        quotation.image_store = BlobStore(root, mem_bytes=quotation.QUOTE_BLOB_MEM)
+        size, cold, warm = run(lazy_items, True)
+        print(f"{'lazy build':<12}{size / 1e6:>10.2f}MB{cold:>13.2f}s{warm:>13.2f}s  (images read back from disk)")
+
+
+if __name__ == "__main__":
+    main()
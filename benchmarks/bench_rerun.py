@@ -0,0 +1,87 @@
+"""各页面单次重跑 (rerun) 脚本耗时基准 (AppTest，已登录状态)
+
+新版本通过 st.navigation 切换页面；旧的单文件版本 (--rev) 通过导航单选框切换，两者结果可直接对比。
+未配置 secrets 时数据库为空，测得的是脚本本身的开销。
+用法:
+    python benchmarks/bench_rerun.py [--rev HEAD~1] [--reruns 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = {
+    "admin": ["system", "logs", "team", "import_pool", "wechat", "settings", "tools"],
+    "sales": ["workbench", "wechat", "settings", "tools"],
+}
+# 旧版单选框导航的选项值
+LEGACY_NAV = {"system": "System", "logs": "Logs", "team": "Team", "import_pool": "Import", "wechat": "WeChat", "settings": "Settings", "tools": "Tools", "workbench": "Workbench"}
+
+RUNNER = r"""
+import json, os, statistics, sys, time
+from streamlit.testing.v1 import AppTest
+app_dir, pages, reruns, legacy_nav = sys.argv[1], json.loads(sys.argv[2]), int(sys.argv[3]), json.loads(sys.argv[4])
+out = {}
+for role, names in pages.items():
+    for name in names:
+        at = AppTest.from_file(app_dir + "/app.py", default_timeout=120)
+        for k, v in {"logged_in": True, "username": "bench_" + role, "role": role, "real_name": "Bench"}.items(): at.session_state[k] = v
+        page_file = app_dir + "/app_pages/" + name + ".py"
+        if os.path.exists(page_file): at.switch_page("app_pages/" + name + ".py"); at.run()
+        else:
+            at.run()
+            nav = [r for r in at.radio if r.label == "导航菜单"]
+            if nav: nav[0].set_value(legacy_nav[name]).run()
+        times = []
+        for _ in range(reruns):
+            t0 = time.perf_counter(); at.run(); times.append((time.perf_counter() - t0) * 1000)
+        out[role + "/" + name] = {"median_ms": statistics.median(times), "p95_ms": sorted(times)[int(0.95 * (len(times) - 1))], "error": bool(at.exception)}
+print(json.dumps(out))
+"""
+
+
+def measure(app_dir, reruns):
+    proc = subprocess.run([sys.executable, "-c", RUNNER, app_dir, json.dumps(PAGES), str(reruns), json.dumps(LEGACY_NAV)],
+                          capture_output=True, text=True, cwd=app_dir)
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:], file=sys.stderr)
+        return {}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def export_rev(rev):
+    tmp = tempfile.mkdtemp(prefix="rerun_")
+    archive = subprocess.run(["git", "-C", ROOT, "archive", rev], capture_output=True, check=True).stdout
+    subprocess.run(["tar", "-x", "-C", tmp], input=archive, check=True)
+    return tmp
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rev", help="对比的 git 版本 (例如 HEAD~1)")
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    args = parser.parse_args()
+
+    results = {"working tree": measure(ROOT, args.reruns)}
+    if args.rev: results = {args.rev: measure(export_rev(args.rev), args.reruns), **results}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    labels = list(results)
+    print(f"{'page':<22}" + "".join(f"{l:>18}" for l in labels) + "   (median ms per rerun)")
+    for key in results[labels[-1]]:
+        cells = []
+        for l in labels:
+            r = results[l].get(key)
+            cells.append(f"{r['median_ms']:>15.1f}{'*' if r['error'] else ' '}  " if r else f"{'-':>18}")
+        print(f"{key:<22}" + "".join(cells))
+    print("* 页面抛出异常 (通常是未连接数据库)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""本地替身服务：离线基准 / 压测时代替 Supabase (PostgREST + Realtime)、CheckNumber、OpenAI 和 SMTP/IMAP 邮箱。
+
+每个替身在后台线程里监听 127.0.0.1 的随机端口，进程退出时随之结束；延迟均可配置，用来模拟真实网络往返。
+典型用法:
+    from benchmarks.standins import start_all
+    services = start_all(db_latency_ms=15)
+    services.use_in_app()        # 写入 secrets / 环境变量，之后导入的 app 模块都连到替身
+"""
+import os
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """HTTP 替身的公共基类：JSON 收发 + 可配置的固定延迟 (server.latency_ms)"""
+    protocol_version = "HTTP/1.1"
+
+    def read_body(self):
+        n = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(n) if n else b''
+
+    def read_json(self):
+        body = self.read_body()
+        return json.loads(body) if body else None
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, default=str, ensure_ascii=False).encode()
+        self.send_bytes(status, body, "application/json", headers)
+
+    def send_bytes(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items(): self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args): pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # 压测时几百个并发连接，默认 backlog (5) 会被重置连接
+    request_queue_size = 512
+
+
+def serve_http(handler_cls, **attrs):
+    """启动一个后台 HTTP 替身，attrs 挂到 server 上供 handler 读取；返回 (server, base_url)"""
+    server = _Server(('127.0.0.1', 0), handler_cls)
+    for k, v in attrs.items(): setattr(server, k, v)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+class StandIns:
+    """一组已启动的替身及其地址"""
+
+    def __init__(self, db, db_url, checknumber, checknumber_url, openai, openai_url, mail, realtime=None, realtime_url=None):
+        self.db, self.db_url = db, db_url
+        self.realtime, self.realtime_url = realtime, realtime_url
+        self.checknumber, self.checknumber_url = checknumber, checknumber_url
+        self.openai, self.openai_url = openai, openai_url
+        self.mail = mail
+        self.workdir = None
+
+    def email_config(self, address):
+        """指向本地邮箱替身的用户邮箱配置 (与 users.email_config 同结构)"""
+        return {"email": address, "password": "x", "smtp_server": "127.0.0.1", "smtp_port": str(self.mail.smtp_port),
+                "imap_server": "127.0.0.1", "imap_port": str(self.mail.imap_port)}
+
+    def secrets_toml(self):
+        return (f'SUPABASE_URL = "{self.db_url}"\nSUPABASE_KEY = "standin"\nSUPABASE_REALTIME_URL = "{self.realtime_url or ""}"\n'
+                f'OPENAI_KEY = "sk-standin"\nCN_USER_ID = "standin"\nCN_API_KEY = "standin"\n')
+
+    def use_in_app(self):
+        """让随后导入的 app 模块连到替身：在临时目录写 .streamlit/secrets.toml 并切换工作目录，
+        OpenAI SDK 通过 OPENAI_BASE_URL 指向替身，CheckNumber 地址写入 CONFIG"""
+        self.workdir = tempfile.mkdtemp(prefix="standins_")
+        os.makedirs(os.path.join(self.workdir, ".streamlit"))
+        with open(os.path.join(self.workdir, ".streamlit", "secrets.toml"), "w") as f: f.write(self.secrets_toml())
+        os.chdir(self.workdir)
+        os.environ["OPENAI_BASE_URL"] = f"{self.openai_url}/v1"
+        from config import CONFIG
+        CONFIG["CN_BASE_URL"] = self.checknumber_url
+        return self
+
+
+def start_all(db_latency_ms=10, ai_latency_ms=300, cn_latency_ms=50, cn_ready_after_s=1.0, mail_latency_ms=20, seed=None):
+    from .fake_postgrest import start_postgrest
+    from .fake_checknumber import start_checknumber
+    from .fake_openai import start_openai
+    from .fake_mail import start_mail
+    from .fake_realtime import start_realtime
+    db, db_url = start_postgrest(latency_ms=db_latency_ms, seed=seed)
+    rt, rt_url = start_realtime(db)
+    cn, cn_url = start_checknumber(latency_ms=cn_latency_ms, ready_after_s=cn_ready_after_s)
+    ai, ai_url = start_openai(latency_ms=ai_latency_ms)
+    mail = start_mail(latency_ms=mail_latency_ms)
+    return StandIns(db, db_url, cn, cn_url, ai, ai_url, mail, rt, rt_url)
@@ -0,0 +1,58 @@
+"""CheckNumber 任务 API 替身：提交号码文件 -> 轮询任务状态 -> 下载结果 CSV。
+
+任务提交 ready_after_s 秒后变为 exported；号码是否有效按末位数字决定 (偶数有效)，结果可复现。
+"""
+import re
+import time
+import threading
+import itertools
+from urllib.parse import urlsplit
+from . import JSONHandler, serve_http
+
+BASE_PATH = "/wa/api/simple/tasks"
+
+
+def is_valid_number(number):
+    return int(number[-1]) % 2 == 0 if number and number[-1].isdigit() else False
+
+
+class CheckNumberHandler(JSONHandler):
+    def _begin(self):
+        self.server.calls += 1
+        if self.server.latency_ms: time.sleep(self.server.latency_ms / 1000)
+
+    def do_POST(self):
+        self._begin()
+        body = self.read_body().decode('utf-8', 'replace')
+        # multipart 里 input.txt 的内容：每行一个号码
+        numbers = [n for n in re.findall(r'^\+?\d{6,15}\s*$', body, re.M)]
+        with self.server.lock:
+            task_id = f"t{next(self.server.ids)}"
+            self.server.tasks[task_id] = {"numbers": [n.strip() for n in numbers], "created": time.time()}
+        self.send_json(200, {"task_id": task_id, "status": "pending"})
+
+    def do_GET(self):
+        self._begin()
+        path = urlsplit(self.path).path
+        if path.startswith("/results/"):
+            task = self.server.tasks.get(path.rsplit('/', 1)[-1].removesuffix('.csv'))
+            if not task: return self.send_json(404, {"message": "not found"})
+            lines = ["number,whatsapp"] + [f"{n},{'yes' if is_valid_number(n) else 'no'}" for n in task["numbers"]]
+            return self.send_bytes(200, "\n".join(lines).encode(), "text/csv")
+        if path.rstrip('/') == BASE_PATH:
+            # 健康检查直接 GET 任务列表地址
+            return self.send_json(405, {"message": "method not allowed"})
+        task_id = path.rsplit('/', 1)[-1]
+        task = self.server.tasks.get(task_id)
+        if not task: return self.send_json(404, {"message": "task not found"})
+        if time.time() - task["created"] < self.server.ready_after_s:
+            return self.send_json(200, {"task_id": task_id, "status": "processing"})
+        host = f"http://127.0.0.1:{self.server.server_port}"
+        self.send_json(200, {"task_id": task_id, "status": "exported", "result_url": f"{host}/results/{task_id}.csv"})
+
+
+def start_checknumber(latency_ms=50, ready_after_s=1.0):
+    """返回 (server, 任务地址)；任务地址可直接写入 CONFIG["CN_BASE_URL"]"""
+    server, url = serve_http(CheckNumberHandler, latency_ms=latency_ms, ready_after_s=ready_after_s,
+                             tasks={}, ids=itertools.count(1), lock=threading.Lock(), calls=0)
+    return server, url + BASE_PATH
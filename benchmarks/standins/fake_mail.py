@@ -0,0 +1,220 @@
+"""SMTP / IMAP 替身 (隐式 TLS，自签名证书)，共用一个内存邮箱。
+
+SMTP 收到的邮件存入 "Sent" 文件夹；IMAP 实现 imap_tools 用到的命令子集
+(CAPABILITY / LOGIN / LIST / SELECT / STATUS / UID SEARCH / UID FETCH / IDLE / NOOP / LOGOUT)。
+客户回复用 MailStore.add_reply() 放进 INBOX；处于 IDLE 的连接会立即收到 EXISTS 推送。
+"""
+import os
+import re
+import ssl
+import select
+import time
+import tempfile
+import threading
+import socketserver
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import format_datetime
+
+_CERT = None
+_cert_lock = threading.Lock()
+
+
+def _server_context():
+    """生成一次自签名证书 (客户端 smtplib / imaplib 默认不校验证书)"""
+    global _CERT
+    with _cert_lock:
+        if _CERT is None:
+            from cryptography import x509
+            from cryptography.hazmat.primitives import hashes, serialization
+            from cryptography.hazmat.primitives.asymmetric import ec
+            from cryptography.x509.oid import NameOID
+            key = ec.generate_private_key(ec.SECP256R1())
+            name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+            now = datetime.now(timezone.utc)
+            cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+                    .serial_number(x509.random_serial_number()).not_valid_before(now - timedelta(days=1))
+                    .not_valid_after(now + timedelta(days=30)).sign(key, hashes.SHA256()))
+            d = tempfile.mkdtemp(prefix="standin_tls_")
+            _CERT = (os.path.join(d, "cert.pem"), os.path.join(d, "key.pem"))
+            with open(_CERT[0], "wb") as f: f.write(cert.public_bytes(serialization.Encoding.PEM))
+            with open(_CERT[1], "wb") as f:
+                f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(*_CERT)
+    return ctx
+
+
+def make_message(from_addr, to_addr, subject, body, when=None):
+    msg = EmailMessage()
+    msg['From'], msg['To'], msg['Subject'] = from_addr, to_addr, subject
+    msg['Date'] = format_datetime(when or datetime.now(timezone.utc))
+    msg.set_content(body)
+    return msg.as_bytes()
+
+
+class MailStore:
+    """所有账号共用的内存邮箱：{文件夹: [(uid, 原始邮件字节)]}"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.arrived = threading.Condition(self.lock)
+        self.folders = {"INBOX": [], "Sent": []}
+        self._uid = 0
+        self.smtp_port = self.imap_port = None
+        self.commands = 0
+
+    def deliver(self, folder, raw):
+        with self.lock:
+            self._uid += 1
+            self.folders.setdefault(folder, []).append((self._uid, raw))
+            self.arrived.notify_all()
+
+    def add_reply(self, from_addr, to_addr, subject="Re: 988 Group", body="Спасибо, интересно. Пришлите прайс."):
+        self.deliver("INBOX", make_message(from_addr, to_addr, subject, body))
+
+
+class _TLSHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        # 握手放在处理线程里，并发连接互不阻塞
+        self.request = self.server.tls.wrap_socket(self.request, server_side=True)
+        super().setup()
+
+    def send(self, text):
+        self.wfile.write(text.encode() if isinstance(text, str) else text)
+        self.wfile.flush()
+
+    def pause(self):
+        self.server.store.commands += 1
+        if self.server.latency_ms: time.sleep(self.server.latency_ms / 1000)
+
+
+class SMTPHandler(_TLSHandler):
+    def handle(self):
+        store = self.server.store
+        self.send("220 standin ESMTP\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line: return
+            cmd = line.decode(errors='replace').strip().split(' ', 1)[0].upper()
+            self.pause()
+            if cmd in ('EHLO', 'HELO'): self.send("250-standin\r\n250-AUTH PLAIN LOGIN\r\n250 OK\r\n")
+            elif cmd == 'AUTH': self.send("235 2.7.0 Authentication successful\r\n")
+            elif cmd in ('MAIL', 'RCPT', 'RSET', 'NOOP'): self.send("250 OK\r\n")
+            elif cmd == 'DATA':
+                self.send("354 End data with <CR><LF>.<CR><LF>\r\n")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"): break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                store.deliver("Sent", b"".join(lines))
+                self.send("250 OK queued\r\n")
+            elif cmd == 'QUIT':
+                self.send("221 Bye\r\n")
+                return
+            else: self.send("502 Command not implemented\r\n")
+
+
+def _uid_set(spec, uids):
+    out = []
+    for part in spec.split(','):
+        if ':' in part:
+            a, b = part.split(':')
+            lo = int(a) if a != '*' else max(uids or [0])
+            hi = int(b) if b != '*' else max(uids or [0])
+            out += [u for u in uids if min(lo, hi) <= u <= max(lo, hi)]
+        elif part == '*': out += uids[-1:]
+        else: out += [u for u in uids if u == int(part)]
+    return out
+
+
+class IMAPHandler(_TLSHandler):
+    def handle(self):
+        store = self.server.store
+        folder = None
+        self.send("* OK [CAPABILITY IMAP4rev1 AUTH=PLAIN] standin ready\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line: return
+            parts = line.decode(errors='replace').strip().split(' ', 2)
+            if len(parts) < 2: continue
+            tag, cmd, args = parts[0], parts[1].upper(), (parts[2] if len(parts) > 2 else '')
+            self.pause()
+            if cmd == 'CAPABILITY': self.send(f"* CAPABILITY IMAP4rev1 AUTH=PLAIN\r\n{tag} OK CAPABILITY completed\r\n")
+            elif cmd == 'LOGIN': self.send(f"{tag} OK LOGIN completed\r\n")
+            elif cmd in ('SELECT', 'EXAMINE'):
+                folder = args.strip().strip('"')
+                with store.lock: n = len(store.folders.get(folder, []))
+                self.send(f"* FLAGS (\\Seen)\r\n* {n} EXISTS\r\n* 0 RECENT\r\n* OK [UIDVALIDITY 1] UIDs valid\r\n{tag} OK [READ-WRITE] {cmd} completed\r\n")
+            elif cmd == 'LIST':
+                with store.lock: names = list(store.folders)
+                self.send("".join(f'* LIST (\\HasNoChildren) "/" "{name}"\r\n' for name in names) + f"{tag} OK LIST completed\r\n")
+            elif cmd == 'UID':
+                sub, _, rest = args.partition(' ')
+                with store.lock: msgs = list(store.folders.get(folder, []))
+                uids = [u for u, _ in msgs]
+                if sub.upper() == 'SEARCH':
+                    m = re.search(r'UID ([0-9*:,]+)', rest)
+                    found = _uid_set(m.group(1), uids) if m else uids
+                    self.send(f"* SEARCH {' '.join(map(str, found))}\r\n{tag} OK SEARCH completed\r\n")
+                elif sub.upper() == 'FETCH':
+                    wanted = set(_uid_set(rest.split(' ', 1)[0], uids))
+                    out = []
+                    for seq, (uid, raw) in enumerate(msgs, 1):
+                        if uid not in wanted: continue
+                        out.append(f"* {seq} FETCH (UID {uid} FLAGS (\\Seen) RFC822.SIZE {len(raw)} BODY[] {{{len(raw)}}}\r\n".encode() + raw + b")\r\n")
+                    self.send(b"".join(out) + f"{tag} OK FETCH completed\r\n".encode())
+                else: self.send(f"{tag} BAD unsupported UID command\r\n")
+            elif cmd == 'STATUS':
+                name = args.split(' (')[0].strip().strip('"')
+                with store.lock: msgs = list(store.folders.get(name, []))
+                uidnext = (msgs[-1][0] if msgs else 0) + 1
+                self.send(f'* STATUS "{name}" (MESSAGES {len(msgs)} RECENT 0 UIDNEXT {uidnext} UIDVALIDITY 1 UNSEEN 0)\r\n{tag} OK STATUS completed\r\n')
+            elif cmd == 'IDLE': self.idle(tag, folder)
+            elif cmd == 'NOOP': self.send(f"{tag} OK NOOP completed\r\n")
+            elif cmd == 'LOGOUT':
+                self.send(f"* BYE standin logging out\r\n{tag} OK LOGOUT completed\r\n")
+                return
+            else: self.send(f"{tag} BAD {re.sub(r'[^A-Z]', '', cmd)} not supported\r\n")
+
+
+    def idle(self, tag, folder):
+        """IDLE：有新邮件就推送 "* n EXISTS"，直到客户端发 DONE"""
+        store = self.server.store
+        with store.lock: seen = len(store.folders.get(folder, []))
+        self.send("+ idling\r\n")
+        while True:
+            with store.arrived:
+                store.arrived.wait_for(lambda: len(store.folders.get(folder, [])) != seen, timeout=0.2)
+                n = len(store.folders.get(folder, []))
+            if n != seen:
+                seen = n
+                self.send(f"* {n} EXISTS\r\n")
+            if self.request.pending() or select.select([self.request], [], [], 0)[0]:
+                line = self.rfile.readline()
+                if not line: return
+                if line.strip().upper() == b'DONE':
+                    self.send(f"{tag} OK IDLE terminated\r\n")
+                    return
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 512
+
+
+def _start(handler, store, latency_ms):
+    server = _Server(('127.0.0.1', 0), handler)
+    server.store, server.latency_ms, server.tls = store, latency_ms, _server_context()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+
+def start_mail(latency_ms=20):
+    """启动 SMTP + IMAP 替身，返回共用的 MailStore (端口见 smtp_port / imap_port)"""
+    store = MailStore()
+    store.smtp_port = _start(SMTPHandler, store, latency_ms)
+    store.imap_port = _start(IMAPHandler, store, latency_ms)
+    return store
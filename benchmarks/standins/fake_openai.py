@@ -0,0 +1,56 @@
+"""OpenAI API 替身：chat.completions / audio.transcriptions / models.retrieve。
+
+返回固定的俄语文案；response_format=json_object 时返回一份同时满足各处解析的 JSON
+(商品解析、开发信、截图识别)。每次请求按 latency_ms 固定延迟，模拟模型生成耗时。
+"""
+import json
+import time
+from urllib.parse import urlsplit
+from . import JSONHandler, serve_http
+
+TEXT_REPLY = "Здравствуйте! Меня зовут Анна, 988 Group. Поможем с поставками из Китая — рассчитать логистику?"
+JSON_REPLY = {
+    "body_text": "Здравствуйте!\nМы обеспечиваем быструю таможенную очистку.\nС уважением, 988 Group",
+    "name_ru": "Товар", "model": "M-001", "price_cny": 12.5, "qty": 100, "desc_ru": "Тестовый товар",
+    "items": [],
+}
+
+
+def _completion(model, content):
+    return {
+        "id": "chatcmpl-standin", "object": "chat.completion", "created": int(time.time()), "model": model,
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 50, "completion_tokens": 40, "total_tokens": 90},
+    }
+
+
+class OpenAIHandler(JSONHandler):
+    def _begin(self):
+        self.server.calls += 1
+        if self.server.latency_ms: time.sleep(self.server.latency_ms / 1000)
+
+    def do_POST(self):
+        self._begin()
+        path = urlsplit(self.path).path
+        if path.endswith("/chat/completions"):
+            req = self.read_json() or {}
+            wants_json = (req.get("response_format") or {}).get("type") == "json_object"
+            content = json.dumps(JSON_REPLY, ensure_ascii=False) if wants_json else TEXT_REPLY
+            return self.send_json(200, _completion(req.get("model", "gpt-4o"), content))
+        if path.endswith("/audio/transcriptions"):
+            self.read_body()
+            return self.send_json(200, {"text": TEXT_REPLY})
+        self.read_body()
+        self.send_json(404, {"error": {"message": f"unknown endpoint {path}", "type": "invalid_request_error"}})
+
+    def do_GET(self):
+        self._begin()
+        path = urlsplit(self.path).path
+        if "/models/" in path:
+            return self.send_json(200, {"id": path.rsplit('/', 1)[-1], "object": "model", "created": 0, "owned_by": "standin"})
+        self.send_json(404, {"error": {"message": f"unknown endpoint {path}", "type": "invalid_request_error"}})
+
+
+def start_openai(latency_ms=300):
+    """返回 (server, base_url)；SDK 的 base_url 为 base_url + "/v1" """
+    return serve_http(OpenAIHandler, latency_ms=latency_ms, calls=0)
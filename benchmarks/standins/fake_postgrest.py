@@ -0,0 +1,416 @@
+"""PostgREST 替身：内存中的 users / leads / wechat_customers / points_ledger / daily_activity 表。
+
+支持 supabase-py 实际发出的请求形态 (select/insert/upsert/update/delete、常用过滤、order/limit/offset、
+count=exact、single())，以及 sql/ 目录里定义的 RPC。比较语义按 SQL 三值逻辑：NULL 与任何值比较都不成立。
+"""
+import time
+import fnmatch
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlsplit
+from . import JSONHandler, serve_http
+
+RESERVED = {'select', 'order', 'limit', 'offset', 'on_conflict', 'columns'}
+
+TABLE_DEFAULTS = {
+    'users': lambda: {'points': 0, 'daily_limit': 25, 'role': 'sales', 'email_config': None, 'last_seen': None},
+    'leads': lambda: {'assigned_to': None, 'assigned_at': None, 'completed_at': None, 'is_contacted': False, 'has_new_reply': False,
+                      'is_frozen': False, 'retry_count': 0, 'error_log': None, 'ai_message': None, 'email': None, 'phone': None,
+                      'last_email_time': None, 'created_at': datetime.now().isoformat()},
+    'wechat_customers': lambda: {'assigned_to': None, 'cycle_days': 7, 'last_contact_date': None, 'next_contact_date': None},
+    'points_ledger': lambda: {'reason': None, 'created_at': datetime.now().isoformat()},
+    'daily_activity': lambda: {'claimed': 0, 'done': 0},
+}
+UNIQUE = {'users': 'username', 'wechat_customers': 'customer_code'}
+
+
+def _coerce(raw, sample):
+    """把 URL 里的字符串值转换成与列值可比较的类型"""
+    if isinstance(sample, bool): return raw == 'true'
+    if isinstance(sample, int):
+        try: return int(raw)
+        except ValueError: return raw
+    if isinstance(sample, float):
+        try: return float(raw)
+        except ValueError: return raw
+    return raw
+
+def _like(pattern, value, ci):
+    pattern = pattern.replace('%', '*')
+    return fnmatch.fnmatchcase(value.lower() if ci else value, pattern.lower() if ci else pattern)
+
+def _unquote(raw):
+    if len(raw) >= 2 and raw[0] == raw[-1] == '"': return raw[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+    return raw
+
+def _match(row, col, expr):
+    negate = expr.startswith('not.')
+    if negate: expr = expr[4:]
+    op, _, raw = expr.partition('.')
+    raw = _unquote(raw)
+    value = row.get(col)
+    if op == 'is':
+        ok = value is None if raw == 'null' else value is (raw == 'true')
+    elif value is None: ok = False
+    elif op == 'in':
+        items = [x.strip().strip('"') for x in raw.strip('()').split(',') if x.strip()]
+        ok = value in [_coerce(x, value) for x in items]
+    elif op in ('like', 'ilike'): ok = _like(raw, str(value), op == 'ilike')
+    else:
+        other = _coerce(raw, value)
+        try:
+            ok = {'eq': value == other, 'neq': value != other, 'gt': value > other, 'gte': value >= other,
+                  'lt': value < other, 'lte': value <= other}[op]
+        except TypeError: ok = str(value) < str(other) if op in ('lt', 'lte') else False
+    return ok != negate
+
+def _split_top(text):
+    """按顶层逗号切分 (括号和双引号里的逗号不算)"""
+    parts, cur, depth, quoted, i = [], '', 0, False, 0
+    while i < len(text):
+        ch = text[i]
+        if quoted and ch == '\\':
+            cur += text[i:i + 2]; i += 2; continue
+        if ch == '"': quoted = not quoted
+        elif not quoted and ch == '(': depth += 1
+        elif not quoted and ch == ')': depth -= 1
+        elif not quoted and ch == ',' and depth == 0:
+            parts.append(cur); cur = ''; i += 1; continue
+        cur += ch; i += 1
+    return parts + [cur]
+
+def _match_logic(row, op, body):
+    """or=(a.gt.1,and(a.eq.1,b.gt.2)) 这类逻辑组合，逐项递归"""
+    results = (_match_term(row, t) for t in _split_top(body[1:-1]))
+    return any(results) if op == 'or' else all(results)
+
+def _match_term(row, term):
+    for op in ('or', 'and'):
+        if term.startswith(op + '('): return _match_logic(row, op, term[len(op):])
+    col, _, expr = term.partition('.')
+    return _match(row, col, expr)
+
+def _day(value):
+    return str(value)[:10] if value else None
+
+
+class Store:
+    """内存数据库 + RPC 实现，一把全局锁保证并发请求下的一致性"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.tables = {name: [] for name in TABLE_DEFAULTS}
+        self._ids = {name: 0 for name in TABLE_DEFAULTS}
+        self.requests = 0
+        self.listeners = []
+
+    # ---------- 写入 ----------
+    def insert(self, table, row):
+        self._ids[table] = self._ids.get(table, 0) + 1
+        full = {**TABLE_DEFAULTS.get(table, dict)(), 'id': self._ids[table], **row}
+        self.tables.setdefault(table, []).append(full)
+        self._changed(table, None, full)
+        return full
+
+    def insert_many(self, table, rows):
+        with self.lock: return [self.insert(table, r) for r in rows]
+
+    def upsert(self, table, rows, key):
+        out = []
+        with self.lock:
+            index = {r.get(key): r for r in self.tables[table]}
+            for row in rows:
+                if row.get(key) in index:
+                    index[row[key]].update(row)
+                    out.append(index[row[key]])
+                else: out.append(self.insert(table, row))
+        return out
+
+    def update(self, table, filters, patch):
+        out = []
+        with self.lock:
+            for row in self.select(table, filters):
+                before = dict(row)
+                row.update(patch)
+                self._changed(table, before, row)
+                out.append(row)
+        return out
+
+    def delete(self, table, filters):
+        with self.lock:
+            gone = self.select(table, filters)
+            ids = {id(r) for r in gone}
+            self.tables[table] = [r for r in self.tables[table] if id(r) not in ids]
+        return gone
+
+    def select(self, table, filters):
+        rows = self.tables.get(table, [])
+        for col, expr in filters:
+            if col in ('or', 'and'): rows = [r for r in rows if _match_logic(r, col, expr)]
+            else: rows = [r for r in rows if _match(r, col, expr)]
+        return rows
+
+    def _changed(self, table, old, new):
+        """行变更 (old 为 None 表示插入)：维护 daily_activity，并通知订阅者 (Realtime 替身)"""
+        self._activity(old, new)
+        for listener in self.listeners: listener(table, old, new)
+
+    def _activity(self, old, new):
+        """daily_activity 触发器 (sql/004_daily_activity.sql) 的同等逻辑"""
+        if 'assigned_to' not in new: return
+        user = new.get('assigned_to')
+        if not user: return
+        if new.get('assigned_at') and (old is None or not old.get('assigned_to') or old.get('assigned_at') != new.get('assigned_at')):
+            self._bump(_day(new['assigned_at']), user, 'claimed')
+        if new.get('completed_at') and (old is None or not old.get('completed_at')):
+            self._bump(_day(new['completed_at']), user, 'done')
+
+    def _bump(self, day, user, field):
+        for r in self.tables['daily_activity']:
+            if r['day'] == day and r['username'] == user:
+                r[field] += 1
+                return
+        self.tables['daily_activity'].append({'day': day, 'username': user, 'claimed': 0, 'done': 0, field: 1})
+
+    # ---------- RPC (与 sql/ 目录中的函数语义一致) ----------
+    def _user(self, username):
+        return next((u for u in self.tables['users'] if u['username'] == username), None)
+
+    def rpc_add_user_points(self, p_username, p_amount, p_reason=None):
+        self.insert('points_ledger', {'username': p_username, 'amount': p_amount, 'reason': p_reason})
+        user = self._user(p_username)
+        if not user: return 0
+        user['points'] = (user.get('points') or 0) + p_amount
+        return user['points']
+
+    def rpc_add_user_points_batch(self, p_events):
+        totals = {}
+        for e in p_events:
+            self.insert('points_ledger', {'username': e['username'], 'amount': int(e['amount']), 'reason': e.get('reason')})
+            totals[e['username']] = totals.get(e['username'], 0) + int(e['amount'])
+        out = []
+        for name, total in totals.items():
+            user = self._user(name)
+            if user:
+                user['points'] = (user.get('points') or 0) + total
+                out.append({'username': name, 'points': user['points']})
+        return out
+
+    def rpc_claim_pool_leads(self, p_username, p_limit, p_day):
+        # 整个 RPC 在全局锁内执行，等同 FOR UPDATE SKIP LOCKED 的效果：并发领取互不重叠
+        out = []
+        for row in self.tables['leads']:
+            if len(out) >= p_limit: break
+            if row.get('assigned_to') is None and row.get('is_frozen') is False:
+                before = dict(row)
+                row.update({'assigned_to': p_username, 'assigned_at': p_day})
+                self._changed('leads', before, row)
+                out.append(dict(row))
+        return out
+
+    def rpc_recycle_expired_leads(self, p_day, p_batch=500):
+        recycled = cleared = 0
+        for row in self.tables['leads']:
+            if recycled >= p_batch: break
+            if row.get('assigned_to') is not None and row.get('is_contacted') is False and (_day(row.get('assigned_at')) or p_day) < p_day:
+                before = dict(row)
+                row.update({'assigned_to': None, 'assigned_at': None, 'ai_message': None})
+                self._changed('leads', before, row)
+                recycled += 1
+        for row in self.tables['leads']:
+            if cleared >= p_batch: break
+            if row.get('assigned_to') is None and row.get('ai_message'):
+                row['ai_message'] = None
+                cleared += 1
+        return {'recycled': recycled, 'cleared': cleared}
+
+    def rpc_upsert_wechat_customers(self, p_rows, p_day):
+        index = {r['customer_code']: r for r in self.tables['wechat_customers']}
+        inserted = updated = 0
+        for row in p_rows:
+            patch = {'assigned_to': row['assigned_to'], 'cycle_days': int(row['cycle_days'])}
+            if row['customer_code'] in index:
+                index[row['customer_code']].update(patch)
+                updated += 1
+            else:
+                index[row['customer_code']] = self.insert('wechat_customers', {'customer_code': row['customer_code'], 'next_contact_date': row.get('next_contact_date') or p_day, **patch})
+                inserted += 1
+        return {'inserted': inserted, 'updated': updated}
+
+    def rpc_get_wechat_load(self, p_users, p_start, p_end):
+        counts = {}
+        for r in self.tables['wechat_customers']:
+            if r.get('assigned_to') in p_users and r.get('next_contact_date') and p_start <= r['next_contact_date'] < p_end:
+                k = (r['assigned_to'], r['next_contact_date'])
+                counts[k] = counts.get(k, 0) + 1
+        return [{'assigned_to': u, 'day': d, 'n': n} for (u, d), n in counts.items()]
+
+    def rpc_get_wechat_tasks(self, p_username, p_day, p_after_date=None, p_after_id=None, p_limit=10):
+        key = lambda r: (r['next_contact_date'], r['id'])
+        rows = [r for r in self.tables['wechat_customers'] if r.get('assigned_to') == p_username and r.get('next_contact_date') and r['next_contact_date'] <= p_day]
+        if p_after_id is not None: rows = [r for r in rows if key(r) > (p_after_date, p_after_id)]
+        return [dict(r) for r in sorted(rows, key=key)[:p_limit]]
+
+    def rpc_complete_wechat_contact(self, p_id, p_day):
+        row = next((r for r in self.tables['wechat_customers'] if r['id'] == p_id), None)
+        if row is None: return None
+        cycle = row.get('cycle_days') or 7
+        day0 = datetime.fromisoformat(p_day).date()
+        days = [(day0 + timedelta(days=k)).isoformat() for k in range(max(cycle - cycle // 5, 1), max(cycle, 1) + 1)]
+        load = {d: 0 for d in days}
+        for r in self.tables['wechat_customers']:
+            if r.get('assigned_to') == row.get('assigned_to') and r.get('next_contact_date') in load: load[r['next_contact_date']] += 1
+        row.update({'last_contact_date': p_day, 'next_contact_date': min(reversed(days), key=load.get)})
+        return row['next_contact_date']
+
+    def rpc_get_mail_leads(self, p_username, p_replied, p_search='', p_desc=True, p_after_time=None, p_after_id=None, p_limit=20):
+        # 空的 last_email_time 按 -infinity 排序，这里用空字符串代替 (小于任何 ISO 时间)
+        q = (p_search or '').lower()
+        rows = [r for r in self.tables['leads'] if r.get('assigned_to') == p_username and r.get('has_new_reply') is p_replied
+                and r.get('email') is not None and (not q or q in (r.get('shop_name') or '').lower() or q in r['email'].lower())]
+        key = lambda r: (r.get('last_email_time') or '', r['id'])
+        if p_after_id is not None:
+            after = (p_after_time or '', p_after_id)
+            rows = [r for r in rows if (key(r) < after if p_desc else key(r) > after)]
+        return [dict(r) for r in sorted(rows, key=key, reverse=p_desc)[:p_limit]]
+
+    def rpc_get_user_daily_stats(self, p_username, p_start, p_end):
+        days = {}
+        for r in self.tables['leads']:
+            if r.get('assigned_to') != p_username: continue
+            for col, key in (('assigned_at', 'claimed'), ('completed_at', 'done')):
+                d = _day(r.get(col))
+                if d and p_start <= d <= p_end: days.setdefault(d, {'day': d, 'claimed': 0, 'done': 0})[key] += 1
+        return sorted(days.values(), key=lambda x: x['day'], reverse=True)
+
+    def rpc_get_user_history_stats(self, p_username, p_limit=0, p_offset=0):
+        mine = [r for r in self.tables['leads'] if r.get('assigned_to') == p_username]
+        done = [r for r in mine if r.get('is_contacted')]
+        done.sort(key=lambda r: r.get('completed_at') or '', reverse=True)
+        history = [{k: r.get(k) for k in ('shop_name', 'phone', 'shop_link', 'completed_at')} for r in done[p_offset:p_offset + p_limit]] if p_limit else []
+        return {'total_claimed': len(mine), 'total_done': len(done), 'history': history}
+
+    def rpc_get_team_leaderboard(self):
+        out = []
+        for u in self.tables['users']:
+            if u.get('role') == 'admin': continue
+            mine = [r for r in self.tables['leads'] if r.get('assigned_to') == u['username']]
+            out.append({'username': u['username'], 'real_name': u.get('real_name'), 'points': u.get('points') or 0,
+                        'total_claimed': len(mine), 'total_done': sum(1 for r in mine if r.get('is_contacted'))})
+        return sorted(out, key=lambda x: (x['total_done'], x['total_claimed']), reverse=True)
+
+    def rpc_get_activity_rollup(self, p_start, p_end):
+        agg = {}
+        for r in self.tables['daily_activity']:
+            if p_start <= r['day'] <= p_end and r['username'] != 'admin':
+                a = agg.setdefault(r['username'], {'username': r['username'], 'claimed': 0, 'done': 0})
+                a['claimed'] += r['claimed']; a['done'] += r['done']
+        return sorted(agg.values(), key=lambda x: (x['done'], x['claimed']), reverse=True)
+
+    def call(self, fn, params):
+        method = getattr(self, f"rpc_{fn}", None)
+        if method is None: raise KeyError(fn)
+        with self.lock: return method(**(params or {}))
+
+
+def _project(rows, select):
+    if not select or select == '*': return [dict(r) for r in rows]
+    cols = [c.strip() for c in select.split(',')]
+    return [{c: r.get(c) for c in cols} for r in rows]
+
+def _order(rows, spec):
+    for part in reversed(spec.split(',')):
+        bits = part.split('.')
+        col, desc = bits[0], 'desc' in bits[1:]
+        nulls_first = 'nullsfirst' in bits[1:] or ('nullslast' not in bits[1:] and desc)
+        present = sorted([r for r in rows if r.get(col) is not None], key=lambda r: r[col], reverse=desc)
+        missing = [r for r in rows if r.get(col) is None]
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+class PostgRESTHandler(JSONHandler):
+    def _route(self):
+        parts = urlsplit(self.path)
+        segs = parts.path.strip('/').split('/')
+        params = parse_qsl(parts.query, keep_blank_values=True)
+        return segs, params
+
+    def _begin(self):
+        self.server.store.requests += 1
+        if self.server.latency_ms: time.sleep(self.server.latency_ms / 1000)
+
+    def _reply_rows(self, rows, params, total=None):
+        prefer = self.headers.get('Prefer') or ''
+        opts = dict(params)
+        headers = {}
+        if 'count=exact' in prefer:
+            total = len(rows) if total is None else total
+        rows = _project(rows, opts.get('select'))
+        if 'vnd.pgrst.object' in (self.headers.get('Accept') or ''):
+            if len(rows) != 1: return self.send_json(406, {'message': 'JSON object requested, multiple (or no) rows returned', 'code': 'PGRST116'})
+            return self.send_json(200, rows[0])
+        if total is not None: headers['Content-Range'] = f"0-{max(len(rows) - 1, 0)}/{total}"
+        self.send_json(200, rows, headers)
+
+    def do_GET(self):
+        self._begin()
+        segs, params = self._route()
+        table = segs[-1]
+        store = self.server.store
+        filters = [(k, v) for k, v in params if k not in RESERVED]
+        opts = {}
+        for k, v in params: opts[k] = v  # limit 可能重复出现，取最后一个
+        with store.lock:
+            rows = store.select(table, filters)
+            total = len(rows)
+            if 'order' in opts: rows = _order(rows, opts['order'])
+            offset = int(opts.get('offset') or 0)
+            rows = rows[offset:offset + int(opts['limit'])] if 'limit' in opts else rows[offset:]
+            self._reply_rows(rows, params, total)
+
+    def do_POST(self):
+        self._begin()
+        segs, params = self._route()
+        store = self.server.store
+        body = self.read_json()
+        if len(segs) >= 2 and segs[-2] == 'rpc':
+            try: return self.send_json(200, store.call(segs[-1], body))
+            except KeyError: return self.send_json(404, {'message': f"function {segs[-1]} not found", 'code': 'PGRST202'})
+        table = segs[-1]
+        rows = body if isinstance(body, list) else [body]
+        prefer = self.headers.get('Prefer') or ''
+        if 'merge-duplicates' in prefer:
+            key = dict(params).get('on_conflict') or UNIQUE.get(table, 'id')
+            out = store.upsert(table, rows, key)
+        else:
+            key = UNIQUE.get(table)
+            if key:
+                with store.lock:
+                    existing = {r.get(key) for r in store.tables[table]}
+                    if any(r.get(key) in existing for r in rows):
+                        return self.send_json(409, {'message': 'duplicate key value violates unique constraint', 'code': '23505'})
+            out = store.insert_many(table, rows)
+        self.send_json(201, _project(out, None))
+
+    def do_PATCH(self):
+        self._begin()
+        segs, params = self._route()
+        filters = [(k, v) for k, v in params if k not in RESERVED]
+        out = self.server.store.update(segs[-1], filters, self.read_json() or {})
+        self.send_json(200, _project(out, None))
+
+    def do_DELETE(self):
+        self._begin()
+        segs, params = self._route()
+        self.read_body()
+        filters = [(k, v) for k, v in params if k not in RESERVED]
+        self.send_json(200, _project(self.server.store.delete(segs[-1], filters), None))
+
+
+def start_postgrest(latency_ms=10, seed=None):
+    """返回 (Store, base_url)；seed 为 {表名: [行]} 时预先写入"""
+    store = Store()
+    for table, rows in (seed or {}).items(): store.insert_many(table, rows)
+    server, url = serve_http(PostgRESTHandler, store=store, latency_ms=latency_ms)
+    return store, url
@@ -0,0 +1,73 @@
+"""Supabase Realtime 替身：Phoenix 协议的 WebSocket 服务，只实现 postgres_changes。
+
+realtime-py 客户端连接 ws://127.0.0.1:port/websocket，phx_join 时带上订阅 (event / schema / table / filter)；
+内存数据库 (fake_postgrest.Store) 每次行变更都按订阅条件推送 postgres_changes 消息。
+filter 支持 col=eq.value / col=neq.value，与 Realtime 一样按新行匹配。
+"""
+import json
+import logging
+import itertools
+import threading
+from datetime import datetime, timezone
+from websockets.sync.server import serve
+
+_quiet = logging.getLogger("standins.realtime")
+_quiet.setLevel(logging.WARNING)
+
+
+def _filter_ok(spec, row):
+    if not spec: return True
+    col, _, expr = spec.partition('=')
+    op, _, value = expr.partition('.')
+    actual = '' if row.get(col) is None else str(row.get(col))
+    return actual == value if op == 'eq' else actual != value if op == 'neq' else False
+
+
+class RealtimeServer:
+    """订阅表：[(连接, 频道, 订阅条件)]；Store 的行变更回调里逐条匹配后推送"""
+
+    def __init__(self, store):
+        self.lock = threading.Lock()
+        self.subs = []
+        self.sent = 0
+        self._ids = itertools.count(1)
+        store.listeners.append(self.on_change)
+
+    def on_change(self, table, old, new):
+        kind = 'INSERT' if old is None else 'UPDATE'
+        with self.lock: subs = list(self.subs)
+        for conn, topic, b in subs:
+            if b.get('table') not in (None, '*', table) or b.get('event') not in ('*', kind) or not _filter_ok(b.get('filter'), new): continue
+            data = {'schema': 'public', 'table': table, 'commit_timestamp': datetime.now(timezone.utc).isoformat(),
+                    'type': kind, 'errors': None, 'columns': [], 'record': dict(new)}
+            if old is not None: data['old_record'] = dict(old)
+            try:
+                conn.send(json.dumps({'event': 'postgres_changes', 'topic': topic, 'ref': None, 'payload': {'ids': [b['id']], 'data': data}}, default=str))
+                self.sent += 1
+            except Exception: pass
+
+    def handle(self, conn):
+        try:
+            for raw in conn:
+                msg = json.loads(raw)
+                topic, event, ref = msg.get('topic'), msg.get('event'), msg.get('ref')
+                response = {}
+                if event == 'phx_join':
+                    bindings = [{**b, 'id': next(self._ids)} for b in (msg.get('payload') or {}).get('config', {}).get('postgres_changes', [])]
+                    with self.lock: self.subs += [(conn, topic, b) for b in bindings]
+                    response = {'postgres_changes': bindings}
+                elif event == 'phx_leave':
+                    with self.lock: self.subs = [s for s in self.subs if not (s[0] is conn and s[1] == topic)]
+                if ref is not None:
+                    conn.send(json.dumps({'event': 'phx_reply', 'topic': topic, 'ref': ref, 'payload': {'status': 'ok', 'response': response}}))
+        except Exception: pass
+        finally:
+            with self.lock: self.subs = [s for s in self.subs if s[0] is not conn]
+
+
+def start_realtime(store):
+    """启动 Realtime 替身并挂到 store 上，返回 (RealtimeServer, ws 地址)"""
+    rt = RealtimeServer(store)
+    server = serve(rt.handle, '127.0.0.1', 0, logger=_quiet)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return rt, f"ws://127.0.0.1:{server.socket.getsockname()[1]}"
@@ -0,0 +1,94 @@
+"""合成线索数据：模拟 Ozon 卖家导出表 (脏号码 / 多号码 / 邮箱混排)，以及替身数据库的初始数据。
+
+    python -m benchmarks.standins.leadgen --rows 5000 --out leads.csv
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+WORDS = ["Toy", "Home", "Auto", "Beauty", "Kids", "Sport", "Garden", "Tech", "Pet", "Style", "Mega", "Best"]
+RU_WORDS = ["Мир", "Дом", "Игрушки", "Товары", "Маркет", "Стиль", "Уют", "Сад", "Техно", "Авто"]
+DOMAINS = ["mail.ru", "yandex.ru", "gmail.com", "bk.ru", "inbox.ru"]
+
+
+def _phone(rnd):
+    """俄罗斯 / 哈萨克斯坦号码的各种常见写法"""
+    d = f"9{rnd.randint(0, 99):02d}{rnd.randint(0, 9999999):07d}"
+    return rnd.choice([
+        f"+7 ({d[:3]}) {d[3:6]}-{d[6:8]}-{d[8:]}",
+        f"8{d}",
+        f"7{d}",
+        f"8 {d[:3]} {d[3:6]} {d[6:8]} {d[8:]}",
+        f"{d}",
+        f"7{d}.0",  # Excel 浮点
+    ])
+
+
+def lead_rows(n, seed=0, email_ratio=0.6, phone_ratio=0.8):
+    """导入文件的行：链接 | 店铺名 | 电话 | 邮箱 | 备注"""
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        name = f"{rnd.choice(WORDS)}{rnd.choice(RU_WORDS)} {i}"
+        phones = [_phone(rnd) for _ in range(rnd.choice([1, 1, 1, 2]))] if rnd.random() < phone_ratio else []
+        email = f"shop{i}@{rnd.choice(DOMAINS)}" if rnd.random() < email_ratio else ""
+        rows.append({
+            "链接": f"https://www.ozon.ru/seller/{name.split()[0].lower()}-{100000 + i}/",
+            "店铺名": name,
+            "电话": ", ".join(phones),
+            "邮箱": email,
+            "备注": rnd.choice(["", "ИНН 7701234567", "ОГРН 1027700132195", "Работаем с 2019"]),
+        })
+    return rows
+
+
+def write_lead_file(path, n, seed=0):
+    import pandas as pd
+    df = pd.DataFrame(lead_rows(n, seed))
+    if path.endswith(".xlsx"): df.to_excel(path, index=False)
+    else: df.to_csv(path, index=False)
+    return path
+
+
+def seed_data(n_users=20, pool_size=2000, history_days=30, history_per_day=10, seed=0, email_config=None):
+    """替身数据库初始数据：admin + n 个业务员、公海池线索、每人 history_days 天的历史任务"""
+    rnd = random.Random(seed)
+    users = [{"username": "admin", "password": _sha("admin"), "role": "admin", "real_name": "Admin", "points": 0}]
+    for i in range(n_users):
+        name = f"rep{i:02d}"
+        users.append({"username": name, "password": _sha(name), "role": "sales", "real_name": f"Rep {i}",
+                      "points": rnd.randint(0, 2000), "daily_limit": 25,
+                      "email_config": (email_config(name) if callable(email_config) else email_config)})
+    leads = []
+    for i in range(pool_size):
+        leads.append({"shop_name": f"PoolShop {i}", "shop_link": f"https://www.ozon.ru/seller/pool-{i}/",
+                      "phone": f"79{rnd.randint(0, 999999999):09d}", "email": f"pool{i}@{rnd.choice(DOMAINS)}",
+                      "ai_message": "", "is_frozen": False})
+    today = date.today()
+    for u in users[1:]:
+        for d in range(1, history_days + 1):
+            day = (today - timedelta(days=d)).isoformat()
+            for k in range(history_per_day):
+                done = rnd.random() < 0.8
+                leads.append({"shop_name": f"Hist {u['username']} {d}-{k}", "shop_link": "", "phone": f"79{rnd.randint(0, 999999999):09d}",
+                              "email": f"h{d}{k}{u['username']}@{rnd.choice(DOMAINS)}", "assigned_to": u["username"], "assigned_at": day,
+                              "is_contacted": done, "completed_at": f"{day}T12:00:00" if done else None, "ai_message": "ok"})
+    return {"users": users, "leads": leads}
+
+
+def _sha(p):
+    import hashlib
+    return hashlib.sha256(p.encode()).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="leads.csv", help=".csv 或 .xlsx")
+    args = parser.parse_args()
+    print(write_lead_file(args.out, args.rows, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import io
+import re
+import time
+from config import CONFIG
+from utils import lazy_import
+from metrics import track
+
+pd = lazy_import("pandas")
+requests = lazy_import("requests")
+
+# ==========================================
+# CheckNumber WhatsApp 号码验证
+# ==========================================
+def process_checknumber_task(phone_list, api_key, user_id):
+    if not phone_list: return {}, "空列表", None
+    status_map = {p: 'unknown' for p in phone_list}
+    headers = {"X-API-Key": api_key}
+    try:
+        files = {'file': ('input.txt', "\n".join(phone_list), 'text/plain')}
+        with track("checknumber", "submit", size=len(files['file'][1])):
+            resp = requests.post(CONFIG["CN_BASE_URL"], headers=headers, files=files, data={'user_id': user_id}, verify=False)
+        if resp.status_code != 200: return status_map, f"API 错误: {resp.status_code}", None
+        task_id = resp.json().get("task_id")
+        for i in range(60): 
+            time.sleep(2)
+            with track("checknumber", "poll"):
+                poll = requests.get(f"{CONFIG['CN_BASE_URL']}/{task_id}", headers=headers, params={'user_id': user_id}, verify=False)
+            if poll.json().get("status") in ["exported", "completed"]:
+                result_url = poll.json().get("result_url")
+                if result_url:
+                    with track("checknumber", "result") as span:
+                        f = requests.get(result_url, verify=False)
+                        span.size = len(f.content)
+                    try: df = pd.read_excel(io.BytesIO(f.content))
+                    except: df = pd.read_csv(io.BytesIO(f.content))
+                    for _, r in df.iterrows():
+                        ws = str(r.get('whatsapp') or r.get('status') or r.get('Status') or '').lower()
+                        nm_col = next((c for c in df.columns if 'number' in c.lower() or 'phone' in c.lower()), None)
+                        if nm_col:
+                            nm = re.sub(r'\D', '', str(r[nm_col]))
+                            if any(x in ws for x in ['yes', 'valid', 'active', 'true', 'ok']): status_map[nm] = 'valid'
+                            else: status_map[nm] = 'invalid'
+                    return status_map, "成功", df
+        return status_map, "超时", None
+    except Exception as e: return status_map, str(e), None
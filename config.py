@@ -0,0 +1,35 @@
+import os
+import streamlit as st
+
+# ==========================================
+# 核心配置 & 静态资源
+# ==========================================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(BASE_DIR, "assets")
+
+CONFIG = {
+    "CN_BASE_URL": "https://api.checknumber.ai/wa/api/simple/tasks",
+    "DAILY_QUOTA": 25,
+    "LOW_STOCK_THRESHOLD": 300,
+    "POINTS_PER_TASK": 10,
+    "POINTS_WECHAT_TASK": 5,
+    "AI_MODEL": "gpt-4o" 
+}
+
+def get_secrets():
+    try:
+        return {"CN_USER": st.secrets["CN_USER_ID"], "CN_KEY": st.secrets["CN_API_KEY"], "OPENAI_KEY": st.secrets["OPENAI_KEY"]}
+    except: return {"CN_USER": "", "CN_KEY": "", "OPENAI_KEY": ""}
+
+@st.cache_resource
+def load_asset(name):
+    with open(os.path.join(ASSETS_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+@st.cache_resource
+def load_logo_b64():
+    try:
+        with open(os.path.join(BASE_DIR, "logo_b64.txt"), "r") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
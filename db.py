@@ -0,0 +1,265 @@
+import hashlib
+import concurrent.futures
+import contextvars
+import importlib.util
+import threading
+import time
+from datetime import datetime
+import streamlit as st
+from config import CONFIG
+from metrics import traced_supabase
+
+SUPABASE_INSTALLED = importlib.util.find_spec("supabase") is not None
+
+# ==========================================
+# 数据库与用户逻辑
+# ==========================================
+@st.cache_resource
+def init_supabase():
+    if not SUPABASE_INSTALLED: return None
+    try:
+        from supabase import create_client
+        url = st.secrets["SUPABASE_URL"]
+        key = st.secrets["SUPABASE_KEY"]
+        return traced_supabase(create_client(url, key))
+    except: return None
+
+class LazyClient:
+    """首次真正使用时才创建客户端；`if not supabase` 等判断照常工作"""
+    def __init__(self, factory): self._factory = factory
+    def __getattr__(self, name): return getattr(self._factory(), name)
+    def __bool__(self): return self._factory() is not None
+
+supabase = LazyClient(init_supabase)
+
+# 界面先做乐观更新，非关键的数据库写入交给后台线程，点击无需等待往返
+@st.cache_resource
+def get_write_executor():
+    return concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="db-write")
+
+def submit_write(fn, *args, **kwargs):
+    """后台执行一次数据库写入，返回 Future (调用方据此在失败时回滚乐观状态)。
+    带上当前上下文，写入耗时仍归到发起它的那次重跑"""
+    return get_write_executor().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+# PostgREST 单次响应最多返回 1000 行 (db-max-rows)，不分页的大查询会被悄悄截断
+READ_PAGE_SIZE = 1000
+
+def _keyset_after(keys, values):
+    """组合键 (k1, k2, ...) > (v1, v2, ...) 的 PostgREST or 过滤：k1 > v1，或 k1 = v1 且 k2 > v2，依此类推"""
+    def literal(v): return '"' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"'
+    terms = []
+    for i, k in enumerate(keys):
+        cond = [f"{keys[j]}.eq.{literal(values[j])}" for j in range(i)] + [f"{k}.gt.{literal(values[i])}"]
+        terms.append(cond[0] if len(cond) == 1 else f"and({','.join(cond)})")
+    return ",".join(terms)
+
+def iter_rows(table, columns, where=None, key='id', page_size=READ_PAGE_SIZE):
+    """按 key 键集分页逐页读取整张结果集 (生成器)：每页一次请求、只取 columns 列，
+    调用方边读边聚合，内存只占一页。where(query) 追加过滤条件；key 须唯一且可排序，
+    也可以是列名元组 (组合键，如 ('completed_at', 'id')，配合同序的组合索引)"""
+    if not supabase: return
+    keys = (key,) if isinstance(key, str) else tuple(key)
+    if columns != '*':
+        have = [c.strip() for c in columns.split(',')]
+        columns = ", ".join([columns] + [k for k in keys if k not in have])
+    last = None
+    while True:
+        query = supabase.table(table).select(columns)
+        if where: query = where(query)
+        if last is not None: query = query.gt(key, last) if len(keys) == 1 else query.or_(_keyset_after(keys, last))
+        for k in keys: query = query.order(k)
+        rows = query.limit(page_size).execute().data
+        yield from rows
+        if len(rows) < page_size: return
+        last = rows[-1][key] if len(keys) == 1 else [rows[-1][k] for k in keys]
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def login_user(u, p):
+    if not supabase: return None
+    pwd_hash = hash_password(p)
+    try:
+        res = supabase.table('users').select("*").eq('username', u).eq('password', pwd_hash).execute()
+        if res.data:
+            if res.data[0]['role'] != 'admin':
+                supabase.table('users').update({'last_seen': datetime.now().isoformat()}).eq('username', u).execute()
+            return res.data[0]
+        return None
+    except: return None
+
+def create_user(u, p, n, role="sales"):
+    if not supabase: return False
+    try:
+        pwd = hash_password(p)
+        supabase.table('users').insert({"username": u, "password": pwd, "role": role, "real_name": n, "points": 0, "daily_limit": CONFIG["DAILY_QUOTA"]}).execute()
+        return True
+    except: return False
+
+def update_user_profile(old_username, new_username, new_password=None, new_realname=None):
+    if not supabase: return False
+    try:
+        update_data = {}
+        if new_password: update_data['password'] = hash_password(new_password)
+        if new_realname: update_data['real_name'] = new_realname
+        if new_username and new_username != old_username:
+            update_data['username'] = new_username
+            supabase.table('users').update(update_data).eq('username', old_username).execute()
+            supabase.table('leads').update({'assigned_to': new_username}).eq('assigned_to', new_username).execute()
+            supabase.table('wechat_customers').update({'assigned_to': new_username}).eq('assigned_to', old_username).execute()
+        else:
+            supabase.table('users').update(update_data).eq('username', old_username).execute()
+        return True
+    except: return False
+
+# ==========================================
+# 积分流水 (points_ledger + RPC，见 sql/001_points_ledger.sql)
+# ==========================================
+class PointsLedger:
+    """积分记账：单次加分走原子 RPC (一次往返)，打卡连击等突发场景先入缓冲再批量刷写。
+    余额缓存在进程内，由 RPC 返回值刷新，顶部积分胶囊无需每次重跑都查库。"""
+
+    def __init__(self, db, flush_size=20, flush_interval=5.0, balance_ttl=60, max_backoff=300.0):
+        self.db = db
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.balance_ttl = balance_ttl
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+        self._failures = 0  # 连续刷写失败次数，决定重试间隔
+        self._balances = {}  # username -> (balance, ts)
+        self._inflight = {}  # username -> 进行中的请求数
+        self._overlapped = set()
+
+    def _begin(self, usernames):
+        with self._lock:
+            for u in usernames:
+                if self._inflight.get(u): self._overlapped.add(u)
+                self._inflight[u] = self._inflight.get(u, 0) + 1
+
+    def _finish(self, balances):
+        """balances: {username: 返回的余额，失败为 None}。
+        同一用户的请求有重叠时返回先后不代表落库先后，旧余额可能覆盖新余额：丢弃缓存，下次查库"""
+        with self._lock:
+            for u, balance in balances.items():
+                if u in self._overlapped: self._balances.pop(u, None)
+                elif balance is not None: self._balances[u] = (balance, time.time())
+                self._inflight[u] -= 1
+                if not self._inflight[u]:
+                    del self._inflight[u]
+                    self._overlapped.discard(u)
+
+    def add(self, username, amount, reason=None):
+        if not self.db: return None
+        self._begin([username])
+        balance = None
+        try:
+            res = self.db.rpc('add_user_points', {'p_username': username, 'p_amount': amount, 'p_reason': reason}).execute()
+            balance = res.data or 0
+            return res.data
+        except: return None
+        finally: self._finish({username: balance})
+
+    def queue(self, username, amount, reason=None):
+        with self._lock:
+            self._pending.append({"username": username, "amount": amount, "reason": reason})
+            due = len(self._pending) >= self.flush_size
+            if not due: self._arm(self.flush_interval)
+        if due: self.flush()
+
+    def _arm(self, delay):
+        """(持锁调用) 还没有定时器时安排一次刷写"""
+        if self._timer is None:
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            events, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not events or not self.db: return 0
+        balances = dict.fromkeys({e['username'] for e in events})
+        self._begin(balances)
+        try:
+            res = self.db.rpc('add_user_points_batch', {'p_events': events}).execute()
+            for row in res.data or []: balances[row['username']] = row['points']
+        except:
+            self._finish(dict.fromkeys(balances))
+            # 刷写失败时退回缓冲区，按指数退避重新安排刷写，不依赖下一次 queue() 触发
+            with self._lock:
+                self._pending = events + self._pending
+                self._failures += 1
+                self._arm(min(self.flush_interval * 2 ** self._failures, self.max_backoff))
+            return 0
+        self._finish(balances)
+        with self._lock: self._failures = 0
+        return len(events)
+
+    def pending_for(self, username):
+        with self._lock:
+            return sum(e['amount'] for e in self._pending if e['username'] == username)
+
+    def balance(self, username):
+        cached = self._balances.get(username)
+        if not cached or time.time() - cached[1] > self.balance_ttl:
+            if not self.db: return 0
+            self._begin([username])
+            balance = None
+            try:
+                res = self.db.table('users').select('points').eq('username', username).single().execute()
+                balance = res.data.get('points') or 0
+            except: pass
+            finally: self._finish({username: balance})
+            if balance is None: return self.pending_for(username)
+            cached = self._balances.get(username, (balance, 0))
+        return cached[0] + self.pending_for(username)
+
+@st.cache_resource
+def get_points_ledger():
+    return PointsLedger(supabase)
+
+points_ledger = get_points_ledger()
+
+def add_user_points(username, amount, reason=None, batched=False):
+    if not supabase: return
+    if batched: points_ledger.queue(username, amount, reason)
+    else: points_ledger.add(username, amount, reason)
+
+def get_user_points(username):
+    if not supabase: return 0
+    return points_ledger.balance(username)
+
+def get_user_limit(username):
+    if not supabase: return CONFIG["DAILY_QUOTA"]
+    try:
+        res = supabase.table('users').select('daily_limit').eq('username', username).single().execute()
+        return res.data.get('daily_limit') or CONFIG["DAILY_QUOTA"]
+    except: return CONFIG["DAILY_QUOTA"]
+
+def update_user_limit(username, new_limit):
+    if not supabase: return False
+    try:
+        supabase.table('users').update({'daily_limit': new_limit}).eq('username', username).execute()
+        return True
+    except: return False
+
+# 邮箱配置相关
+def get_user_email_config(username):
+    if not supabase: return None
+    try:
+        res = supabase.table('users').select('email_config').eq('username', username).single().execute()
+        return res.data.get('email_config')
+    except: return None
+
+def update_user_email_config(username, config_dict):
+    if not supabase: return False
+    try:
+        supabase.table('users').update({'email_config': config_dict}).eq('username', username).execute()
+        return True
+    except: return False
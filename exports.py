@@ -0,0 +1,119 @@
+import os
+import csv
+import time
+import tempfile
+from datetime import date, timedelta
+from db import supabase, iter_rows
+
+try:
+    import xlsxwriter
+    XLSXWRITER_INSTALLED = True
+except ImportError:
+    XLSXWRITER_INSTALLED = False
+
+# ==========================================
+# 批量导出 (线索 / 完成记录 / 业务员统计)
+# 数据按 db.iter_rows 键集分页逐页读取，边读边写入临时文件：xlsx 用 xlsxwriter constant_memory 模式逐行落盘，
+# CSV 直接写文件；进程内只占一页数据。下载按钮点击时才读取生成好的文件
+# ==========================================
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "988_exports")
+EXPORT_TTL = 86400             # 导出文件保留时间 (秒)
+XLSX_MAX_ROWS = 1048575        # Excel 单表行数上限 (不含表头)，超出后续写到下一张表
+EXPORT_FORMATS = ["xlsx", "csv"] if XLSXWRITER_INSTALLED else ["csv"]
+MIME_TYPES = {"xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "csv": "text/csv"}
+
+LEAD_COLUMNS = [('id', 'ID'), ('shop_name', '店铺名'), ('shop_link', '店铺链接'), ('phone', '电话'), ('email', '邮箱'),
+                ('assigned_to', '业务员'), ('assigned_at', '领取日期'), ('is_contacted', '已联系'), ('completed_at', '完成时间'),
+                ('is_frozen', '冻结'), ('retry_count', '重试次数')]
+COMPLETION_COLUMNS = [('id', 'ID'), ('assigned_to', '业务员'), ('shop_name', '店铺名'), ('phone', '电话'), ('email', '邮箱'),
+                      ('assigned_at', '领取日期'), ('completed_at', '完成时间')]
+REP_STAT_COLUMNS = [('username', '账号'), ('real_name', '姓名'), ('claimed', '区间领取'), ('done', '区间完成'), ('rate', '完成率'),
+                    ('points', '积分'), ('total_claimed', '累计领取'), ('total_done', '累计完成')]
+
+
+def _select(columns):
+    return ", ".join(c for c, _ in columns)
+
+
+def lead_rows(assigned_to=None):
+    """全部线索，给出 assigned_to 时只导出该业务员名下的"""
+    return iter_rows('leads', _select(LEAD_COLUMNS), (lambda q: q.eq('assigned_to', assigned_to)) if assigned_to else None)
+
+
+def completion_rows(start, end):
+    """[start, end] 日期内完成的线索，按 (completed_at, id) 分页走 sql/011 的索引"""
+    next_day = (date.fromisoformat(end) + timedelta(days=1)).isoformat()
+    return iter_rows('leads', _select(COMPLETION_COLUMNS), lambda q: q.gte('completed_at', start).lt('completed_at', next_day),
+                     key=('completed_at', 'id'))
+
+
+def rep_stat_rows(start, end):
+    """每个业务员一行：区间领取 / 完成 (daily_activity 汇总) + 积分与累计数据 (排行榜)"""
+    if not supabase: return
+    rollup = {r['username']: r for r in supabase.rpc('get_activity_rollup', {'p_start': start, 'p_end': end}).execute().data or []}
+    for rep in supabase.rpc('get_team_leaderboard', {}).execute().data or []:
+        r = rollup.get(rep['username'], {})
+        claimed, done = r.get('claimed', 0), r.get('done', 0)
+        yield {**rep, 'claimed': claimed, 'done': done, 'rate': round(done / claimed, 3) if claimed else None}
+
+
+def _prune_exports():
+    cutoff = time.time() - EXPORT_TTL
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff: os.remove(path)
+        except OSError: pass
+
+
+def write_export(title, columns, rows, fmt="xlsx", on_progress=None, progress_every=10000):
+    """把 rows (逐行产出的 dict) 写入临时文件，返回 {'path', 'file_name', 'mime', 'rows'}。
+    columns 为 [(字段, 表头)]；on_progress(已写行数) 每 progress_every 行回调一次"""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _prune_exports()
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=f".{fmt}", dir=EXPORT_DIR)
+    os.close(fd)
+    keys, header = [c for c, _ in columns], [h for _, h in columns]
+    n = 0
+    try:
+        if fmt == "csv":
+            # utf-8-sig：Excel 直接打开不乱码
+            with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                for row in rows:
+                    writer.writerow([row.get(k) for k in keys])
+                    n += 1
+                    if on_progress and n % progress_every == 0: on_progress(n)
+        else:
+            workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'strings_to_urls': False})
+            sheet, r = None, 0
+            for row in rows:
+                if sheet is None or r > XLSX_MAX_ROWS:
+                    sheet = workbook.add_worksheet(title if sheet is None else f"{title} {len(workbook.worksheets()) + 1}")
+                    sheet.write_row(0, 0, header)
+                    r = 1
+                sheet.write_row(r, 0, [row.get(k) for k in keys])
+                r += 1
+                n += 1
+                if on_progress and n % progress_every == 0: on_progress(n)
+            if sheet is None: workbook.add_worksheet(title).write_row(0, 0, header)
+            workbook.close()
+    except BaseException:
+        # 读库或写文件中途出错时不留下半成品文件
+        discard_export({'path': path})
+        raise
+    return {'path': path, 'file_name': f"{title}_{date.today().isoformat()}.{fmt}", 'mime': MIME_TYPES[fmt], 'rows': n}
+
+
+def export_reader(path):
+    """下载按钮的延迟数据：点击下载时才读取文件"""
+    def read():
+        with open(path, 'rb') as f: return f.read()
+    return read
+
+
+def discard_export(export):
+    if export:
+        try: os.remove(export['path'])
+        except OSError: pass
@@ -0,0 +1,105 @@
+import concurrent.futures
+import threading
+import time
+from datetime import datetime
+import streamlit as st
+from config import CONFIG
+from db import supabase
+from ai import get_openai_client
+from utils import lazy_import
+
+requests = lazy_import("requests")
+
+# ==========================================
+# 系统健康监控
+# ==========================================
+def _probe_supabase():
+    if not supabase: raise Exception("未连接")
+    supabase.table('users').select('username').limit(1).execute()
+
+def _probe_checknumber(cn_user, cn_key):
+    resp = requests.get(CONFIG["CN_BASE_URL"], headers={"X-API-Key": cn_key}, params={'user_id': cn_user}, timeout=5, verify=False)
+    if resp.status_code not in [200, 400, 404, 405]: raise Exception(str(resp.status_code))
+
+def _probe_openai(client):
+    if not client: raise Exception("格式错误")
+    # models.retrieve 不消耗 token
+    client.models.retrieve(CONFIG["AI_MODEL"])
+
+def check_api_health(cn_user, cn_key, openai_key, openai_client=None):
+    """并发探测三个外部依赖，返回状态、诊断信息和各自延迟 (ms)"""
+    status = {"supabase": False, "checknumber": False, "openai": False, "msg": [], "latency": {}}
+    if openai_client is None and openai_key and "sk-" in openai_key:
+        openai_client = get_openai_client(openai_key, timeout=5, max_retries=0)
+    probes = {
+        "supabase": (_probe_supabase, ()),
+        "checknumber": (_probe_checknumber, (cn_user, cn_key)),
+        "openai": (_probe_openai, (openai_client,)),
+    }
+    labels = {"supabase": "Supabase", "checknumber": "CheckNumber", "openai": "OpenAI"}
+
+    def timed(fn, args):
+        t0 = time.perf_counter()
+        try:
+            fn(*args)
+            return None, (time.perf_counter() - t0) * 1000
+        except Exception as e: return str(e), (time.perf_counter() - t0) * 1000
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(probes)) as executor:
+        futures = {name: executor.submit(timed, fn, args) for name, (fn, args) in probes.items()}
+        for name, fut in futures.items():
+            err, ms = fut.result()
+            status["latency"][name] = round(ms, 1)
+            if err is None: status[name] = True
+            else: status["msg"].append(f"{labels[name]}: {err}")
+    return status
+
+class HealthMonitor:
+    """系统健康监控：结果按 TTL 缓存，过期后由后台线程刷新，页面直接读取最近一次结果"""
+
+    def __init__(self, ttl=60, history_size=60):
+        self.ttl = ttl
+        self.history_size = history_size
+        self._lock = threading.Lock()
+        self._status = None
+        self._checked_at = 0
+        self._refreshing = False
+        self._clients = {}
+        self.history = []  # [{"time": ..., "supabase": ms, ...}]
+
+    def _client(self, openai_key):
+        if not openai_key or "sk-" not in openai_key: return None
+        if openai_key not in self._clients:
+            self._clients[openai_key] = get_openai_client(openai_key, timeout=5, max_retries=0)
+        return self._clients[openai_key]
+
+    def refresh(self, cn_user, cn_key, openai_key, claimed=False):
+        """立即检测一次；claimed 表示调用方已置好 _refreshing (后台刷新)。
+        只有置起标记的那次调用负责清除，手动检测与后台刷新重叠时不会提前放行新的后台刷新"""
+        with self._lock:
+            owner = claimed or not self._refreshing
+            self._refreshing = True
+        try:
+            status = check_api_health(cn_user, cn_key, openai_key, self._client(openai_key))
+            with self._lock:
+                self._status = status
+                self._checked_at = time.time()
+                self.history.append({"time": datetime.now(), **status["latency"]})
+                del self.history[:-self.history_size]
+        finally:
+            if owner:
+                with self._lock: self._refreshing = False
+        return status
+
+    def snapshot(self, cn_user, cn_key, openai_key):
+        """返回 (最近一次结果或 None, 检测时间戳)；过期时触发后台刷新"""
+        with self._lock:
+            stale = time.time() - self._checked_at > self.ttl
+            if stale and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self.refresh, args=(cn_user, cn_key, openai_key, True), daemon=True).start()
+            return self._status, self._checked_at
+
+@st.cache_resource
+def get_health_monitor():
+    return HealthMonitor()
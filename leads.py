@@ -0,0 +1,437 @@
+import time
+import heapq
+import threading
+import contextvars
+import concurrent.futures
+from itertools import islice
+from datetime import date, datetime, timedelta
+import streamlit as st
+from config import CONFIG
+from db import supabase, add_user_points, get_user_limit, iter_rows
+from ai import get_ai_message_sniper
+from phones import row_texts, first_numbers
+from checknumber import process_checknumber_task
+from metrics import begin_run, end_run
+from utils import lazy_import
+
+pd = lazy_import("pandas")
+
+# ==========================================
+# 线索 / 微信客户 / 统计
+# ==========================================
+def generate_and_update_task(lead, client, rep_name):
+    try:
+        msg = get_ai_message_sniper(client, lead['shop_name'], lead['shop_link'], rep_name)
+        supabase.table('leads').update({'ai_message': msg}).eq('id', lead['id']).execute()
+        return True
+    except: return False
+
+def get_wechat_tasks(username, after=None, limit=10):
+    """到期微信维护任务的一页 (sql/009_wechat_schedule.sql)，最早到期的在前。
+    按 next_contact_date + id 键集分页：after 为上一页最后一行的 (next_contact_date, id)，None 表示第一页"""
+    if not supabase: return []
+    params = {'p_username': username, 'p_day': date.today().isoformat(),
+              'p_after_date': after[0] if after else None, 'p_after_id': after[1] if after else None, 'p_limit': limit}
+    try: return supabase.rpc('get_wechat_tasks', params).execute().data or []
+    except: return []
+
+def complete_wechat_task(task_id, username):
+    """打卡：下次联系日期由服务端在周期窗口内挑该业务员任务最少的一天"""
+    if not supabase: return
+    try:
+        supabase.rpc('complete_wechat_contact', {'p_id': task_id, 'p_day': date.today().isoformat()}).execute()
+        add_user_points(username, CONFIG["POINTS_WECHAT_TASK"], reason="wechat_task", batched=True)
+    except: pass
+
+class WechatScheduler:
+    """导入时的负载均衡排期：每个新客户排到自己周期窗口 [start, start + cycle_days) 内该业务员任务最少的一天
+    (相同时取较早的一天)。各业务员每天已排的任务数按需从库里读 (sql/009_wechat_schedule.sql)，块内在内存里累加；
+    只对新客户调用 spread (已有客户由 RPC 保留原排期)。每块 upsert 之后 forget 这些业务员，下一块重新读库，
+    写入失败或并发导入时不会把块内的估算带到后面的块"""
+
+    def __init__(self, start):
+        self.start = start
+        self.load = {}     # (业务员, 距 start 的天数) -> 任务数
+        self.horizon = {}  # 业务员 -> 已读到第几天
+
+    def _fetch(self, users, days):
+        need = {}
+        for user in users:
+            have = self.horizon.get(user, 0)
+            if have < days: need.setdefault(have, []).append(user)
+        for have, group in need.items():
+            res = supabase.rpc('get_wechat_load', {'p_users': group, 'p_start': (self.start + timedelta(days=have)).isoformat(),
+                                                   'p_end': (self.start + timedelta(days=days)).isoformat()}).execute().data or []
+            for r in res:
+                k = (r['assigned_to'], (date.fromisoformat(r['day']) - self.start).days)
+                self.load[k] = self.load.get(k, 0) + r['n']
+            for user in group: self.horizon[user] = days
+
+    def forget(self, users):
+        """丢弃这些业务员的负载缓存，下次 spread 时重新读库"""
+        users = set(users)
+        self.load = {k: n for k, n in self.load.items() if k[0] not in users}
+        for user in users: self.horizon.pop(user, None)
+
+    def spread(self, rows):
+        """返回与 rows 对齐的 next_contact_date 列；同一业务员同一周期的客户共用一个小顶堆"""
+        self._fetch(rows['assigned_to'].unique().tolist(), int(rows['cycle_days'].max()))
+        offsets = pd.Series(0, index=rows.index)
+        for (user, cycle), idx in rows.groupby(['assigned_to', 'cycle_days']).groups.items():
+            heap = [(self.load.get((user, k), 0), k) for k in range(cycle)]
+            heapq.heapify(heap)
+            picked = []
+            for _ in range(len(idx)):
+                n, k = heapq.heappop(heap)
+                picked.append(k)
+                heapq.heappush(heap, (n + 1, k))
+            offsets[idx] = picked
+            for k in picked: self.load[(user, k)] = self.load.get((user, k), 0) + 1
+        return (pd.Timestamp(self.start) + pd.to_timedelta(offsets, unit='D')).dt.strftime('%Y-%m-%d')
+
+WECHAT_CHUNK = 1000
+
+def existing_wechat_codes(codes, chunk_size=500):
+    """库里已有的客户编号 (分批 in 查询)"""
+    existing = set()
+    for i in range(0, len(codes), chunk_size):
+        res = supabase.table('wechat_customers').select('customer_code').in_('customer_code', codes[i:i + chunk_size]).execute()
+        existing.update(r['customer_code'] for r in res.data)
+    return existing
+
+def build_wechat_rows(df):
+    """向量化清洗微信客户表 (客户编号 | 业务员 | 周期)：整列转换类型，不逐行处理。
+    返回 (有效行 DataFrame, 拒绝行 DataFrame[row, customer_code, reason])，row 为文件中的行号"""
+    def col(name): return df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+    # Excel 里的纯数字编号会读成浮点数 (1001.0)
+    code = col('客户编号').astype('string').str.strip().str.replace(r'\.0$', '', regex=True)
+    user = col('业务员').astype('string').str.strip().replace('', pd.NA).fillna('admin')
+    raw_cycle = col('周期')
+    blank = raw_cycle.isna() | (raw_cycle.astype('string').str.strip() == '')
+    cycle = pd.to_numeric(raw_cycle, errors='coerce').mask(blank, 7)
+
+    reason = pd.Series(pd.NA, index=df.index, dtype='string')
+    reason = reason.mask(~((cycle > 0) & (cycle % 1 == 0)), '周期无效')
+    reason = reason.mask(code.isna() | (code == ''), '缺少客户编号')
+    # 同一块内编号重复时以最后一行为准 (同一条语句里不能两次更新同一行)
+    kept = code.where(reason.isna())
+    reason = reason.mask(kept.notna() & kept.duplicated(keep='last'), '文件内重复 (以最后一行为准)')
+
+    ok = reason.isna()
+    rows = pd.DataFrame({'customer_code': code[ok], 'assigned_to': user[ok], 'cycle_days': cycle[ok].astype(int)})
+    rejected = pd.DataFrame({'row': df.index[~ok] + 2, 'customer_code': code[~ok], 'reason': reason[~ok]})
+    return rows, rejected
+
+def admin_import_wechat_customers(data, chunk_size=WECHAT_CHUNK, on_chunk=None):
+    """微信客户导入：每 chunk_size 行清洗一次、排好首次联系日期，按 customer_code upsert (RPC 见 sql/008、sql/009)。
+    data 为 DataFrame，或逐块产出 DataFrame 的迭代器 (read_csv(chunksize=...))，内存只占一块。
+    返回每块的报告 [{'chunk', 'inserted', 'updated', 'rejected', 'errors'}]，某一块失败不影响其余块；
+    on_chunk(报告) 用于页面显示进度"""
+    reports = []
+    if not supabase: return reports
+    today = date.today()
+    scheduler = WechatScheduler(today)
+    for frame in ([data] if isinstance(data, pd.DataFrame) else data):
+        for start in range(0, len(frame), chunk_size):
+            rows, rejected = build_wechat_rows(frame.iloc[start:start + chunk_size])
+            report = {'chunk': len(reports) + 1, 'inserted': 0, 'updated': 0, 'rejected': len(rejected), 'errors': rejected.to_dict('records')}
+            if len(rows):
+                try:
+                    # 只给新客户排首次联系日期，分散到各自周期内；已有客户不占名额，由 RPC 保留原排期
+                    new = ~rows['customer_code'].isin(existing_wechat_codes(rows['customer_code'].tolist()))
+                    rows['next_contact_date'] = today.isoformat()  # 已有客户的这一列 RPC 不会写入
+                    if new.any(): rows.loc[new, 'next_contact_date'] = scheduler.spread(rows[new])
+                    res = supabase.rpc('upsert_wechat_customers', {'p_rows': rows.to_dict('records'), 'p_day': today.isoformat()}).execute().data or {}
+                    report['inserted'], report['updated'] = res.get('inserted', 0), res.get('updated', 0)
+                except Exception as e:
+                    report['rejected'] += len(rows)
+                    report['errors'].append({'row': None, 'customer_code': None, 'reason': f"第 {report['chunk']} 块写入失败: {e}"})
+                # 块内估算的负载以库里为准 (写入失败 / 其他导入同时写入)
+                scheduler.forget(rows['assigned_to'].unique())
+            reports.append(report)
+            if on_chunk: on_chunk(report)
+    return reports
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_user_daily_performance(username, days=14):
+    if not supabase: return pd.DataFrame()
+    end = date.today()
+    start = end - timedelta(days=days - 1)
+    try:
+        res = supabase.rpc('get_user_daily_stats', {'p_username': username, 'p_start': start.isoformat(), 'p_end': end.isoformat()}).execute()
+        df = pd.DataFrame(res.data)
+        if df.empty: return pd.DataFrame()
+        df['day'] = pd.to_datetime(df['day']).dt.date
+        stats = df.set_index('day').rename(columns={'claimed': '领取量', 'done': '完成量'})
+        return stats[['领取量', '完成量']].sort_index(ascending=False)
+    except: return pd.DataFrame()
+
+def get_user_historical_data(username, history_page=None, page_size=50):
+    """累计领取/完成 + 可选的一页完成记录 (history_page 从 1 开始，None 时不取明细)"""
+    if not supabase: return 0, 0, pd.DataFrame()
+    limit = page_size if history_page else 0
+    offset = (history_page - 1) * page_size if history_page else 0
+    try:
+        res = supabase.rpc('get_user_history_stats', {'p_username': username, 'p_limit': limit, 'p_offset': offset}).execute()
+        data = res.data or {}
+        return data.get('total_claimed', 0), data.get('total_done', 0), pd.DataFrame(data.get('history') or [])
+    except: return 0, 0, pd.DataFrame()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_team_leaderboard():
+    if not supabase: return pd.DataFrame()
+    try:
+        res = supabase.rpc('get_team_leaderboard', {}).execute()
+        return pd.DataFrame(res.data)
+    except: return pd.DataFrame()
+
+def get_public_pool_count():
+    if not supabase: return 0
+    try:
+        # 只要总数：count=exact 由服务端计数，limit(1) 避免把 id 列表也传回来
+        res = supabase.table('leads').select('id', count='exact').is_('assigned_to', 'null').limit(1).execute()
+        return res.count
+    except: return 0
+
+def get_frozen_leads_count(preview=200):
+    """冻结任务总数 (服务端计数，不受单次返回行数上限影响) + 前 preview 条明细"""
+    if not supabase: return 0, []
+    try:
+        res = supabase.table('leads').select('id', count='exact').eq('is_frozen', True).limit(1).execute()
+        rows = list(islice(iter_rows('leads', 'id, shop_name, error_log, retry_count', lambda q: q.eq('is_frozen', True), page_size=preview), preview))
+        return res.count or 0, rows
+    except: return 0, []
+
+RECYCLE_BATCH = 500
+
+def recycle_expired_tasks(batch_size=RECYCLE_BATCH, max_batches=200):
+    """分批回收过期任务并清理公海池残留话术 (RPC 见 sql/007_recycle_expired_leads.sql)。
+    每批只回传计数，返回 {'recycled', 'cleared', 'batches'}；数据库异常向上抛出"""
+    totals = {'recycled': 0, 'cleared': 0, 'batches': 0}
+    if not supabase: return totals
+    today_str = date.today().isoformat()
+    while totals['batches'] < max_batches:
+        res = supabase.rpc('recycle_expired_leads', {'p_day': today_str, 'p_batch': batch_size}).execute().data or {}
+        totals['batches'] += 1
+        totals['recycled'] += res.get('recycled', 0)
+        totals['cleared'] += res.get('cleared', 0)
+        if res.get('recycled', 0) < batch_size and res.get('cleared', 0) < batch_size: break
+    return totals
+
+class LeadRecycler:
+    """过期任务后台回收：守护线程每 interval 秒跑一次，并在每天零点刚过时额外跑一次，
+    赶在早上领取高峰前把昨天没做的任务退回公海池。页面按钮可立即触发；
+    每次运行记一条历史 (回收数 / 清理数 / 批次 / 运行后库存)，并作为一次重跑计入埋点"""
+
+    def __init__(self, interval=1800, history_size=48):
+        self.interval = interval
+        self.history_size = history_size
+        self._lock = threading.Lock()
+        self._thread = None
+        self.history = []
+
+    def _run(self, trigger):
+        run = begin_run("system", "回收过期任务")
+        entry = {"time": datetime.now(), "trigger": trigger, "recycled": 0, "cleared": 0, "batches": 0, "pool": None, "error": None}
+        # 定时与手动触发不并发执行
+        with self._lock:
+            try:
+                entry.update(recycle_expired_tasks())
+                entry["pool"] = get_public_pool_count()
+            except Exception as e: entry["error"] = str(e)
+        entry["ms"] = round((time.perf_counter() - run['t0']) * 1000, 1)
+        end_run(run)
+        self.history.append(entry)
+        del self.history[:-self.history_size]
+        return entry
+
+    def run(self, trigger="定时"):
+        # 在独立上下文中运行，页面上手动触发时不会把后续调用算到这次回收名下
+        return contextvars.copy_context().run(self._run, trigger)
+
+    def _next_delay(self):
+        now = datetime.now()
+        past_midnight = (datetime.combine(now.date() + timedelta(days=1), datetime.min.time()) - now).total_seconds() + 60
+        return min(self.interval, past_midnight)
+
+    def _loop(self):
+        while True:
+            self.run()
+            time.sleep(self._next_delay())
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="lead-recycler", daemon=True)
+            self._thread.start()
+        return self
+
+@st.cache_resource
+def get_lead_recycler():
+    return LeadRecycler().start()
+
+def delete_user_and_recycle(username):
+    if not supabase: return False
+    try:
+        supabase.table('leads').update({'assigned_to': None, 'assigned_at': None, 'is_contacted': False, 'ai_message': None}).eq('assigned_to', username).eq('is_contacted', False).execute()
+        supabase.table('wechat_customers').update({'assigned_to': None}).eq('assigned_to', username).execute()
+        supabase.table('users').delete().eq('username', username).execute()
+        return True
+    except: return False
+
+def admin_bulk_upload_to_pool(rows_to_insert):
+    if not supabase or not rows_to_insert: return 0, "No data"
+    success_count = 0
+    try:
+        incoming = [str(r['phone']) for r in rows_to_insert if r['phone']]
+        existing = set()
+        chunk_size = 500
+        
+        if incoming:
+            for i in range(0, len(incoming), chunk_size):
+                batch = incoming[i:i+chunk_size]
+                res = supabase.table('leads').select('phone').in_('phone', batch).execute()
+                for item in res.data: existing.add(str(item['phone']))
+        
+        # 允许入库：如果手机号不存在 或者 只有邮箱
+        final_rows = [r for r in rows_to_insert if (not r['phone']) or (str(r['phone']) not in existing)]
+        
+        if not final_rows: return 0, "重复数据"
+        
+        for row in final_rows: row['username'] = st.session_state.get('username', 'admin')
+        response = supabase.table('leads').insert(final_rows).execute()
+        return len(response.data), "Success"
+    except Exception as e:
+        for row in final_rows:
+            try:
+                row['username'] = st.session_state.get('username', 'admin')
+                supabase.table('leads').insert(row).execute()
+                success_count += 1
+            except: pass
+        return success_count, str(e)
+
+EMAIL_PATTERN = r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
+
+def import_lead_file(df, verify=True, cn_key="", cn_user="", batch_size=100, on_batch=None):
+    """导入文件逐行清洗 (邮箱 / 号码 / 店铺名)，可选 CheckNumber 验证，每 batch_size 行入库一次。
+    on_batch(入库数, 是否最后一批) 用于页面显示进度；返回入库总数"""
+    total = 0
+    rows = []
+    # 整表一次性提取：每行拼成文本，邮箱 / 号码 (phones 统一规则) 按列向量化取第一个
+    texts = row_texts(df)
+    all_emails = texts.str.extract(EMAIL_PATTERN, expand=False)
+    all_phones = first_numbers(texts)
+    links = df.iloc[:, 0].map(str) if df.shape[1] > 0 else pd.Series('', index=df.index)
+    names = df.iloc[:, 1].map(str) if df.shape[1] > 1 else pd.Series('Shop', index=df.index)
+    for email, phone, shop_link, shop_name in zip(all_emails, all_phones, links, names):
+        email = email if isinstance(email, str) else None
+        if email or phone:
+            if phone and verify:
+                res, _, _ = process_checknumber_task([phone], cn_key, cn_user)
+                if res.get(phone) != 'valid': phone = None
+
+            if not email and not phone: continue
+
+            rows.append({
+                "email": email,
+                "phone": phone,
+                "shop_name": shop_name,  # 智能提取店铺名 (Col 1)
+                "shop_link": shop_link,
+                "ai_message": "",
+                "retry_count": 0,
+                "is_frozen": False
+            })
+
+            if len(rows) >= batch_size:
+                count, _ = admin_bulk_upload_to_pool(rows)
+                total += count
+                if on_batch: on_batch(count, False)
+                rows = []
+
+    if rows:
+        count, _ = admin_bulk_upload_to_pool(rows)
+        total += count
+        if on_batch: on_batch(count, True)
+    return total
+
+def claim_daily_tasks(username, client):
+    today_str = date.today().isoformat()
+    existing = supabase.table('leads').select("*").eq('assigned_to', username).eq('assigned_at', today_str).execute().data
+    current_count = len(existing)
+    user_max_limit = get_user_limit(username)
+    if current_count >= user_max_limit: return existing, "full"
+    
+    needed = user_max_limit - current_count
+    # 原子领取 (sql/005_claim_pool_leads.sql)：多人同时领取时各自拿到不同的线索，不会互相覆盖
+    fresh_tasks = supabase.rpc('claim_pool_leads', {'p_username': username, 'p_limit': needed, 'p_day': today_str}).execute().data
+
+    if fresh_tasks:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+            # 带上当前上下文，文案生成的外部调用计入本次重跑 (metrics)
+            futures = [executor.submit(contextvars.copy_context().run, generate_and_update_task, task, client, username) for task in fresh_tasks]
+            concurrent.futures.wait(futures)
+        return supabase.table('leads').select("*").eq('assigned_to', username).eq('assigned_at', today_str).execute().data, "claimed"
+    else: return existing, "empty"
+
+def get_todays_leads(username, client):
+    today_str = date.today().isoformat()
+    leads = supabase.table('leads').select("*").eq('assigned_to', username).eq('assigned_at', today_str).execute().data
+    to_heal = [l for l in leads if not l['ai_message']]
+    if to_heal:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+            [executor.submit(contextvars.copy_context().run, generate_and_update_task, t, client, username) for t in to_heal]
+        leads = supabase.table('leads').select("*").eq('assigned_to', username).eq('assigned_at', today_str).execute().data
+    return leads
+
+def get_mail_leads(username, replied, search="", newest_first=True, after=None, limit=20):
+    """邮件工作台客户列表的一页 (sql/006_mail_lead_list.sql)。
+    按 last_email_time + id 键集分页：after 为上一页最后一行的 (last_email_time, id)，None 表示第一页"""
+    if not supabase: return []
+    params = {'p_username': username, 'p_replied': replied, 'p_search': search.strip(), 'p_desc': newest_first,
+              'p_after_time': after[0] if after else None, 'p_after_id': after[1] if after else None, 'p_limit': limit}
+    try: return supabase.rpc('get_mail_leads', params).execute().data or []
+    except: return []
+
+def mark_lead_read(lead_id):
+    if not supabase: return False
+    try:
+        supabase.table('leads').update({'has_new_reply': False}).eq('id', lead_id).execute()
+        return True
+    except: return False
+
+def mark_lead_emailed(lead_id):
+    if not supabase: return False
+    try:
+        supabase.table('leads').update({'is_contacted': True, 'last_email_time': datetime.now().isoformat()}).eq('id', lead_id).execute()
+        return True
+    except: return False
+
+def mark_lead_complete_secure(lead_id, username):
+    if not supabase: return
+    now_iso = datetime.now().isoformat()
+    supabase.table('leads').update({'is_contacted': True, 'completed_at': now_iso}).eq('id', lead_id).execute()
+    add_user_points(username, CONFIG["POINTS_PER_TASK"], reason="lead_complete")
+
+def _fetch_activity_rollup(start_date, end_date):
+    res = supabase.rpc('get_activity_rollup', {'p_start': start_date, 'p_end': end_date}).execute()
+    return pd.DataFrame(res.data, columns=['username', 'claimed', 'done'])
+
+# 历史区间不会再变化，永久缓存；包含今天的区间短 TTL
+@st.cache_data(max_entries=256, show_spinner=False)
+def _get_activity_rollup_frozen(start_date, end_date):
+    return _fetch_activity_rollup(start_date, end_date)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _get_activity_rollup_live(start_date, end_date):
+    return _fetch_activity_rollup(start_date, end_date)
+
+def get_daily_logs(query_date, end_date=None):
+    if not supabase: return pd.DataFrame(), pd.DataFrame()
+    end_date = end_date or query_date
+    try:
+        if end_date < date.today().isoformat(): df = _get_activity_rollup_frozen(query_date, end_date)
+        else: df = _get_activity_rollup_live(query_date, end_date)
+        df = df.rename(columns={'username': 'assigned_to'})
+        df_claim_summary = df[df['claimed'] > 0][['assigned_to', 'claimed']].rename(columns={'claimed': '领取数量'})
+        df_done_summary = df[df['done'] > 0][['assigned_to', 'done']].rename(columns={'done': '实际处理'})
+        return df_claim_summary.reset_index(drop=True), df_done_summary.reset_index(drop=True)
+    except Exception: return pd.DataFrame(), pd.DataFrame()
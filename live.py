@@ -0,0 +1,195 @@
+import asyncio
+import importlib.util
+import threading
+import time
+import streamlit as st
+from mailer import InboxWatcher
+
+REALTIME_INSTALLED = importlib.util.find_spec("realtime") is not None
+
+# ==========================================
+# 实时推送 (新回复 / 名下线索变更)
+# 两路来源：Supabase Realtime 订阅 leads 表中 assigned_to = 本人的变更；IMAP IDLE 后台线程发现新回复。
+# Realtime 的过滤条件按新行匹配，线索被回收 / 转给别人时原业务员的频道收不到，所以另有一个全进程共用、
+# 不带过滤的 UPDATE 频道，按旧行 (REPLICA IDENTITY FULL) 的 assigned_to 通知原业务员。
+# 收到变更只把该业务员的版本号 +1；工作台上的片段每隔几秒比一次版本号 (只读内存，不查库、不连邮箱)，
+# 变了才整页重跑刷新列表。需先执行 sql/010_realtime_leads.sql 把 leads 加入 Realtime 发布。
+# 业务员超过 LIVE_IDLE 秒没打开工作台或退出登录时，停掉其 IMAP 线程并退订频道；IMAP 常驻连接最多 MAX_WATCHERS 条，
+# 满额时只让出最久没活动且已超过 REAP_EVERY 秒的名额，否则新来的业务员暂不启动 (工作台显示收件箱 ✗，可手动同步)
+# ==========================================
+LIVE_IDLE = 900      # 多久没打开工作台就停止推送 (秒)
+MAX_WATCHERS = 50    # 同时在线的 IMAP IDLE 连接上限，可用 secrets 的 LIVE_MAX_WATCHERS 覆盖
+REAP_EVERY = 60      # 空闲检查间隔 (秒)；满额时超过这么久没活动的业务员会被让出名额
+
+def _is_news(data):
+    """本人频道 (assigned_to = 本人的新行) 上只有别人造成的变化才需要刷新：新回复、线索转入；
+    自己的已读 / 发信 / 完成不算。转出由 _moved_away 在共用频道上判断。
+    old_record 需要 leads 设为 REPLICA IDENTITY FULL 才有完整旧值，否则按有变化处理"""
+    if data.get('type') != 'UPDATE': return True
+    new, old = data.get('record') or {}, data.get('old_record') or {}
+    if new.get('has_new_reply') and not old.get('has_new_reply'): return True
+    return new.get('assigned_to') != old.get('assigned_to')
+
+
+def _moved_away(data):
+    """线索被转出 (回收 / 改派) 时返回原业务员，否则 None"""
+    if data.get('type') != 'UPDATE': return None
+    old, new = data.get('old_record') or {}, data.get('record') or {}
+    rep = old.get('assigned_to')
+    return rep if rep and rep != new.get('assigned_to') else None
+
+
+class LiveHub:
+    """进程内的推送中心：每个业务员一个 Realtime 频道 + 一个 IMAP IDLE 线程，按需启动，空闲 / 退出登录后停止"""
+
+    def __init__(self, realtime_url=None, key=None, idle_after=LIVE_IDLE, max_watchers=MAX_WATCHERS):
+        self.realtime_url = realtime_url
+        self.key = key
+        self.idle_after = idle_after
+        self.max_watchers = max_watchers
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._seen = {}      # username -> 最近一次打开工作台 (monotonic)
+        self._channels = {}  # username -> 订阅状态
+        self._subs = {}      # username -> Realtime 频道对象
+        self._moves = None   # 共用的转出通知频道
+        self._watchers = {}  # username -> InboxWatcher
+        self._reaper = None
+        self._loop = None
+        self._connecting = None
+        self._client = None
+
+    def bump(self, username):
+        with self._lock: self._versions[username] = self._versions.get(username, 0) + 1
+
+    def version(self, username):
+        return self._versions.get(username, 0)
+
+    def watch(self, username, email_config=None):
+        """确保该业务员的推送来源都已启动并刷新活跃时间；工作台每次重跑和实时片段每次轮询都会调用，
+        已在运行时开销只是几次字典查找"""
+        self._seen[username] = time.monotonic()
+        if self._reaper is None: self._start_reaper()
+        if self.realtime_url and REALTIME_INSTALLED and username not in self._channels: self._subscribe(username)
+        if email_config:
+            watcher = self._watchers.get(username)
+            if watcher is None or watcher.config != email_config:
+                with self._lock:
+                    old = self._watchers.pop(username, None)
+                    evicted = None if old else self._make_room()
+                    if old or evicted is not False:
+                        self._watchers[username] = InboxWatcher(email_config, username, on_reply=lambda n: self.bump(username)).start()
+                for w in (old, evicted):
+                    if w: w.stop()
+
+    def unwatch(self, username):
+        """停止该业务员的 IMAP 线程并退订 Realtime 频道 (退出登录 / 长时间未打开工作台)"""
+        with self._lock:
+            self._seen.pop(username, None)
+            watcher = self._watchers.pop(username, None)
+            self._channels.pop(username, None)
+            channel = self._subs.pop(username, None)
+        if watcher: watcher.stop()
+        if channel is not None: asyncio.run_coroutine_threadsafe(self._leave(channel), self._loop)
+
+    def _make_room(self):
+        """新增一条 IMAP 连接前检查名额 (持锁调用)：未满返回 None；满额时让出最久没活动的，
+        它在 REAP_EVERY 秒内还活动过则返回 False (不启动)，否则返回被让出的 watcher"""
+        if len(self._watchers) < self.max_watchers: return None
+        oldest = min(self._watchers, key=lambda u: self._seen.get(u, 0))
+        if self._seen.get(oldest, 0) > time.monotonic() - REAP_EVERY: return False
+        return self._watchers.pop(oldest)
+
+    def _start_reaper(self):
+        with self._lock:
+            if self._reaper is not None: return
+            self._reaper = threading.Thread(target=self._reap_forever, name="live-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_forever(self):
+        while True:
+            time.sleep(REAP_EVERY)
+            self.reap()
+
+    def reap(self):
+        """停掉超过 idle_after 秒没打开工作台的业务员的推送"""
+        cutoff = time.monotonic() - self.idle_after
+        for username in [u for u, t in list(self._seen.items()) if t < cutoff]: self.unwatch(username)
+
+    def status(self, username):
+        """(Realtime 订阅状态, IMAP IDLE 是否在线)，工作台用来显示推送是否生效"""
+        watcher = self._watchers.get(username)
+        return self._channels.get(username), bool(watcher and watcher.alive)
+
+    # ---------- Realtime：一个事件循环线程承载全部频道 ----------
+    def _subscribe(self, username):
+        with self._lock:
+            if username in self._channels: return
+            self._channels[username] = "JOINING"
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._connecting = asyncio.Lock()
+                threading.Thread(target=self._loop.run_forever, name="realtime", daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._join(username), self._loop)
+
+    async def _join(self, username):
+        def on_change(payload):
+            if _is_news(payload.get('data') or {}): self.bump(username)
+
+        def on_state(state, err=None):
+            with self._lock:
+                if self._subs.get(username) is channel: self._channels[username] = getattr(state, 'value', str(state))
+
+        # 订阅与退订都在同一把锁里按先后顺序执行，退出后马上重新登录也不会和未完成的退订交错
+        channel = None
+        try:
+            async with self._connecting:
+                with self._lock:
+                    if username not in self._channels: return  # 排队期间已被 unwatch
+                if self._client is None:
+                    from realtime import AsyncRealtimeClient
+                    client = AsyncRealtimeClient(self.realtime_url, self.key)
+                    await client.connect()
+                    self._client = client
+                if self._moves is None: await self._join_moves()
+                channel = self._client.channel(f"leads:{username}")
+                channel.on_postgres_changes("*", callback=on_change, table="leads", schema="public", filter=f"assigned_to=eq.{username}")
+                with self._lock: self._subs[username] = channel
+                await channel.subscribe(on_state)
+        except Exception:
+            # 连不上时不影响页面，下次打开工作台再试
+            with self._lock:
+                if self._subs.get(username) is channel:
+                    self._channels.pop(username, None)
+                    self._subs.pop(username, None)
+
+    async def _join_moves(self):
+        """不带过滤的 UPDATE 订阅：旧行 assigned_to 是正在推送的业务员、新行不是时通知他 (持 _connecting 调用)"""
+        def on_update(payload):
+            rep = _moved_away(payload.get('data') or {})
+            if rep and rep in self._subs: self.bump(rep)
+
+        channel = self._client.channel("leads:moves")
+        channel.on_postgres_changes("UPDATE", callback=on_update, table="leads", schema="public")
+        self._moves = channel
+        await channel.subscribe()
+
+    async def _leave(self, channel):
+        try:
+            async with self._connecting:
+                if self._client is None or self._client.channels.get(channel.topic) is not channel: return
+                await self._client.remove_channel(channel)
+                with self._lock: last = not self._subs
+                if last and self._moves is not None:
+                    # 没有业务员在推送了，共用频道一并退订
+                    moves, self._moves = self._moves, None
+                    await self._client.remove_channel(moves)
+                if not self._client.channels: self._client = None  # 最后一个频道退订后客户端会断开，下次重新连接
+        except Exception: pass
+
+@st.cache_resource
+def get_live_hub():
+    try:
+        url = st.secrets.get("SUPABASE_REALTIME_URL") or f"{st.secrets['SUPABASE_URL'].rstrip('/')}/realtime/v1"
+        return LiveHub(url, st.secrets["SUPABASE_KEY"], max_watchers=int(st.secrets.get("LIVE_MAX_WATCHERS", MAX_WATCHERS)))
+    except: return LiveHub()
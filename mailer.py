@@ -0,0 +1,172 @@
+import importlib.util
+import smtplib
+import socket
+import threading
+from email.mime.text import MIMEText
+from email.header import Header
+from email.utils import formataddr, parseaddr
+from db import supabase
+from metrics import track
+
+IMAP_TOOLS_INSTALLED = importlib.util.find_spec("imap_tools") is not None
+
+# ==========================================
+# 邮件处理核心引擎 (SMTP + IMAP)
+# ==========================================
+class EmailEngine:
+    def __init__(self, config, sender_name="Sales"):
+        self.config = config 
+        self.sender_name = sender_name
+
+    def send_email(self, to_email, subject, body_text):
+        if not self.config: return False, "配置缺失"
+        try:
+            # Python 自动转 HTML
+            html_content = body_text.replace("\n", "<br>")
+            msg = MIMEText(html_content, 'html', 'utf-8')
+            
+            display_from = f"{self.sender_name} | 988 Group"
+            msg['From'] = formataddr((Header(display_from, 'utf-8').encode(), self.config['email']))
+            msg['To'] = to_email
+            msg['Subject'] = Header(subject, 'utf-8')
+
+            raw = msg.as_string()
+            with track("smtp", "send", size=len(raw)):
+                server = smtplib.SMTP_SSL(self.config['smtp_server'], int(self.config['smtp_port']))
+                server.login(self.config['email'], self.config['password'])
+                server.sendmail(self.config['email'], [to_email], raw)
+                server.quit()
+            return True, "发送成功"
+        except Exception as e:
+            return False, str(e)
+
+    def fetch_thread(self, client_email):
+        if not self.config or not IMAP_TOOLS_INSTALLED: return []
+        emails = []
+        try:
+            from imap_tools import MailBox
+            with track("imap", "fetch_thread") as span, MailBox(self.config['imap_server'], int(self.config.get('imap_port') or 993)).login(self.config['email'], self.config['password']) as mailbox:
+                # 1. 抓取收件箱 (INBOX) 里的回复
+                mailbox.folder.set('INBOX')
+                for msg in mailbox.fetch(limit=10, reverse=True):
+                    if client_email in msg.from_ or client_email in msg.to:
+                        emails.append(self._parse_msg(msg, "Inbox"))
+                
+                # 2. 抓取已发送 (Sent)
+                sent_folders = ['Sent Messages', 'Sent Items', 'Sent', '[Gmail]/Sent Mail']
+                for f in mailbox.folder.list():
+                    # imap_tools 1.x 返回 FolderInfo，旧版本返回 dict
+                    name = f.name if hasattr(f, 'name') else f['name']
+                    if any(s in name for s in sent_folders):
+                        mailbox.folder.set(name)
+                        for msg in mailbox.fetch(limit=10, reverse=True):
+                             if client_email in msg.to:
+                                emails.append(self._parse_msg(msg, "Sent"))
+                        break
+                span.size = len(emails)
+                        
+        except Exception as e:
+            print(f"IMAP Error: {e}")
+            
+        return sorted(emails, key=lambda x: x['date'], reverse=True)
+
+    def _parse_msg(self, msg, folder):
+        return {
+            "subject": msg.subject,
+            "from": msg.from_,
+            "to": msg.to,
+            "date": msg.date_str,
+            "text": msg.text or msg.html,
+            "folder": folder
+        }
+    
+    def sync_inbox_for_replies(self, username):
+        if not self.config or not IMAP_TOOLS_INSTALLED: return 0
+        count = 0
+        try:
+            # 先取收件箱最近 50 封的发件人，再只查这些邮箱对应的客户；
+            # 不再把名下所有已联系客户整表读回 (超过 1000 行会被截断，漏掉回复)
+            senders = []
+            from imap_tools import MailBox
+            with track("imap", "sync_inbox"), MailBox(self.config['imap_server'], int(self.config.get('imap_port') or 993)).login(self.config['email'], self.config['password']) as mailbox:
+                mailbox.folder.set('INBOX')
+                for msg in mailbox.fetch(limit=50, reverse=True):
+                    senders.append(parseaddr(msg.from_)[1])
+            count = flag_replies(username, senders)
+        except Exception as e:
+            print(f"Sync Error: {e}")
+        return count
+
+
+def flag_replies(username, senders):
+    """发件人中属于名下已联系客户的，标记 has_new_reply (一次查询 + 一次更新)，返回命中的邮件数"""
+    if not senders: return 0
+    leads = supabase.table('leads').select('id, email').eq('assigned_to', username).eq('is_contacted', True).in_('email', list(set(senders))).execute().data
+    lead_map = {l['email']: l['id'] for l in leads}
+    replied = {lead_map[e] for e in senders if e in lead_map}
+    # IMAP 会话结束后一次性更新，不在会话内逐条写库
+    if replied: supabase.table('leads').update({'has_new_reply': True}).in_('id', list(replied)).execute()
+    return sum(1 for e in senders if e in lead_map)
+
+
+class InboxWatcher:
+    """后台 IMAP IDLE：一条常驻连接等服务器推送新邮件，不再靠手动同步。
+    来信时只取比上次更新的 UID，发件人是名下已联系客户就标记 has_new_reply 并回调 on_reply(命中数)。
+    IDLE 每 idle_timeout 秒重发一次 (RFC 2177 要求 29 分钟内)；连接断开后指数退避重连；stop() 会立即断开连接结束线程"""
+
+    def __init__(self, config, username, on_reply=None, idle_timeout=300):
+        self.config = config
+        self.username = username
+        self.on_reply = on_reply
+        self.idle_timeout = idle_timeout
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._mailbox = None
+
+    def start(self):
+        if IMAP_TOOLS_INSTALLED and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"imap-idle-{self.username}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        # 关掉套接字打断阻塞中的 IDLE，不用等到 idle_timeout
+        mailbox = self._mailbox
+        if mailbox is not None:
+            try: mailbox.client.sock.shutdown(socket.SHUT_RDWR)
+            except Exception: pass
+
+    @property
+    def alive(self):
+        return self._thread is not None and self._thread.is_alive() and self.error is None
+
+    def _run(self):
+        from imap_tools import MailBox, AND, U
+        backoff, last = 1, None
+        while not self._stop.is_set():
+            try:
+                with MailBox(self.config['imap_server'], int(self.config.get('imap_port') or 993)).login(self.config['email'], self.config['password']) as mailbox:
+                    self._mailbox = mailbox
+                    if self._stop.is_set(): break
+                    mailbox.folder.set('INBOX')
+                    # 重连后从断开前的位置接着取，断线期间到的邮件不会漏掉
+                    if last is None: last = mailbox.folder.status('INBOX', ['UIDNEXT'])['UIDNEXT'] - 1
+                    self.error, backoff = None, 1
+                    while not self._stop.is_set():
+                        if not mailbox.idle.wait(timeout=self.idle_timeout): continue
+                        senders = []
+                        with track("imap", "idle_fetch") as span:
+                            for msg in mailbox.fetch(AND(uid=U(last + 1, '*')), mark_seen=False, headers_only=True):
+                                # UID 区间 n:* 在没有新邮件时也会返回最大的那封，按 UID 过滤
+                                if msg.uid and int(msg.uid) > last:
+                                    last = int(msg.uid)
+                                    senders.append(parseaddr(msg.from_)[1])
+                            span.size = len(senders)
+                        count = flag_replies(self.username, senders)
+                        if count and self.on_reply: self.on_reply(count)
+            except Exception as e:
+                self.error = str(e)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 300)
@@ -0,0 +1,169 @@
+import os
+import sys
+import time
+import itertools
+import contextvars
+from collections import deque
+import streamlit as st
+from utils import lazy_import
+
+pd = lazy_import("pandas")
+
+# ==========================================
+# 外部调用埋点 (Supabase / OpenAI / IMAP / SMTP / CheckNumber)
+# 每次调用记录耗时、数据量、异常类型、调用位置，以及所属的重跑和用户。
+# 记录只是 perf_counter + deque.append，生产环境常开即可。
+# ==========================================
+EVENT_BUFFER = 20000
+RUN_BUFFER = 2000
+EVENT_COLUMNS = ['ts', 'service', 'op', 'site', 'ms', 'size', 'error', 'run_id', 'user']
+RUN_COLUMNS = ['ts', 'run_id', 'user', 'page', 'total_ms', 'io_ms', 'calls']
+
+_current_run = contextvars.ContextVar("current_run", default=None)
+_run_ids = itertools.count(1)
+
+
+class Metrics:
+    """进程内环形缓冲区：外部调用事件 + 每次重跑的汇总，写满后丢弃最旧的记录"""
+
+    def __init__(self, event_size=EVENT_BUFFER, run_size=RUN_BUFFER):
+        self.events = deque(maxlen=event_size)
+        self.runs = deque(maxlen=run_size)
+
+    def record(self, service, op, site, ms, size=None, error=None):
+        run = _current_run.get()
+        if run is not None:
+            run['calls'] += 1
+            run['io_ms'] += ms
+        self.events.append((time.time(), service, op, site, ms, size, error, run and run['id'], run and run['user']))
+
+    def record_run(self, run):
+        total = (time.perf_counter() - run['t0']) * 1000
+        self.runs.append((time.time(), run['id'], run['user'], run['page'], total, run['io_ms'], run['calls']))
+
+    def events_frame(self):
+        df = pd.DataFrame(list(self.events), columns=EVENT_COLUMNS)
+        df['ts'] = pd.to_datetime(df['ts'], unit='s')
+        return df
+
+    def runs_frame(self):
+        df = pd.DataFrame(list(self.runs), columns=RUN_COLUMNS)
+        df['ts'] = pd.to_datetime(df['ts'], unit='s')
+        return df
+
+@st.cache_resource
+def get_metrics():
+    return Metrics()
+
+metrics = get_metrics()
+
+def begin_run(user=None, page=None):
+    """标记一次脚本重跑的开始，此后 (含 submit_write 的后台写入) 的外部调用都归到这次重跑"""
+    run = {"id": next(_run_ids), "user": user, "page": page, "t0": time.perf_counter(), "calls": 0, "io_ms": 0.0}
+    _current_run.set(run)
+    return run
+
+def end_run(run):
+    metrics.record_run(run)
+
+def _call_site(depth):
+    """调用位置 "模块.函数"，页面脚本顶层代码显示为页面名"""
+    code = sys._getframe(depth + 1).f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return module if code.co_name == '<module>' else f"{module}.{code.co_name}"
+
+
+class Span:
+    """一次外部调用的计时：with track("smtp", "send") as t: ...; t.size = 字节数。
+    异常照常抛出，这里只记下异常类型"""
+    __slots__ = ("service", "op", "site", "size", "_t0")
+
+    def __init__(self, service, op, site, size=None):
+        self.service, self.op, self.site, self.size = service, op, site, size
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = (time.perf_counter() - self._t0) * 1000
+        metrics.record(self.service, self.op, self.site, ms, self.size, exc_type.__name__ if exc_type else None)
+        return False
+
+def track(service, op="", size=None):
+    return Span(service, op, _call_site(1), size)
+
+
+# 链式调用 (table().select().eq()...) 的中间结果继续包装，终端方法才计时
+_PLAIN = (str, bytes, int, float, bool, type(None), dict, list, tuple)
+_DB_VERBS = ('select', 'insert', 'update', 'upsert', 'delete')
+
+def _payload_size(res):
+    """数据库返回行数 / OpenAI 消耗的 tokens，取不到时为 None"""
+    data = getattr(res, 'data', None)
+    if isinstance(data, list): return len(data)
+    if data is not None: return 1
+    usage = getattr(res, 'usage', None)
+    return getattr(usage, 'total_tokens', None) if usage is not None else None
+
+
+class Traced:
+    """包装外部客户端 (Supabase / OpenAI)：对调用方透明，终端方法 (execute / create / retrieve) 自动埋点"""
+
+    def __init__(self, target, service, terminals, op=""):
+        self._target = target
+        self._service = service
+        self._terminals = terminals
+        self._op = op
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if isinstance(attr, _PLAIN): return attr
+        if not callable(attr): return Traced(attr, self._service, self._terminals, f"{self._op}.{name}" if self._op else name)
+        if name in self._terminals:
+            def timed(*args, **kwargs):
+                with Span(self._service, self._op or name, _call_site(1)) as span:
+                    res = attr(*args, **kwargs)
+                    span.size = _payload_size(res)
+                return res
+            return timed
+
+        def chained(*args, **kwargs):
+            res = attr(*args, **kwargs)
+            if isinstance(res, _PLAIN): return res
+            op = self._op
+            if not op: op = f"{name}:{args[0]}" if args and isinstance(args[0], str) else name
+            elif name in _DB_VERBS: op = f"{op}.{name}"
+            return Traced(res, self._service, self._terminals, op)
+        return chained
+
+def traced_supabase(client):
+    return Traced(client, "supabase", ("execute",))
+
+def traced_openai(client):
+    return Traced(client, "openai", ("create", "retrieve"))
+
+
+# ==========================================
+# 看板统计
+# ==========================================
+def call_site_stats(events):
+    """按 (服务, 操作, 调用位置) 汇总：次数、p50/p95/最大耗时、错误率、平均数据量"""
+    if events.empty: return pd.DataFrame()
+    g = events.groupby(['service', 'op', 'site'])
+    stats = pd.DataFrame({
+        '次数': g['ms'].size(),
+        'p50 ms': g['ms'].median(),
+        'p95 ms': g['ms'].quantile(0.95),
+        '最大 ms': g['ms'].max(),
+        '错误率': g['error'].count() / g['ms'].size(),
+        '平均数据量': g['size'].mean(),
+    })
+    return stats.sort_values('p95 ms', ascending=False).round(2)
+
+def service_error_stats(events):
+    if events.empty: return pd.DataFrame()
+    g = events.groupby('service')
+    stats = pd.DataFrame({'次数': g['ms'].size(), '错误数': g['error'].count()})
+    stats['错误率'] = (stats['错误数'] / stats['次数']).round(3)
+    return stats
@@ -0,0 +1,159 @@
+import re
+import functools
+from utils import lazy_import
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+# ==========================================
+# 电话号码清洗
+# 所有入口 (WhatsApp 链接、导入文件提取、沙盒模拟) 共用一套规则：
+# 国家代码前缀树识别国际写法，覆盖独联体 / 中亚市场；不带国家代码的只认俄 / 哈国内写法。
+# 结果统一为国际格式纯数字 (不带 +)，如 79251234567
+# ==========================================
+PHONE_MEMO = 1 << 17  # 单号码结果缓存条数 (同一批文件里重复号码很多)
+
+# 国家代码前缀 -> (国家代码, 国内号码位数)；+7 之后 6 / 7 开头为哈萨克斯坦，格式相同
+CALLING_CODES = {
+    "7": ("7", 10),      # 俄罗斯
+    "76": ("7", 10),     # 哈萨克斯坦
+    "77": ("7", 10),     # 哈萨克斯坦
+    "375": ("375", 9),   # 白俄罗斯
+    "380": ("380", 9),   # 乌克兰
+    "373": ("373", 8),   # 摩尔多瓦
+    "374": ("374", 8),   # 亚美尼亚
+    "994": ("994", 9),   # 阿塞拜疆
+    "995": ("995", 9),   # 格鲁吉亚
+    "996": ("996", 9),   # 吉尔吉斯斯坦
+    "992": ("992", 9),   # 塔吉克斯坦
+    "993": ("993", 8),   # 土库曼斯坦
+    "998": ("998", 9),   # 乌兹别克斯坦
+    "976": ("976", 8),   # 蒙古
+    "86": ("86", 11),    # 中国
+}
+
+# 不带国家代码的国内写法：(开头, 总位数, 去掉的位数, 补上的国家代码, 文本中也认)，长前缀优先匹配。
+# 最后一项为 False 的只用于电话字段 (normalize_phone)，从整段文本提取号码时不认
+NATIONAL_RULES = [
+    ("80", 11, 2, "375", True),  # 白俄罗斯 8 0XX ...
+    ("8", 11, 1, "7", True),     # 俄 / 哈 8 XXX ...
+    ("9", 10, 0, "7", True),     # 俄罗斯手机省略 8 / 7
+    # 以下 10 位写法与俄罗斯法人税号 (ИНН，10 位、前两位为地区码) 无法区分，只用于电话字段，文本中不认
+    ("3", 10, 0, "7", False),    # 俄罗斯固话省略 8 / 7 (3XX，如 343 叶卡捷琳堡)
+    ("4", 10, 0, "7", False),    # 俄罗斯固话 (4XX，如 495 莫斯科)
+    ("8", 10, 0, "7", False),    # 俄罗斯固话 / 免费电话 (8XX，如 812 圣彼得堡)
+    *((f"7{k}", 10, 0, "7", False) for k in range(8)),  # 哈萨克斯坦省略 7 (70X-77X)
+]
+
+_SPLIT = re.compile(r'[;,\n/]')
+_EXCEL_FLOAT = re.compile(r'\.0+\s*$')
+_NON_DIGIT = re.compile(r'\D')
+# 文本中的候选号码：可带 +，数字之间允许空格 / 短横线 / 括号
+_CANDIDATE = re.compile(r'(?<![\d+])\+?\(?\d[\d\s\-()]{6,20}\d(?!\d)')
+_FIELD_SEP = ' | '  # 拼接整行文本时的分隔符，不在候选字符内，相邻单元格的数字不会粘在一起
+
+
+def _build_trie(codes):
+    trie = {}
+    for prefix, value in codes.items():
+        node = trie
+        for ch in prefix: node = node.setdefault(ch, {})
+        node[''] = value
+    return trie
+
+
+def _compile_codes(trie, width):
+    """前缀树展开成 {width 位前缀: 号码总位数}：每个前缀预先做好最长匹配，查号时只需一次字典查找"""
+    table = {}
+    for n in range(10 ** width):
+        prefix, node, hit = str(n).zfill(width), trie, None
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None: break
+            hit = node.get('', hit)
+        if hit: table[prefix] = len(hit[0]) + hit[1]
+    return table
+
+
+def _compile_national(rules, in_text):
+    """{(总位数, 前两位): (去掉的位数, 国家代码)}，规则按顺序取第一条匹配的"""
+    table = {}
+    for n in range(100):
+        head = f"{n:02d}"
+        for prefix, length, strip, code, text_ok in rules:
+            if head.startswith(prefix) and (text_ok or not in_text): table.setdefault((length, head), (strip, code))
+    return table
+
+
+_CODE_WIDTH = max(map(len, CALLING_CODES))
+_TOTAL_DIGITS = _compile_codes(_build_trie(CALLING_CODES), _CODE_WIDTH)
+_NATIONAL = _compile_national(NATIONAL_RULES, in_text=False)
+_NATIONAL_IN_TEXT = _compile_national(NATIONAL_RULES, in_text=True)
+
+
+def _resolve(d, intl, in_text=False):
+    """纯数字串 -> 国际格式；intl 表示原文带 + / 00，此时不再按国内写法猜；in_text 表示是从整段文本里找到的候选"""
+    if d[:2] == '00': d, intl = d[2:], True
+    if _TOTAL_DIGITS.get(d[:_CODE_WIDTH]) == len(d): return d
+    if intl: return None
+    rule = (_NATIONAL_IN_TEXT if in_text else _NATIONAL).get((len(d), d[:2]))
+    return rule[1] + d[rule[0]:] if rule else None
+
+
+@functools.lru_cache(maxsize=PHONE_MEMO)
+def _normalize_text(s, in_text=False):
+    if s.isdigit(): return _resolve(s, False, in_text)
+    s = _EXCEL_FLOAT.sub('', _SPLIT.split(s, 1)[0])  # 多个号码取第一个；去掉 Excel 浮点的 .0
+    return _resolve(_NON_DIGIT.sub('', s), s.lstrip().startswith('+'), in_text)
+
+
+def normalize_phone(raw):
+    """单个号码 (任意写法 / Excel 数字) -> 国际格式纯数字，无法识别返回 None。
+    例：'8 (925) 123-45-67' / '+7 925 1234567' / 79251234567.0 -> '79251234567'，'7012345678' -> '77012345678'"""
+    if raw.__class__ is str: return _normalize_text(raw)
+    if raw is None or (isinstance(raw, float) and raw != raw): return None
+    return _normalize_text(str(raw))
+
+
+def normalize_phones(values, in_text=False):
+    """批量版：先去重再逐个查表，结果按原顺序铺回，返回与输入等长的 Series (无法识别为 None)。
+    in_text=True 表示 values 是从文本中找出的候选号码，按文本规则识别"""
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    codes, uniques = pd.factorize(values)
+    resolve = (lambda v: _normalize_text(v, True)) if in_text else normalize_phone
+    resolved = np.array([resolve(v) for v in uniques] + [None], dtype=object)
+    return pd.Series(resolved[codes], index=values.index, dtype=object)  # codes 为 -1 (空值) 时取到末尾的 None
+
+
+def clean_phone_for_whatsapp(phone_raw):
+    """wa.me 链接用的号码"""
+    return normalize_phone(phone_raw)
+
+
+def find_numbers(text):
+    """从一段文本中提取所有可识别号码，保持出现顺序并去重"""
+    found = (_resolve(_NON_DIGIT.sub('', m), m.startswith('+'), True) for m in _CANDIDATE.findall(text))
+    return list(dict.fromkeys(n for n in found if n))
+
+
+def extract_all_numbers(row_series):
+    return find_numbers(_FIELD_SEP.join([str(val) for val in row_series if pd.notna(val)]))
+
+
+def row_texts(df):
+    """整表每行拼成一段文本 (按列向量化拼接)"""
+    if df.shape[1] == 0: return pd.Series('', index=df.index)
+    cols = [df[c].astype(str).fillna('') for c in df.columns]  # pandas 3 的 str 类型里空值仍是 NaN
+    text = cols[0]
+    for col in cols[1:]: text = text + _FIELD_SEP + col
+    return text
+
+
+def first_numbers(texts):
+    """每段文本中第一个可识别号码，返回与输入等长的 Series (没有为 None)"""
+    candidates = texts.str.findall(_CANDIDATE).explode().dropna()
+    if candidates.empty: return pd.Series([None] * len(texts), index=texts.index, dtype=object)
+    digits = candidates.str.replace(_NON_DIGIT, '', regex=True)
+    found = normalize_phones(digits.where(~candidates.str.startswith('+'), '+' + digits), in_text=True).dropna()
+    first = found[~found.index.duplicated()].reindex(texts.index)  # explode 保持顺序，每行第一个即最先出现的
+    return first.astype(object).where(first.notna(), None)
@@ -0,0 +1,230 @@
+import io
+import os
+import json
+import base64
+import hashlib
+import tempfile
+import threading
+import concurrent.futures
+from PIL import Image, ImageOps
+from utils import LRUCache, BlobStore
+
+try:
+    import xlsxwriter
+    XLSXWRITER_INSTALLED = True
+except ImportError:
+    XLSXWRITER_INSTALLED = False
+
+# ==========================================
+# 报价单生成 (Excel) & 缩略图流水线
+# ==========================================
+QUOTE_IMG_TARGET = 100   # 图片单元格目标尺寸 (px)
+THUMB_SCALE = 2          # 按 2 倍分辨率存储，高分屏下不发虚
+THUMB_JPEG_QUALITY = 85
+THUMB_WORKERS = 8
+QUOTE_BLOB_DIR = os.path.join(tempfile.gettempdir(), "988_quote_images")  # 商品原图落盘目录 (按 sha256 命名)
+QUOTE_BLOB_MEM = 64 << 20  # 原图内存层上限 (字节)，全进程共享
+
+
+_thumb_cache = LRUCache(maxsize=2048)
+_logo_cache = LRUCache(maxsize=4)
+_workbook_cache = LRUCache(maxsize=16)
+# 会话里的报价商品只存 image_hash，原图在这里；与 image_digest 同为 sha256，哈希即存储键
+image_store = BlobStore(QUOTE_BLOB_DIR, mem_bytes=QUOTE_BLOB_MEM)
+threading.Thread(target=image_store.prune, name="blob-prune", daemon=True).start()  # 启动时清掉一周前的原图
+
+
+def image_digest(image_data):
+    return hashlib.sha256(image_data).hexdigest() if image_data else None
+
+
+def item_image_hash(item):
+    return item.get('image_hash') or image_digest(item.get('image_data'))
+
+
+def item_image(item):
+    """商品原图字节：旧格式直接带 image_data，否则按哈希从 image_store 读回"""
+    return item.get('image_data') or image_store.get(item.get('image_hash'))
+
+
+def encode_thumbnail(img, target=QUOTE_IMG_TARGET, scale_factor=THUMB_SCALE):
+    """PIL 图片缩放到目标单元格并重新编码 (不带元数据)，不透明图转 JPEG、带透明通道转 PNG。
+    会原地缩放 img；返回 (缩略图字节, 插入时的缩放比例)，尺寸异常返回 None"""
+    box = target * scale_factor
+    img.thumbnail((box, box), Image.LANCZOS)
+    width, height = img.size
+    if width <= 0 or height <= 0: return None
+
+    has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+    out = io.BytesIO()
+    if has_alpha: img.convert('RGBA').save(out, format='PNG', optimize=True)
+    else: img.convert('RGB').save(out, format='JPEG', quality=THUMB_JPEG_QUALITY, optimize=True)
+    return out.getvalue(), min(target / width, target / height)
+
+
+def make_thumbnail(image_data, target=QUOTE_IMG_TARGET, scale_factor=THUMB_SCALE):
+    """原图字节 -> (缩略图字节, 缩放比例)，解码失败返回 None"""
+    try:
+        img = ImageOps.exif_transpose(Image.open(io.BytesIO(image_data)))
+        return encode_thumbnail(img, target, scale_factor)
+    except Exception: return None
+
+
+def prepare_quote_image(image_hash, image_data=None):
+    """按内容哈希缓存的缩略图；缓存未命中才读原图 (未给出时从 image_store 取)"""
+    cached = _thumb_cache.get(image_hash)
+    if cached is None:
+        image_data = image_data or image_store.get(image_hash)
+        if not image_data: return None  # 原图已被清理，不缓存失败结果
+        cached = make_thumbnail(image_data) or False
+        _thumb_cache.put(image_hash, cached)
+    return cached or None
+
+
+def prepare_quote_images(items, max_workers=THUMB_WORKERS):
+    """并行预处理所有商品图片，返回 {image_hash: (bytes, scale) | None}"""
+    todo = {}
+    for item in items:
+        h = item_image_hash(item)
+        if h: todo.setdefault(h, item.get('image_data'))
+
+    missing = [h for h in todo if h not in _thumb_cache]
+    if len(missing) > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as executor:
+            list(executor.map(lambda h: prepare_quote_image(h, todo[h]), missing))
+    return {h: prepare_quote_image(h, data) for h, data in todo.items()}
+
+
+def prepare_quote_logo(logo_b64):
+    cached = _logo_cache.get(logo_b64)
+    if cached is None:
+        cached = False
+        try:
+            logo_data = base64.b64decode(logo_b64)
+            width, height = Image.open(io.BytesIO(logo_data)).size
+            if height > 0: cached = (logo_data, 60 / height)
+        except Exception: pass
+        _logo_cache.put(logo_b64, cached)
+    return cached or None
+
+
+def quotation_cache_key(items, service_fee_percent, total_domestic_freight, company_info):
+    """报价单内容哈希：商品字段 + 图片哈希 + 费用 + 表头信息"""
+    h = hashlib.sha256()
+    for item in items:
+        fields = {k: v for k, v in item.items() if k not in ('image_data', 'image_hash')}
+        h.update(json.dumps(fields, sort_keys=True, default=str).encode())
+        h.update((item.get('image_hash') or image_digest(item.get('image_data')) or '-').encode())
+    h.update(json.dumps([service_fee_percent, total_domestic_freight, company_info], sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def get_quotation_excel_cached(cache_key, items, service_fee_percent, total_domestic_freight, company_info):
+    data = _workbook_cache.get(cache_key)
+    if data is None:
+        data = generate_quotation_excel(items, service_fee_percent, total_domestic_freight, company_info).getvalue()
+        _workbook_cache.put(cache_key, data)
+    return data
+
+
+def generate_quotation_excel(items, service_fee_percent, total_domestic_freight, company_info, thumbnails=True):
+    """thumbnails=False 时嵌入原图 (仅用于基准对比)"""
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    worksheet = workbook.add_worksheet("Sheet1")
+
+    fmt_header_main = workbook.add_format({'bold': True, 'font_size': 16, 'align': 'center', 'valign': 'vcenter'})
+    fmt_header_sub = workbook.add_format({'font_size': 11, 'align': 'left', 'valign': 'vcenter', 'text_wrap': True})
+    fmt_table_header = workbook.add_format({'bold': True, 'font_size': 10, 'align': 'center', 'valign': 'vcenter', 'border': 1, 'bg_color': '#f0f0f0', 'text_wrap': True})
+    fmt_cell_center = workbook.add_format({'font_size': 10, 'align': 'center', 'valign': 'vcenter', 'border': 1, 'text_wrap': True})
+    fmt_cell_left = workbook.add_format({'font_size': 10, 'align': 'left', 'valign': 'vcenter', 'border': 1, 'text_wrap': True})
+    fmt_money = workbook.add_format({'font_size': 10, 'align': 'center', 'valign': 'vcenter', 'border': 1, 'num_format': '¥#,##0.00'})
+    fmt_bold_red = workbook.add_format({'bold': True, 'color': 'red', 'font_size': 11})
+    fmt_total_row = workbook.add_format({'bold': True, 'font_size': 11, 'align': 'right', 'valign': 'vcenter', 'border': 1, 'bg_color': '#e6e6e6'})
+    fmt_total_money = workbook.add_format({'bold': True, 'font_size': 11, 'align': 'center', 'valign': 'vcenter', 'border': 1, 'num_format': '¥#,##0.00', 'bg_color': '#e6e6e6'})
+
+    worksheet.merge_range('B1:H2', company_info.get('name', "义乌市万昶进出口有限公司"), fmt_header_main)
+
+    logo_b64 = company_info.get('logo_b64')
+    if logo_b64 and len(logo_b64) > 100:
+        logo = prepare_quote_logo(logo_b64)
+        if logo:
+            logo_data, scale = logo
+            worksheet.insert_image('A1', 'logo.png', {'image_data': io.BytesIO(logo_data), 'x_scale': scale, 'y_scale': scale})
+
+    tel = company_info.get('tel', '')
+    email = company_info.get('email', '')
+    wechat = company_info.get('wechat', '')
+    contact_text = f"TEL: {tel}    WeChat: {wechat}\nE-mail: {email}"
+
+    worksheet.merge_range('A3:H4', contact_text, fmt_header_sub)
+    worksheet.merge_range('A5:H5', f"Address: {company_info.get('addr', '')}", fmt_header_sub)
+    worksheet.merge_range('A7:H7', "* This price is valid for 10 days / Эта цена действительна в течение 10 дней", fmt_bold_red)
+
+    headers = [("序号", 4), ("型号", 15), ("图片", 15), ("名称", 15), ("描述", 25), ("数量", 8), ("EXW 单价", 12), ("货值", 12)]
+    start_row = 8
+    for col, (h_text, width) in enumerate(headers):
+        worksheet.write(start_row, col, h_text, fmt_table_header)
+        worksheet.set_column(col, col, width)
+
+    current_row = start_row + 1
+    total_exw_value = 0
+    prepared_images = prepare_quote_images(items) if thumbnails else {}
+
+    for idx, item in enumerate(items, 1):
+        qty = float(item.get('qty', 0))
+        factory_price_unit = float(item.get('price_exw', 0))
+        line_total_exw = factory_price_unit * qty
+        total_exw_value += line_total_exw
+
+        worksheet.set_row(current_row, 80)
+        worksheet.write(current_row, 0, idx, fmt_cell_center)
+        worksheet.write(current_row, 1, item.get('model', ''), fmt_cell_center)
+
+        if item_image_hash(item):
+            if thumbnails: prepared = prepared_images.get(item_image_hash(item))
+            else: prepared = _original_image(item_image(item))
+            if prepared:
+                img_bytes, scale = prepared
+                worksheet.insert_image(current_row, 2, "img.png", {'image_data': io.BytesIO(img_bytes), 'x_scale': scale, 'y_scale': scale, 'object_position': 2})
+            else: worksheet.write(current_row, 2, "Error", fmt_cell_center)
+        else: worksheet.write(current_row, 2, "No Image", fmt_cell_center)
+
+        worksheet.write(current_row, 3, item.get('name', ''), fmt_cell_left)
+        worksheet.write(current_row, 4, item.get('desc', ''), fmt_cell_left)
+        worksheet.write(current_row, 5, qty, fmt_cell_center)
+        worksheet.write(current_row, 6, factory_price_unit, fmt_money)
+        worksheet.write(current_row, 7, line_total_exw, fmt_money)
+        current_row += 1
+
+    worksheet.merge_range(current_row, 0, current_row, 6, "Subtotal (EXW) / 工厂货值小计", fmt_total_row)
+    worksheet.write(current_row, 7, total_exw_value, fmt_total_money)
+    current_row += 1
+
+    if total_domestic_freight > 0:
+        worksheet.merge_range(current_row, 0, current_row, 6, "Domestic Freight / 国内运费", fmt_total_row)
+        worksheet.write(current_row, 7, total_domestic_freight, fmt_total_money)
+        current_row += 1
+
+    service_fee_amount = total_exw_value * (service_fee_percent / 100.0)
+    if service_fee_amount > 0:
+        worksheet.merge_range(current_row, 0, current_row, 6, f"Service Fee / 服务费 ({service_fee_percent}%)", fmt_total_row)
+        worksheet.write(current_row, 7, service_fee_amount, fmt_total_money)
+        current_row += 1
+
+    grand_total = total_exw_value + total_domestic_freight + service_fee_amount
+    worksheet.merge_range(current_row, 0, current_row, 6, "GRAND TOTAL / 总计", fmt_total_row)
+    worksheet.write(current_row, 7, grand_total, fmt_total_money)
+
+    workbook.close()
+    output.seek(0)
+    return output
+
+
+def _original_image(image_data):
+    """旧流程：原图直接嵌入，仅按尺寸计算缩放"""
+    try:
+        width, height = Image.open(io.BytesIO(image_data)).size
+        scale = min(QUOTE_IMG_TARGET / width, QUOTE_IMG_TARGET / height) if width > 0 and height > 0 else 0.5
+        return image_data, scale
+    except Exception: return None
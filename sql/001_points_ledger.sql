@@ -0,0 +1,60 @@
+-- ==========================================
+-- 积分流水 (points_ledger)
+-- 只追加的流水表 + 原子累加 RPC；users.points 作为物化余额在同一事务内维护
+-- ==========================================
+create table if not exists points_ledger (
+    id bigserial primary key,
+    username text not null,
+    amount integer not null,
+    reason text,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists points_ledger_username_idx on points_ledger (username, created_at desc);
+
+-- 期初余额：首次迁移时把现有积分写入流水，保证 sum(amount) = users.points
+insert into points_ledger (username, amount, reason)
+select username, points, 'opening_balance' from users
+where coalesce(points, 0) <> 0 and not exists (select 1 from points_ledger);
+
+-- 单次加分：一次往返，返回最新余额
+create or replace function add_user_points(p_username text, p_amount integer, p_reason text default null)
+returns integer
+language plpgsql
+as $$
+declare
+    v_balance integer;
+begin
+    insert into points_ledger (username, amount, reason) values (p_username, p_amount, p_reason);
+    update users set points = coalesce(points, 0) + p_amount
+    where username = p_username
+    returning points into v_balance;
+    return coalesce(v_balance, 0);
+end;
+$$;
+
+-- 批量加分：p_events = [{"username": "...", "amount": 5, "reason": "..."}]，返回每个用户的最新余额
+create or replace function add_user_points_batch(p_events jsonb)
+returns table (username text, points integer)
+language plpgsql
+as $$
+#variable_conflict use_column
+begin
+    insert into points_ledger (username, amount, reason)
+    select e->>'username', (e->>'amount')::integer, e->>'reason'
+    from jsonb_array_elements(p_events) e;
+
+    return query
+    update users u set points = coalesce(u.points, 0) + s.total
+    from (
+        select e->>'username' as uname, sum((e->>'amount')::integer)::integer as total
+        from jsonb_array_elements(p_events) e
+        group by 1
+    ) s
+    where u.username = s.uname
+    returning u.username, u.points;
+end;
+$$;
+
+-- 对账：从流水重建物化余额 (仅在手工修复时执行)
+-- update users u set points = coalesce((select sum(amount) from points_ledger l where l.username = u.username), 0);
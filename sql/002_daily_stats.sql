@@ -0,0 +1,28 @@
+-- ==========================================
+-- 员工每日业绩汇总 (Team 页图表)
+-- 服务端按日聚合，只扫描时间窗口内的行，耗时与历史总量无关
+-- ==========================================
+create index if not exists leads_assigned_to_assigned_at_idx on leads (assigned_to, assigned_at);
+create index if not exists leads_assigned_to_completed_at_idx on leads (assigned_to, completed_at) where completed_at is not null;
+
+create or replace function get_user_daily_stats(p_username text, p_start date, p_end date)
+returns table (day date, claimed integer, done integer)
+language sql
+stable
+as $$
+    with c as (
+        select assigned_at::date as day, count(*) as n
+        from leads
+        where assigned_to = p_username and assigned_at >= p_start and assigned_at < p_end + 1
+        group by 1
+    ),
+    f as (
+        select completed_at::date as day, count(*) as n
+        from leads
+        where assigned_to = p_username and completed_at >= p_start and completed_at < p_end + 1
+        group by 1
+    )
+    select day, coalesce(c.n, 0)::integer, coalesce(f.n, 0)::integer
+    from c full join f using (day)
+    order by day desc;
+$$;
@@ -0,0 +1,44 @@
+-- ==========================================
+-- 员工累计数据 & 团队排行榜
+-- ==========================================
+create index if not exists leads_assigned_to_contacted_idx on leads (assigned_to, is_contacted, completed_at desc);
+
+-- 一次往返返回累计领取/完成；p_limit > 0 时附带一页完成记录
+create or replace function get_user_history_stats(p_username text, p_limit integer default 0, p_offset integer default 0)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'total_claimed', (select count(*) from leads where assigned_to = p_username),
+        'total_done', (select count(*) from leads where assigned_to = p_username and is_contacted),
+        'history', coalesce((
+            select jsonb_agg(h)
+            from (
+                select shop_name, phone, shop_link, completed_at
+                from leads
+                where assigned_to = p_username and is_contacted
+                order by completed_at desc nulls last
+                limit p_limit offset p_offset
+            ) h
+        ), '[]'::jsonb)
+    );
+$$;
+
+-- 全员排行：一次聚合代替 N×3 次请求
+create or replace function get_team_leaderboard()
+returns table (username text, real_name text, points integer, total_claimed integer, total_done integer)
+language sql
+stable
+as $$
+    select u.username, u.real_name, coalesce(u.points, 0), coalesce(l.claimed, 0)::integer, coalesce(l.done, 0)::integer
+    from users u
+    left join (
+        select assigned_to, count(*) as claimed, count(*) filter (where is_contacted) as done
+        from leads
+        where assigned_to is not null
+        group by assigned_to
+    ) l on l.assigned_to = u.username
+    where u.role <> 'admin'
+    order by 5 desc, 4 desc;
+$$;
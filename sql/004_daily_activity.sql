@@ -0,0 +1,71 @@
+-- ==========================================
+-- 每日活动汇总 (Logs 页)
+-- 按 (日期, 员工) 维护领取/完成计数器，由 leads 触发器增量更新
+-- 计数按事件记录：任务被回收后，历史日期的领取数不再变化
+-- ==========================================
+create table if not exists daily_activity (
+    day date not null,
+    username text not null,
+    claimed integer not null default 0,
+    done integer not null default 0,
+    primary key (day, username)
+);
+
+create or replace function leads_daily_activity_trg()
+returns trigger
+language plpgsql
+as $$
+begin
+    -- 领取：从公海池分配出去，或领取日期变化
+    if new.assigned_to is not null and new.assigned_at is not null
+       and (tg_op = 'INSERT' or old.assigned_to is null or old.assigned_at is distinct from new.assigned_at) then
+        insert into daily_activity (day, username, claimed) values (new.assigned_at::date, new.assigned_to, 1)
+        on conflict (day, username) do update set claimed = daily_activity.claimed + 1;
+    end if;
+    -- 完成：completed_at 首次写入
+    if new.assigned_to is not null and new.completed_at is not null
+       and (tg_op = 'INSERT' or old.completed_at is null) then
+        insert into daily_activity (day, username, done) values (new.completed_at::date, new.assigned_to, 1)
+        on conflict (day, username) do update set done = daily_activity.done + 1;
+    end if;
+    return new;
+end;
+$$;
+
+-- 回填历史数据并挂上触发器：放在同一个事务里，先锁住 leads 的写入再回填。
+-- 否则在建触发器和回填之间写入的行会先由触发器记到当天，回填遇到冲突跳过，这些 (日期, 员工) 的历史计数就少了；
+-- 回填冲突时保留已有计数 (重复执行本脚本不会用当前状态覆盖按事件记下的历史计数)
+begin;
+lock table leads in share row exclusive mode;
+
+insert into daily_activity (day, username, claimed, done)
+select day, username, sum(claimed), sum(done)
+from (
+    select assigned_at::date as day, assigned_to as username, 1 as claimed, 0 as done
+    from leads where assigned_to is not null and assigned_at is not null
+    union all
+    select completed_at::date, assigned_to, 0, 1
+    from leads where assigned_to is not null and completed_at is not null
+) t
+group by day, username
+on conflict (day, username) do nothing;
+
+drop trigger if exists leads_daily_activity on leads;
+create trigger leads_daily_activity
+after insert or update of assigned_to, assigned_at, completed_at on leads
+for each row execute function leads_daily_activity_trg();
+
+commit;
+
+-- 区间查询：单日 / 周 / 月 / 90 天都只扫描汇总表
+create or replace function get_activity_rollup(p_start date, p_end date)
+returns table (username text, claimed integer, done integer)
+language sql
+stable
+as $$
+    select username, sum(claimed)::integer, sum(done)::integer
+    from daily_activity
+    where day between p_start and p_end and username <> 'admin'
+    group by username
+    order by 3 desc, 2 desc;
+$$;
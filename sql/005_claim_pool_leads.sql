@@ -0,0 +1,23 @@
+-- ==========================================
+-- 原子领取公海池线索 (Workbench 领取任务)
+-- 原先先查后改，早上多人同时领取会选中同一批线索，后写入的人把别人的任务覆盖掉。
+-- FOR UPDATE SKIP LOCKED：并发领取时各自跳过别人正在领的行，一次往返完成挑选 + 分配
+-- ==========================================
+create index if not exists leads_pool_idx on leads (id) where assigned_to is null and is_frozen = false;
+
+create or replace function claim_pool_leads(p_username text, p_limit integer, p_day date)
+returns setof leads
+language sql
+as $$
+    update leads l
+    set assigned_to = p_username, assigned_at = p_day
+    from (
+        select id from leads
+        where assigned_to is null and is_frozen = false
+        order by id
+        limit p_limit
+        for update skip locked
+    ) pick
+    where l.id = pick.id
+    returning l.*;
+$$;
@@ -0,0 +1,47 @@
+-- ==========================================
+-- 邮件工作台客户列表 (Workbench 待跟进 / 待开发)
+-- 按 (last_email_time, id) 键集分页 + 服务端搜索，每次只取一页，耗时与名下线索总量无关
+-- 从未发过信的客户 last_email_time 为空，按 -infinity 参与排序
+-- 搜索词按字面匹配：先转义 \ % _，用户输入的 % 和 _ 不会被当成通配符
+-- ==========================================
+create index if not exists leads_mail_list_idx
+    on leads (assigned_to, has_new_reply, (coalesce(last_email_time, '-infinity')), id)
+    where email is not null;
+
+create or replace function get_mail_leads(
+    p_username text,
+    p_replied boolean,
+    p_search text default '',
+    p_desc boolean default true,
+    p_after_time timestamptz default null,
+    p_after_id bigint default null,
+    p_limit integer default 20
+)
+returns setof leads
+language plpgsql
+stable
+as $$
+declare
+    v_pattern text := '%' || replace(replace(replace(coalesce(p_search, ''), '\', '\\'), '%', '\%'), '_', '\_') || '%';
+begin
+    if p_desc then
+        return query
+        select * from leads l
+        where l.assigned_to = p_username and l.has_new_reply = p_replied and l.email is not null
+          and (coalesce(p_search, '') = '' or l.shop_name ilike v_pattern escape '\' or l.email ilike v_pattern escape '\')
+          and (p_after_id is null
+               or (coalesce(l.last_email_time, '-infinity'), l.id) < (coalesce(p_after_time, '-infinity'), p_after_id))
+        order by coalesce(l.last_email_time, '-infinity') desc, l.id desc
+        limit p_limit;
+    else
+        return query
+        select * from leads l
+        where l.assigned_to = p_username and l.has_new_reply = p_replied and l.email is not null
+          and (coalesce(p_search, '') = '' or l.shop_name ilike v_pattern escape '\' or l.email ilike v_pattern escape '\')
+          and (p_after_id is null
+               or (coalesce(l.last_email_time, '-infinity'), l.id) > (coalesce(p_after_time, '-infinity'), p_after_id))
+        order by coalesce(l.last_email_time, '-infinity'), l.id
+        limit p_limit;
+    end if;
+end;
+$$;
@@ -0,0 +1,42 @@
+-- ==========================================
+-- 分批回收过期任务 (后台定时回收，见 leads.LeadRecycler)
+-- 昨天及更早领取、仍未联系的线索退回公海池，同一遍清掉公海池里残留的 AI 话术
+-- (话术里带着原业务员的名字，换人领取后必须重新生成)。
+-- 每次最多处理 p_batch 行、只返回计数，不回传整行；SKIP LOCKED 不阻塞同时进行的领取
+-- ==========================================
+create index if not exists leads_expired_idx on leads (assigned_at) where assigned_to is not null and is_contacted = false;
+create index if not exists leads_pool_stale_msg_idx on leads (id) where assigned_to is null and ai_message <> '';
+
+create or replace function recycle_expired_leads(p_day date, p_batch integer default 500)
+returns json
+language plpgsql
+as $$
+declare
+    v_recycled integer;
+    v_cleared integer;
+begin
+    update leads l
+    set assigned_to = null, assigned_at = null, ai_message = null
+    from (
+        select id from leads
+        where assigned_to is not null and is_contacted = false and assigned_at < p_day
+        limit p_batch
+        for update skip locked
+    ) pick
+    where l.id = pick.id;
+    get diagnostics v_recycled = row_count;
+
+    update leads l
+    set ai_message = null
+    from (
+        select id from leads
+        where assigned_to is null and ai_message <> ''
+        limit p_batch
+        for update skip locked
+    ) pick
+    where l.id = pick.id;
+    get diagnostics v_cleared = row_count;
+
+    return json_build_object('recycled', v_recycled, 'cleared', v_cleared);
+end;
+$$;
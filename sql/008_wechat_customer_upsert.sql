@@ -0,0 +1,27 @@
+-- ==========================================
+-- 微信客户导入按客户编号 upsert (微信管理页导入)
+-- 原先整表一次 insert：重复导入产生重复的 customer_code。
+-- 先去重 (同一编号保留最早的一行，联系记录都在它上面)，再加唯一索引。
+-- 重复导入只更新业务员和周期，不打乱已排好的下次联系日期；只返回插入 / 更新计数
+-- ==========================================
+delete from wechat_customers a
+using wechat_customers b
+where a.customer_code = b.customer_code and a.id > b.id;
+
+create unique index if not exists wechat_customers_code_key on wechat_customers (customer_code);
+
+create or replace function upsert_wechat_customers(p_rows jsonb, p_day date)
+returns json
+language sql
+as $$
+    with up as (
+        insert into wechat_customers (customer_code, assigned_to, cycle_days, next_contact_date)
+        select r.customer_code, r.assigned_to, r.cycle_days, p_day
+        from jsonb_to_recordset(p_rows) as r(customer_code text, assigned_to text, cycle_days integer)
+        on conflict (customer_code) do update
+        set assigned_to = excluded.assigned_to, cycle_days = excluded.cycle_days
+        returning (xmax = 0) as inserted
+    )
+    select json_build_object('inserted', count(*) filter (where inserted), 'updated', count(*) filter (where not inserted))
+    from up;
+$$;
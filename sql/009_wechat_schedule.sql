@@ -0,0 +1,78 @@
+-- ==========================================
+-- 微信维护排期负载均衡 (微信维护页)
+-- 原先导入时所有客户的下次联系日期都是导入当天，打卡后再加 cycle_days，
+-- 一次大批量导入会让几千个任务落在同一天，之后每个周期又一起到期。
+-- 导入时由 leads.WechatScheduler.spread 把新客户分散到各自周期窗口内该业务员任务最少的日子；
+-- 打卡时在 [周期的 80%, 周期] 窗口内挑任务最少的一天。
+-- 到期队列按 (next_contact_date, id) 键集分页，每页耗时与队列长度无关
+-- ==========================================
+create index if not exists wechat_customers_due_idx on wechat_customers (assigned_to, next_contact_date, id);
+
+-- 业务员在 [p_start, p_end) 内每天已排的任务数
+create or replace function get_wechat_load(p_users text[], p_start date, p_end date)
+returns table (assigned_to text, day date, n integer)
+language sql
+stable
+as $$
+    select w.assigned_to, w.next_contact_date, count(*)::integer
+    from wechat_customers w
+    where w.assigned_to = any(p_users) and w.next_contact_date >= p_start and w.next_contact_date < p_end
+    group by 1, 2;
+$$;
+
+-- 导入：新客户使用行内排好的 next_contact_date (缺省为 p_day)，已有客户只更新业务员和周期
+create or replace function upsert_wechat_customers(p_rows jsonb, p_day date)
+returns json
+language sql
+as $$
+    with up as (
+        insert into wechat_customers (customer_code, assigned_to, cycle_days, next_contact_date)
+        select r.customer_code, r.assigned_to, r.cycle_days, coalesce(r.next_contact_date, p_day)
+        from jsonb_to_recordset(p_rows) as r(customer_code text, assigned_to text, cycle_days integer, next_contact_date date)
+        on conflict (customer_code) do update
+        set assigned_to = excluded.assigned_to, cycle_days = excluded.cycle_days
+        returning (xmax = 0) as inserted
+    )
+    select json_build_object('inserted', count(*) filter (where inserted), 'updated', count(*) filter (where not inserted))
+    from up;
+$$;
+
+-- 到期队列的一页：p_after_* 为上一页最后一行，为空时取第一页
+create or replace function get_wechat_tasks(
+    p_username text,
+    p_day date,
+    p_after_date date default null,
+    p_after_id bigint default null,
+    p_limit integer default 10
+)
+returns setof wechat_customers
+language sql
+stable
+as $$
+    select * from wechat_customers w
+    where w.assigned_to = p_username and w.next_contact_date <= p_day
+      and (p_after_id is null or (w.next_contact_date, w.id) > (p_after_date, p_after_id))
+    order by w.next_contact_date, w.id
+    limit p_limit;
+$$;
+
+-- 打卡：记录联系日期，下次联系日期取窗口内该业务员任务最少的一天 (相同时取较晚的一天)
+create or replace function complete_wechat_contact(p_id bigint, p_day date)
+returns date
+language plpgsql
+as $$
+declare
+    v_user text;
+    v_cycle integer;
+    v_next date;
+begin
+    select assigned_to, cycle_days into v_user, v_cycle from wechat_customers where id = p_id;
+    if not found then return null; end if;
+    select p_day + g.k into v_next
+    from generate_series(greatest(v_cycle - v_cycle / 5, 1), greatest(v_cycle, 1)) as g(k)
+    order by (select count(*) from wechat_customers w where w.assigned_to = v_user and w.next_contact_date = p_day + g.k), g.k desc
+    limit 1;
+    update wechat_customers set last_contact_date = p_day, next_contact_date = v_next where id = p_id;
+    return v_next;
+end;
+$$;
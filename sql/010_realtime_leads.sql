@@ -0,0 +1,9 @@
+-- ==========================================
+-- 工作台实时推送 (live.py)
+-- 把 leads 加入 Supabase Realtime 发布，业务员订阅 assigned_to = 本人的变更，新回复和转入的线索不用手动同步。
+-- REPLICA IDENTITY FULL 让 UPDATE 事件带上完整旧值，客户端据此忽略自己造成的变化 (已读 / 发信 / 完成)；
+-- 代价是 leads 的每次更新多写一份旧行到 WAL
+-- ==========================================
+alter table leads replica identity full;
+
+alter publication supabase_realtime add table leads;
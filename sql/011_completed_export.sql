@@ -0,0 +1,6 @@
+-- ==========================================
+-- 完成记录导出 (exports.completion_rows)
+-- 按 completed_at 区间过滤、按 (completed_at, id) 键集分页：每页都是一次索引范围扫描，
+-- 耗时与页码无关，不会每页重扫整张 leads 表
+-- ==========================================
+create index if not exists leads_completed_at_id_idx on leads (completed_at, id) where completed_at is not null;
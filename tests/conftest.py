@@ -0,0 +1,18 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+USERS = [f"rep{k}" for k in range(4)]
+
+
+@pytest.fixture(scope="session")
+def services():
+    """整个测试会话共用一组本地替身：db.supabase 是进程级缓存的客户端，只能连一个数据库"""
+    from benchmarks.standins import start_all
+    cwd = os.getcwd()
+    # st.secrets 从当前目录读取
+    services = start_all(db_latency_ms=1, seed={'users': [{'username': u, 'role': 'sales', 'points': 0} for u in USERS]}).use_in_app()
+    yield services
+    os.chdir(cwd)
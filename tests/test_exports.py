@@ -0,0 +1,30 @@
+"""批量导出：完成记录按 (completed_at, id) 分页不漏不重；写文件出错时不留临时文件"""
+import os
+import pytest
+
+
+def test_completion_rows_page_through_equal_timestamps(services):
+    from exports import completion_rows
+    # 2500 条完成记录只有 3 个不同的完成时间，分页边界必然落在相同时间的行中间
+    stamps = ["2020-03-01T09:00:00", "2020-03-01T18:30:00.250000+00:00", "2020-03-02T08:00:00"]
+    seeded = services.db.insert_many('leads', [{'shop_name': f'Done {i}', 'assigned_to': 'rep0', 'is_contacted': True,
+                                                'completed_at': stamps[i % 3]} for i in range(2500)])
+    rows = list(completion_rows("2020-03-01", "2020-03-02"))
+    assert sorted(r['id'] for r in rows) == sorted(r['id'] for r in seeded)
+    assert [(r['completed_at'], r['id']) for r in rows] == sorted((r['completed_at'], r['id']) for r in rows)
+    assert list(completion_rows("2020-03-02", "2020-03-02")) == [r for r in rows if r['completed_at'].startswith("2020-03-02")]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "xlsx"])
+def test_failed_export_leaves_no_file(fmt):
+    import exports
+    if fmt not in exports.EXPORT_FORMATS: pytest.skip("xlsxwriter 未安装")
+
+    def rows():
+        yield {'id': 1, 'shop_name': 'ok'}
+        raise ConnectionError("db down")
+
+    os.makedirs(exports.EXPORT_DIR, exist_ok=True)
+    before = set(os.listdir(exports.EXPORT_DIR))
+    with pytest.raises(ConnectionError): exports.write_export("线索", exports.LEAD_COLUMNS, rows(), fmt)
+    assert set(os.listdir(exports.EXPORT_DIR)) == before
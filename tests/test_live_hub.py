@@ -0,0 +1,84 @@
+"""实时推送中心生命周期测试：退出登录 / 空闲后停止 IMAP IDLE 线程与 Realtime 频道，IMAP 连接数有上限"""
+import time
+from conftest import USERS
+
+
+def _wait(cond, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond(): return True
+        time.sleep(0.05)
+    return False
+
+
+def _config(services, username):
+    return services.email_config(f"{username}@988.test")
+
+
+def test_unwatch_stops_watcher_and_channel(services):
+    from live import LiveHub
+    hub = LiveHub(services.realtime_url, "standin")
+    hub.watch("rep0", _config(services, "rep0"))
+    assert _wait(lambda: hub.status("rep0") == ("SUBSCRIBED", True))
+    watcher = hub._watchers["rep0"]
+
+    hub.unwatch("rep0")
+    watcher._thread.join(timeout=5)  # stop() 打断 IDLE，不用等 idle_timeout (300 秒)
+    assert not watcher._thread.is_alive()
+    assert hub.status("rep0") == (None, False)
+    assert _wait(lambda: hub._client is None)  # 最后一个频道退订后断开
+
+    hub.watch("rep0", _config(services, "rep0"))  # 重新登录后恢复推送
+    assert _wait(lambda: hub.status("rep0") == ("SUBSCRIBED", True))
+    hub.unwatch("rep0")
+
+
+def test_lead_moves_notify_both_reps(services):
+    from live import LiveHub
+    hub = LiveHub(services.realtime_url, "standin")
+    lead = services.db.insert_many('leads', [{'shop_name': 'Move me', 'assigned_to': 'rep1', 'is_contacted': False}])[0]
+    for u in ("rep1", "rep2"): hub.watch(u)
+    assert _wait(lambda: hub.status("rep1")[0] == hub.status("rep2")[0] == "SUBSCRIBED" and hub._moves is not None)
+    time.sleep(0.2)  # 共用频道的订阅确认
+    before = {u: hub.version(u) for u in ("rep1", "rep2", "rep3")}
+
+    services.db.update('leads', [('id', f"eq.{lead['id']}")], {'assigned_to': 'rep2'})  # 改派：rep1 转出、rep2 转入
+    assert _wait(lambda: hub.version("rep1") > before["rep1"] and hub.version("rep2") > before["rep2"])
+    services.db.update('leads', [('id', f"eq.{lead['id']}")], {'assigned_to': None})  # 回收
+    assert _wait(lambda: hub.version("rep2") > before["rep2"] + 1)
+    assert hub.version("rep3") == before["rep3"]  # 没在推送的业务员不记版本
+
+    for u in ("rep1", "rep2"): hub.unwatch(u)
+    assert _wait(lambda: hub._client is None and hub._moves is None)
+
+
+def test_idle_reps_are_reaped(services):
+    from live import LiveHub
+    hub = LiveHub(services.realtime_url, "standin", idle_after=0.5)
+    hub.watch("rep1", _config(services, "rep1"))
+    hub.watch("rep2", _config(services, "rep2"))
+    assert _wait(lambda: hub.status("rep1")[1] and hub.status("rep2")[1])
+    watcher = hub._watchers["rep1"]
+    time.sleep(0.6)
+    hub.watch("rep2", _config(services, "rep2"))  # rep2 还开着工作台
+    hub.reap()
+    watcher._thread.join(timeout=5)
+    assert not watcher._thread.is_alive()
+    assert hub.status("rep1") == (None, False)
+    assert hub.status("rep2")[1]
+    hub.unwatch("rep2")
+
+
+def test_watchers_are_capped(services):
+    import live
+    hub = live.LiveHub(max_watchers=2)
+    for u in USERS[:3]: hub.watch(u, _config(services, u))
+    assert sorted(hub._watchers) == ["rep0", "rep1"]  # 满额且都在活动，rep2 暂不启动
+
+    hub._seen["rep0"] -= live.REAP_EVERY + 1  # rep0 一段时间没活动，名额让给 rep2
+    evicted = hub._watchers["rep0"]
+    hub.watch("rep2", _config(services, "rep2"))
+    assert sorted(hub._watchers) == ["rep1", "rep2"]
+    evicted._thread.join(timeout=5)
+    assert not evicted._thread.is_alive()
+    for u in USERS[:3]: hub.unwatch(u)
@@ -0,0 +1,26 @@
+"""号码清洗规则：电话字段与整段文本提取的国内写法差异"""
+import pandas as pd
+import phones
+
+
+def test_kazakh_national_number_in_phone_field():
+    for raw in ("7012345678", "701 234 56 78", 7012345678, 7012345678.0, "7771234567"):
+        assert phones.normalize_phone(raw) in ("77012345678", "77771234567")
+    assert phones.normalize_phone("7812345678") is None  # 78X / 79X 不是哈萨克斯坦号段
+    assert phones.normalize_phones(["7012345678", None]).tolist() == ["77012345678", None]
+
+
+def test_russian_landline_without_trunk_prefix_in_phone_field():
+    assert phones.normalize_phone("4951234567") == "74951234567"    # 莫斯科
+    assert phones.normalize_phone("3432123456") == "73432123456"    # 叶卡捷琳堡
+    assert phones.normalize_phone("8123456789") == "78123456789"    # 圣彼得堡
+    assert phones.normalize_phone("(495) 123-45-67") == "74951234567"
+    assert phones.normalize_phone("84951234567") == "74951234567"   # 11 位带 8 的仍按原规则
+
+
+def test_ten_digit_tax_id_is_not_a_phone_in_text():
+    # 莫斯科法人 ИНН 为 77 开头的 10 位数字，文本中只认 9 开头的 10 位号码
+    assert phones.find_numbers("ИНН 7712345678, тел. 9251234567") == ["79251234567"]
+    assert phones.find_numbers("ИНН 4951234567 / 3432123456") == []
+    df = pd.DataFrame({"name": ["ООО Ромашка", "ИП Иванов"], "note": ["ИНН 7712345678", "8 (925) 123-45-67"]})
+    assert phones.first_numbers(phones.row_texts(df)).tolist() == [None, "79251234567"]
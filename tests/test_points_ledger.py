@@ -0,0 +1,69 @@
+"""积分记账并发测试：多线程同时加分 (单次 RPC + 批量缓冲混合)，在本地 PostgREST 替身上核对余额与流水"""
+import random
+import threading
+import time
+import concurrent.futures
+import pytest
+from conftest import USERS
+
+
+@pytest.fixture
+def store(services):
+    return services.db
+
+
+def _points(store, username):
+    return next(u for u in store.tables['users'] if u['username'] == username)['points']
+
+
+def _ledger_sum(store, username):
+    return sum(r['amount'] for r in store.tables['points_ledger'] if r['username'] == username)
+
+
+def test_concurrent_add_user_points(store):
+    import db
+    before = {u: _points(store, u) for u in USERS}
+    rows_before = len(store.tables['points_ledger'])
+    rnd = random.Random(0)
+    calls = [(rnd.choice(USERS), rnd.randint(1, 10), rnd.random() < 0.5) for _ in range(800)]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda c: db.add_user_points(c[0], c[1], reason="test", batched=c[2]), calls))
+    db.points_ledger.flush()
+
+    for u in USERS:
+        expected = sum(amount for name, amount, _ in calls if name == u)
+        assert _points(store, u) - before[u] == expected
+        assert db.get_user_points(u) == _points(store, u)
+    assert len(store.tables['points_ledger']) - rows_before == len(calls)
+    assert sum(_ledger_sum(store, u) for u in USERS) == sum(_points(store, u) for u in USERS)
+
+
+class _FlakyDB:
+    """前 failures 次 rpc 调用直接失败，之后转给真实客户端"""
+
+    def __init__(self, db, failures):
+        self.db, self.failures, self.calls = db, failures, 0
+        self._lock = threading.Lock()
+
+    def rpc(self, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            if self.calls <= self.failures: raise ConnectionError("db down")
+        return self.db.rpc(*args, **kwargs)
+
+
+def test_failed_flush_is_retried(store):
+    import db
+    flaky = _FlakyDB(db.supabase, failures=2)
+    ledger = db.PointsLedger(flaky, flush_interval=0.05)
+    before = _points(store, "rep0")
+    for _ in range(5): ledger.queue("rep0", 3, "test")
+
+    # 不再有 queue() 调用，只能靠失败后重新安排的定时刷写落库
+    deadline = time.time() + 5
+    while _points(store, "rep0") == before and time.time() < deadline: time.sleep(0.05)
+
+    assert ledger.pending_for("rep0") == 0
+    assert flaky.calls == 3
+    assert _points(store, "rep0") - before == 15
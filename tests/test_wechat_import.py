@@ -0,0 +1,21 @@
+"""微信客户导入排期：已有客户不占新客户的排期名额"""
+from collections import Counter
+from datetime import date, timedelta
+import pandas as pd
+
+
+def test_existing_customers_do_not_take_new_slots(services):
+    from leads import admin_import_wechat_customers
+    today = date.today()
+    # rep3 名下 60 个已有客户排在前 6 天 (每天 10 个)，第 7 天空着
+    services.db.insert_many('wechat_customers', [
+        {'customer_code': f'W-E{i}', 'assigned_to': 'rep3', 'cycle_days': 7, 'next_contact_date': (today + timedelta(days=i % 6)).isoformat()}
+        for i in range(60)])
+    codes = [f'W-E{i}' for i in range(60)] + [f'W-N{i}' for i in range(10)]
+    reports = admin_import_wechat_customers(pd.DataFrame({'客户编号': codes, '业务员': 'rep3', '周期': 7}))
+    assert [(r['inserted'], r['updated'], r['rejected']) for r in reports] == [(10, 60, 0)]
+
+    rows = {r['customer_code']: r for r in services.db.tables['wechat_customers'] if r['customer_code'].startswith('W-')}
+    # 新客户全部排到空着的那一天；已有客户保留原排期
+    assert Counter(rows[f'W-N{i}']['next_contact_date'] for i in range(10)) == {(today + timedelta(days=6)).isoformat(): 10}
+    assert all(rows[f'W-E{i}']['next_contact_date'] == (today + timedelta(days=i % 6)).isoformat() for i in range(60))
@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+import hashlib
+import importlib
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """线程安全的简单 LRU 缓存：按条目数淘汰；给出 maxbytes 时同时按值的总字节数 (len) 淘汰"""
+
+    def __init__(self, maxsize=256, maxbytes=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _weight(self, value):
+        return len(value) if self.maxbytes else 0
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data: return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._data: self._bytes -= self._weight(self._data[key])
+            self._data[key] = value
+            self._bytes += self._weight(value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize or (self.maxbytes and self._bytes > self.maxbytes and len(self._data) > 1):
+                _, old = self._data.popitem(last=False)
+                self._bytes -= self._weight(old)
+
+    def __contains__(self, key):
+        with self._lock: return key in self._data
+
+    def __len__(self):
+        with self._lock: return len(self._data)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+
+class BlobStore:
+    """按内容哈希 (sha256) 存取的二进制块：落盘保存，最近用过的留在内存 LRU 层 (按字节数淘汰)。
+    相同内容只存一份，调用方 (会话状态) 只保存哈希，需要时再读回"""
+
+    def __init__(self, root, mem_bytes=64 << 20, max_age_days=7):
+        self.root = root
+        self.max_age_days = max_age_days
+        self._mem = LRUCache(maxsize=100000, maxbytes=mem_bytes)
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def put(self, data):
+        """写入并返回哈希；已存在时只刷新修改时间 (清理按修改时间判断)"""
+        if not data: return None
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        if os.path.exists(path): os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f: f.write(data)
+            os.replace(tmp, path)
+        self._mem.put(key, data)
+        return key
+
+    def get(self, key):
+        """按哈希读回内容，不存在时返回 None"""
+        if not key: return None
+        data = self._mem.get(key)
+        if data is None:
+            try:
+                with open(self._path(key), 'rb') as f: data = f.read()
+            except OSError: return None
+            self._mem.put(key, data)
+        return data
+
+    def prune(self):
+        """删除超过 max_age_days 未写入的块，返回删除个数"""
+        cutoff, removed = time.time() - self.max_age_days * 86400, 0
+        for d, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(d, name)
+                try:
+                    if os.path.getmtime(path) < cutoff: os.remove(path); removed += 1
+                except OSError: pass
+        return removed
+
+    @property
+    def mem_bytes(self):
+        return self._mem.nbytes
+
+
+class LazyModule:
+    """延迟导入的模块代理：首次访问属性时才执行 import。
+    不提前写入 sys.modules，避免 Streamlit 按 sys.modules 探测依赖时触发导入"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None: self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def lazy_import(name):
+    return sys.modules.get(name) or LazyModule(name)
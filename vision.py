@@ -0,0 +1,161 @@
+import io
+import json
+import base64
+import math
+import concurrent.futures
+from PIL import Image, ImageOps
+from quotation import encode_thumbnail
+
+# ==========================================
+# 截图视觉解析 (预处理 + 纵向切片 + 并发识别)
+# ==========================================
+# OpenAI high detail 会把图片缩到 2048 以内、短边 768，超出部分只浪费上传和 token
+VISION_MAX_LONG = 2048
+VISION_MAX_SHORT = 768
+VISION_JPEG_QUALITY = 85
+TILE_ASPECT = 2.0      # 高宽比超过该值的长截图才切片
+TILE_OVERLAP = 0.12    # 相邻切片重叠比例，避免商品被切断
+VISION_WORKERS = 6
+CROP_WORKERS = 8
+CROP_MIN_PX = 5
+
+VISION_PROMPT = """
+    Role: Advanced OCR & Data Extraction engine specialized in Chinese E-commerce.
+    CONTEXT: Product list screenshot.
+    MISSION:
+    1. SCAN VERTICALLY: Extract EVERY variant row.
+    2. BOUNDING BOX (STRICT): Return EXACT bounding box for thumbnail. NO whitespace.
+       Return `bbox_1000`: `[ymin, xmin, ymax, xmax]` (0-1000 scale).
+    DATA:
+    - Name: Product name (Russian).
+    - Model: Variant spec.
+    - Desc: Short summary (max 5 words, Russian).
+    - Price: Number only.
+    - Qty: Number only.
+    Output JSON: { "items": [{ "name_ru": "...", "model": "...", "desc_ru": "...", "price_cny": 0.0, "qty": 0, "bbox_1000": [...] }] }
+    """
+
+
+def open_image(image_bytes):
+    """解码并按 EXIF 方向摆正；识别与裁剪必须使用同一坐标系"""
+    return ImageOps.exif_transpose(Image.open(io.BytesIO(image_bytes)))
+
+
+def encode_for_vision(img):
+    """缩到模型实际使用的分辨率并重新编码为 JPEG"""
+    w, h = img.size
+    scale = min(1.0, VISION_MAX_SHORT / min(w, h), VISION_MAX_LONG / max(w, h))
+    if scale < 1.0:
+        img = img.resize((max(1, round(w * scale)), max(1, round(h * scale))), Image.LANCZOS)
+    out = io.BytesIO()
+    img.convert('RGB').save(out, format='JPEG', quality=VISION_JPEG_QUALITY, optimize=True)
+    return out.getvalue()
+
+
+def plan_tiles(width, height, aspect=TILE_ASPECT, overlap=TILE_OVERLAP):
+    """纵向切片方案，返回 [(y0, y1), ...]；切片等高、均匀分布，重叠不少于 overlap"""
+    tile_h = int(width * aspect)
+    if tile_h <= 0 or height <= tile_h * (1 + overlap): return [(0, height)]
+    step = max(1, int(tile_h * (1 - overlap)))
+    n = math.ceil((height - tile_h) / step) + 1
+    stride = (height - tile_h) / (n - 1)
+    return [(round(i * stride), round(i * stride) + tile_h) for i in range(n)]
+
+
+def map_bbox_to_original(bbox_1000, y0, y1, height):
+    """切片内的 0-1000 坐标换算回原图的 0-1000 坐标 (切片为整宽，x 不变)"""
+    ymin, xmin, ymax, xmax = bbox_1000
+    span = y1 - y0
+    to_orig = lambda v: (y0 + v / 1000 * span) / height * 1000
+    return [round(to_orig(ymin), 1), xmin, round(to_orig(ymax), 1), xmax]
+
+
+def _valid_bbox(bbox):
+    return isinstance(bbox, (list, tuple)) and len(bbox) == 4 and all(isinstance(v, (int, float)) for v in bbox)
+
+
+def _call_vision(image_jpeg, client, model):
+    b64 = base64.b64encode(image_jpeg).decode('utf-8')
+    try:
+        res = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": [{"type": "text", "text": VISION_PROMPT}, {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{b64}", "detail": "high"}}]}],
+            response_format={"type": "json_object"}
+        )
+        return json.loads(res.choices[0].message.content)
+    except: return None
+
+
+def parse_image_with_ai(image_bytes, client, model, max_workers=VISION_WORKERS):
+    """识别一张截图；长截图切片并发识别，bbox 映射回原图并去掉重叠区的重复项"""
+    if not image_bytes or not client: return None
+    try: img = open_image(image_bytes)
+    except Exception: return None
+    width, height = img.size
+    tiles = plan_tiles(width, height)
+    if len(tiles) == 1: return _call_vision(encode_for_vision(img), client, model)
+
+    payloads = [encode_for_vision(img.crop((0, y0, width, y1))) for y0, y1 in tiles]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(tiles))) as executor:
+        results = list(executor.map(lambda p: _call_vision(p, client, model), payloads))
+    if not any(results): return None
+
+    # 每片只保留中心落在自己“归属区间”内的商品 (重叠区按中线划分)；
+    # 没有 bbox 的商品无法判断位置，按 (型号, 名称, 价格) 只保留最先返回它的那一片
+    bounds = [0] + [(tiles[i][0] + tiles[i - 1][1]) / 2 for i in range(1, len(tiles))] + [height]
+    items, first_tile = [], {}
+    for i, ((y0, y1), res) in enumerate(zip(tiles, results)):
+        for item in (res or {}).get("items", []):
+            bbox = item.get("bbox_1000")
+            if _valid_bbox(bbox):
+                mapped = map_bbox_to_original(bbox, y0, y1, height)
+                center = (mapped[0] + mapped[2]) / 2 / 1000 * height
+                if not (bounds[i] <= center < bounds[i + 1] or (i == len(tiles) - 1 and center >= bounds[i])): continue
+                item = {**item, "bbox_1000": mapped}
+            else:
+                key = (str(item.get("model", "")).strip(), str(item.get("name_ru", "")).strip(), str(item.get("price_cny", "")).strip())
+                if first_tile.setdefault(key, i) != i: continue
+            items.append(item)
+    return {"items": items}
+
+
+def parse_images_with_ai(images, client, model, max_workers=VISION_WORKERS):
+    """多张截图并行识别，返回与输入顺序一致的结果列表"""
+    if not images: return []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(images))) as executor:
+        return list(executor.map(lambda b: parse_image_with_ai(b, client, model), images))
+
+
+# ==========================================
+# 批量裁剪：一次解码，切出所有 bbox，并行编码为缩略图
+# ==========================================
+def bbox_to_box(bbox_1000, width, height):
+    """0-1000 坐标 -> 像素框 (x1, y1, x2, y2)；无效或过小返回 None"""
+    if not _valid_bbox(bbox_1000): return None
+    ymin_rel, xmin_rel, ymax_rel, xmax_rel = bbox_1000
+    x1 = max(0, int(xmin_rel / 1000 * width)); y1 = max(0, int(ymin_rel / 1000 * height))
+    x2 = min(width, int(xmax_rel / 1000 * width)); y2 = min(height, int(ymax_rel / 1000 * height))
+    if (x2 - x1) < CROP_MIN_PX or (y2 - y1) < CROP_MIN_PX: return None
+    return x1, y1, x2, y2
+
+
+def crop_images(original_image_bytes, bboxes, max_workers=CROP_WORKERS):
+    """按 bbox 列表批量裁剪，返回与 bboxes 等长的缩略图字节列表。
+    bbox 无效时使用整图缩略图；原图无法解码时原样返回原图字节"""
+    if not bboxes: return []
+    try:
+        img = open_image(original_image_bytes)
+        img.load()
+    except Exception: return [original_image_bytes] * len(bboxes)
+    width, height = img.size
+
+    boxes = [bbox_to_box(b, width, height) for b in bboxes]
+    crops = [img.crop(box) if box else None for box in boxes]
+    encode = lambda c: (encode_thumbnail(c) or (None,))[0]
+
+    full_thumb = None
+    if any(c is None for c in crops): full_thumb = encode(img.copy())
+    todo = [c for c in crops if c is not None]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(todo)))) as executor:
+        encoded = iter(list(executor.map(encode, todo)))
+    return [(next(encoded) if c is not None else full_thumb) or original_image_bytes for c in crops]